@@ -2,13 +2,16 @@
 API routes for Financial Analyst Agent
 """
 
-import re
+import asyncio
+import json
+import threading
 import uuid
 import urllib.parse
 from pathlib import Path
-from typing import List, Dict, Any
+from collections import defaultdict
+from typing import List, Dict, Any, Optional
 
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
 from fastapi.responses import FileResponse
 from qdrant_client.models import PointStruct
 
@@ -22,21 +25,49 @@ if str(project_root) not in sys.path:
 
 from backend.app.config import (
     COLLECTION_NAME, PROCESSED_DATA_DIR, UPLOAD_DIR,
-    MAX_TOKENS_PER_FILE, USE_SMART_RETRIEVAL, EMBEDDING_MODEL
+    MAX_TOKENS_PER_FILE, USE_SMART_RETRIEVAL, EMBEDDING_MODEL,
+    HOT_CONTEXT_SECTIONS, CONTEXT_CACHE_MAX_TOKENS, QDRANT_MODE, DEFAULT_FISCAL_YEAR,
+    GRAPH_MAX_DEPTH, GRAPH_MAX_FANOUT
 )
 from backend.app.models import (
-    AnalyzeRequest, AnalyzeResponse, ProcessFileResponse
+    AnalyzeRequest, AnalyzeResponse, ProcessFileResponse, AgentAnalyzeRequest, AgentAnalyzeResponse
 )
-from backend.app.services.qdrant_service import get_qdrant_client
+from backend.app.services.qdrant_service import get_qdrant_client, get_search_params, build_filing_filter
 from backend.app.services.embedding_service import get_embedding_model
-from backend.app.services.llm_service import get_gemini_model, estimate_tokens
-from backend.app.services.file_service import retrieve_relevant_sections, extract_relevant_sections
+from backend.app.services.llm_service import (
+    get_gemini_model, estimate_tokens, get_context_cache_manager, get_llm_client
+)
+from backend.app.services.file_service import (
+    retrieve_relevant_sections, extract_relevant_sections, build_company_context
+)
+from backend.app.services.response_cache import get_response_cache, bump_index_version
+from backend.app.services.table_store import get_table_store
+from backend.app.services.time_series_extractor import reload_time_series
+from backend.app.services.knowledge_graph import add_filing_to_graph, get_knowledge_graph
+from backend.app.services.multi_agent_orchestrator import get_orchestrator
+from backend.app.services.semantic_cache import get_semantic_cache
+from backend.app.services.single_flight import SingleFlight
 from backend.app.utils.html_extractor import extract_10k_html_from_txt
-from backend.app.utils.markdown_converter import convert_html_to_markdown
-from backend.app.utils.ticker_extractor import extract_ticker_from_content, extract_tickers_simple
+from backend.app.utils.markdown_converter import convert_html_to_markdown_with_stats
+from backend.app.utils.ticker_extractor import extract_ticker_from_content
+from backend.app.utils.sec_header import extract_fiscal_year, filing_stem
+from backend.app.utils.query_parser import ParsedQuery, parse_query
+from backend.app.utils.ticker_resolver import get_ticker_resolver, registrant_name
 
 router = APIRouter()
 
+# Coalesces identical in-flight /analyze requests
+_analyze_flight = SingleFlight()
+
+# Which path /agents/analyze answers took (LLM calls avoided = "agents")
+_agent_path_stats = defaultdict(int)  # Updated from worker threads: use _count_agent_path
+_agent_path_lock = threading.Lock()
+
+
+def _count_agent_path(path: str):
+    with _agent_path_lock:
+        _agent_path_stats[path] += 1
+
 
 @router.get("/")
 async def root():
@@ -48,8 +79,17 @@ async def root():
             "/health": "Health check",
             "/companies": "List all indexed companies",
             "/analyze": "Analyze financial query (POST)",
+            "/agents/analyze": "Answer from structured agent results, LLM only when needed (POST)",
+            "/agents/stats": "Answer paths taken by /agents/analyze (LLM calls avoided)",
             "/search": "Semantic search companies (POST)",
             "/upload": "Upload and process TXT file (POST)",
+            "/cache/stats": "Response, semantic and context cache statistics",
+            "/cache/semantic/audit": "Recent semantic cache hits for false-hit review",
+            "/llm/stats": "LLM client rate limit, retry and latency statistics",
+            "/graph/stats": "Knowledge graph statistics",
+            "/graph/neighbors/{node_id}": "Neighbors of a graph node by relationship",
+            "/graph/competitors/{ticker}": "Competitors within k hops",
+            "/graph/companies?metric=...": "Companies reporting all of the given metrics",
             "/files/{file_path}": "Download processed Markdown files (GET)"
         }
     }
@@ -66,6 +106,7 @@ async def health():
         return {
             "status": "healthy",
             "qdrant_connected": True,
+            "qdrant_mode": QDRANT_MODE,
             "collections": collection_names,
             "embedding_model": EMBEDDING_MODEL
         }
@@ -76,6 +117,105 @@ async def health():
         }
 
 
+@router.get("/cache/stats")
+async def cache_stats():
+    """Response and semantic cache statistics."""
+    return {
+        "response_cache": get_response_cache().get_stats(),
+        "semantic_cache": get_semantic_cache().get_stats(),
+        "context_cache": get_context_cache_manager().get_stats(),
+        "analyze_single_flight": _analyze_flight.get_stats()
+    }
+
+
+@router.get("/cache/semantic/audit")
+async def semantic_cache_audit(limit: int = 100):
+    """Recent semantic cache hits (query, matched query, similarity) for review."""
+    return {
+        "threshold": get_semantic_cache().threshold,
+        "hits": get_semantic_cache().get_audit_log(limit)
+    }
+
+
+@router.post("/cache/semantic/audit/{audit_id}/false-hit")
+async def report_semantic_false_hit(audit_id: str):
+    """Flag a semantic cache hit as wrong; the offending entry is evicted."""
+    if not get_semantic_cache().report_false_hit(audit_id):
+        raise HTTPException(status_code=404, detail=f"Audit record not found: {audit_id}")
+    return {"audit_id": audit_id, "false_hit": True}
+
+
+@router.get("/llm/stats")
+async def llm_stats():
+    """LLM client statistics (rate limiting, retries, timeouts, hedging, latency)."""
+    return get_llm_client().get_stats()
+
+
+@router.get("/graph/stats")
+async def graph_stats():
+    """Knowledge graph statistics (node/edge counts, version)."""
+    return get_knowledge_graph().get_stats()
+
+
+@router.get("/graph/neighbors/{node_id}")
+async def graph_neighbors(node_id: str, relationship: str = "COMPETES_WITH", direction: str = "both",
+                          limit: int = GRAPH_MAX_FANOUT):
+    """Neighbors of a node (e.g. COMPANY_AAPL, METRIC_Revenue) by one relationship, heaviest first."""
+    if direction not in ("out", "in", "both"):
+        raise HTTPException(status_code=400, detail="direction must be 'out', 'in' or 'both'")
+    graph = get_knowledge_graph()
+    if node_id not in graph.nodes:
+        raise HTTPException(status_code=404, detail=f"Node not found: {node_id}")
+    neighbors = graph.neighbors(node_id, relationship, direction)[:limit]
+    return {
+        "node": graph.nodes[node_id],
+        "relationship": relationship,
+        "neighbors": [{"id": neighbor_id, "weight": weight} for neighbor_id, weight in neighbors]
+    }
+
+
+@router.get("/graph/competitors/{ticker}")
+async def graph_competitors(ticker: str, depth: int = 1, fanout: int = GRAPH_MAX_FANOUT):
+    """Competitors within `depth` hops (max GRAPH_MAX_DEPTH), following the `fanout` heaviest links per company."""
+    graph = get_knowledge_graph()
+    ticker = ticker.upper()
+    return {
+        "ticker": ticker,
+        "depth": min(depth, GRAPH_MAX_DEPTH),
+        "graph_version": graph.version,
+        "competitors": graph.competitors(ticker, depth, fanout)
+    }
+
+
+@router.get("/graph/companies")
+async def graph_companies(metric: List[str] = Query(...)):
+    """Companies linked to every given metric (?metric=Revenue&metric=EBITDA)."""
+    graph = get_knowledge_graph()
+    return {
+        "metrics": metric,
+        "graph_version": graph.version,
+        "companies": graph.companies_with_metrics(metric)
+    }
+
+
+def _select_tickers(parsed: ParsedQuery, max_companies: int) -> List[str]:
+    """
+    Tickers for /analyze: the ones the query names (the resolver only returns
+    indexed companies, whether or not the knowledge graph has their filings
+    yet), plus COMPETES_WITH links for competitor queries ("AAPL vs its
+    competitors").
+    """
+    selected = list(parsed.tickers)
+    if parsed.has_intent('competitors'):
+        graph = get_knowledge_graph()
+        filed = graph.filed_tickers()
+        for ticker in list(selected):
+            for competitor in graph.competitors(ticker):
+                if competitor['ticker'] in filed and competitor['ticker'] not in selected:
+                    selected.append(competitor['ticker'])
+    return selected[:max_companies]
+
+
 @router.get("/files/{file_path:path}")
 async def serve_file(file_path: str):
     """
@@ -144,27 +284,38 @@ async def list_companies():
         # Scroll all points
         result = client.scroll(collection_name=COLLECTION_NAME, limit=1000)
         
-        companies = []
-        seen_tickers = set()
+        # One entry per ticker (its latest filing), with every indexed year listed
+        companies = {}
         
         for point in result[0]:
             payload = point.payload
             ticker = payload.get("ticker")
+            if not ticker:
+                continue
             
-            if ticker and ticker not in seen_tickers:
-                seen_tickers.add(ticker)
-                companies.append({
+            year = payload.get("year", DEFAULT_FISCAL_YEAR)
+            company = companies.get(ticker)
+            if company is None or year > company["year"]:
+                years = company["years"] if company else []
+                company = {
                     "ticker": ticker,
-                    "year": payload.get("year", "2024"),
+                    "year": year,
+                    "years": years,
                     "file_path": payload.get("file_path", ""),
                     "tables_count": payload.get("tables_count", 0),
                     "size_mb": payload.get("size_mb", 0),
                     "lines": payload.get("lines", 0)
-                })
+                }
+                companies[ticker] = company
+            if year not in company["years"]:
+                company["years"].append(year)
+        
+        for company in companies.values():
+            company["years"].sort()
         
         return {
             "total": len(companies),
-            "companies": sorted(companies, key=lambda x: x["ticker"])
+            "companies": sorted(companies.values(), key=lambda x: x["ticker"])
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing companies: {str(e)}")
@@ -229,13 +380,15 @@ async def upload_and_process(file: UploadFile = File(...)):
         steps["convert_markdown"]["status"] = "processing"
         steps["convert_markdown"]["message"] = "Converting HTML to Markdown..."
         
-        markdown_content = convert_html_to_markdown(html_content)
+        markdown_content, convert_stats = convert_html_to_markdown_with_stats(html_content)
         markdown_size = len(markdown_content)
         
         steps["convert_markdown"] = {
             "status": "completed",
-            "message": f"Markdown converted: {markdown_size:,} characters",
+            "message": (f"Markdown converted: {markdown_size:,} characters in {convert_stats['seconds']:.2f}s "
+                        f"({convert_stats['mb_per_s']:.1f} MB/s)"),
             "size": markdown_size,
+            "seconds": convert_stats["seconds"],
             "lines": len(markdown_content.splitlines()),
             "tables_estimate": markdown_content.count('|') // 3
         }
@@ -246,18 +399,27 @@ async def upload_and_process(file: UploadFile = File(...)):
         
         ticker = extract_ticker_from_content(txt_content)
         if not ticker:
-            # Try to extract from filename
-            filename_upper = file.filename.upper()
-            ticker_match = re.search(r'([A-Z]{1,5})', filename_upper)
-            if ticker_match:
-                ticker = ticker_match.group(1)
-            else:
-                ticker = "UNKNOWN"
+            steps["extract_ticker"] = {"status": "error", "message": "No ticker found in the SEC header or cover page"}
+            return ProcessFileResponse(
+                success=False,
+                steps=steps,
+                ticker=None,
+                html_size=html_size,
+                markdown_size=markdown_size,
+                markdown_preview="",
+                file_path=None,
+                error=("Could not determine the company's ticker: its CIK is not in the CIK table and the "
+                       "10-K cover page has no dei:TradingSymbol. Add the company to the CIK table and re-upload.")
+            )
+        
+        # Fiscal year from the SEC header (CONFORMED PERIOD OF REPORT)
+        year = extract_fiscal_year(txt_content) or DEFAULT_FISCAL_YEAR
         
         steps["extract_ticker"] = {
             "status": "completed",
-            "message": f"Ticker extracted: {ticker}",
-            "ticker": ticker
+            "message": f"Ticker extracted: {ticker} (fiscal year {year})",
+            "ticker": ticker,
+            "year": year
         }
         
         # Step 5: Save files (HTML + Markdown)
@@ -267,13 +429,13 @@ async def upload_and_process(file: UploadFile = File(...)):
         PROCESSED_DATA_DIR.mkdir(exist_ok=True)
         
         # Save HTML file
-        html_filename = f"{ticker}_uploaded.html"
+        html_filename = f"{filing_stem(ticker, year)}_uploaded.html"
         html_path = PROCESSED_DATA_DIR / html_filename
         with open(html_path, 'w', encoding='utf-8') as f:
             f.write(html_content)
         
         # Save Markdown file
-        md_filename = f"{ticker}_uploaded.md"
+        md_filename = f"{filing_stem(ticker, year)}_uploaded.md"
         md_path = PROCESSED_DATA_DIR / md_filename
         with open(md_path, 'w', encoding='utf-8') as f:
             f.write(markdown_content)
@@ -285,6 +447,26 @@ async def upload_and_process(file: UploadFile = File(...)):
             "html_file_path": str(html_path)
         }
         
+        # Financial tables -> typed rows for numeric lookups
+        try:
+            table_rows = get_table_store().ingest_filing(ticker, year, markdown_content, str(md_path), "uploaded")
+            print(f"[INFO] Stored {table_rows} table rows for {ticker} ({year})")
+            reload_time_series(ticker)
+            bump_index_version(ticker)  # Cached answers may quote the old figures
+        except Exception as e:
+            print(f"[WARNING] Failed to extract financial tables: {e}")
+        
+        # Knowledge graph: documents are keyed by filing (AAPL_2024), so an upload
+        # replaces the original filing of that year instead of counting it twice
+        try:
+            graph_stats = add_filing_to_graph(markdown_content, ticker, filing_stem(ticker, year))
+            print(f"[INFO] Knowledge graph updated: {graph_stats['entities']} entities, {graph_stats['relationships']} relationships")
+        except Exception as e:
+            print(f"[WARNING] Failed to update knowledge graph: {e}")
+        
+        # Queries can now name this company (first mapping of a name wins, so originals keep theirs)
+        get_ticker_resolver().add_company(ticker, registrant_name(markdown_content))
+        
         # Step 6: Index in Qdrant (for RAG pipeline)
         indexed = False
         try:
@@ -309,7 +491,8 @@ async def upload_and_process(file: UploadFile = File(...)):
                     vector=embedding,
                     payload={
                         "ticker": ticker,
-                        "year": "2024",  # Could extract from content
+                        "year": year,
+                        "ticker_year": filing_stem(ticker, year),
                         "file_path": str(md_path),
                         "summary": summary[:1000],
                         "tables_count": markdown_content.count('|') // 3,
@@ -323,7 +506,10 @@ async def upload_and_process(file: UploadFile = File(...)):
                 # Upsert to Qdrant
                 client.upsert(collection_name=COLLECTION_NAME, points=[point])
                 indexed = True
-                print(f"[SUCCESS] Indexed uploaded file for {ticker} in Qdrant")
+                print(f"[SUCCESS] Indexed uploaded file for {ticker} ({year}) in Qdrant")
+                
+                # Cached answers for this ticker are now stale
+                bump_index_version(ticker)
         except Exception as e:
             print(f"[WARNING] Failed to index uploaded file: {e}")
         
@@ -334,6 +520,7 @@ async def upload_and_process(file: UploadFile = File(...)):
             success=True,
             steps=steps,
             ticker=ticker,
+            year=year,
             html_size=html_size,
             markdown_size=markdown_size,
             markdown_preview=preview,
@@ -375,6 +562,8 @@ async def search_companies(query: str, limit: int = 10):
         results = client.query_points(
             collection_name=COLLECTION_NAME,
             query=query_embedding,
+            search_params=get_search_params(),
+            with_payload=["ticker", "year", "summary"],
             limit=limit
         )
         
@@ -382,7 +571,7 @@ async def search_companies(query: str, limit: int = 10):
         for result in results.points:
             companies.append({
                 "ticker": result.payload.get("ticker", ""),
-                "year": result.payload.get("year", "2024"),
+                "year": result.payload.get("year", DEFAULT_FISCAL_YEAR),
                 "score": result.score,
                 "summary": result.payload.get("summary", "")[:500]
             })
@@ -399,122 +588,265 @@ async def search_companies(query: str, limit: int = 10):
 async def analyze(request: AnalyzeRequest):
     """
     Analyze financial query using RAG pipeline.
+    Identical concurrent requests are coalesced into one analysis.
     """
     try:
         # Step 1: Router - Extract tickers from query
-        tickers = extract_tickers_simple(request.query)
+        parsed = parse_query(request.query)
         
-        if not tickers:
+        if not parsed.tickers:
             raise HTTPException(
                 status_code=400,
                 detail="No companies found in query. Please mention company names or tickers."
             )
         
-        # Limit companies
-        tickers = tickers[:request.max_companies]
+        # Limit companies (named tickers, plus graph competitors when asked for)
+        tickers = _select_tickers(parsed, request.max_companies)
         
         print(f"[INFO] Analyzing query: '{request.query}'")
         print(f"[INFO] Companies found: {tickers}")
         
-        # Step 2: Retriever - Find companies in Qdrant
-        client = get_qdrant_client()
-        file_paths = []
-        companies_data = []
+        # Step 1b: Response cache - same query over the same index version
+        response_cache = get_response_cache()
+        version_stamp = response_cache.get_version_stamp(tickers)
+        cache_key = response_cache.make_key(request.query, tickers, version_stamp)
+        cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            print(f"[INFO] ⚡ Response cache hit for '{request.query}'")
+            cached_response['metadata']['cache'] = 'hit'
+            return AnalyzeResponse(**cached_response)
+        
+        # Steps 1c-4 run in a worker thread; concurrent identical requests
+        # (same cache key) await the same in-flight analysis
+        response, shared = await _analyze_flight.do(
+            cache_key,
+            lambda: asyncio.to_thread(_run_analysis, request, parsed, tickers, version_stamp, cache_key)
+        )
+        if shared:
+            response = response.model_copy(deep=True)
+            response.metadata['cache'] = 'coalesced'
+        return response
         
-        for ticker in tickers:
-            # Find company in Qdrant using filter (index now exists)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing: {str(e)}")
+
+
+@router.post("/agents/analyze", response_model=AgentAnalyzeResponse)
+async def agents_analyze(request: AgentAnalyzeRequest):
+    """
+    Answer with the multi-agent orchestrator first (trends, comparisons,
+    risk factors from structured data); Gemini is only called when no agent
+    could answer or narrate=true. The response's path says which one ran.
+    """
+    parsed = parse_query(request.query)
+    if not parsed.tickers:
+        raise HTTPException(
+            status_code=400,
+            detail="No companies found in query. Please mention company names or tickers."
+        )
+    tickers = _select_tickers(parsed, request.max_companies)
+    
+    try:
+        return await asyncio.to_thread(_run_agents, request, parsed, tickers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing: {str(e)}")
+
+
+@router.get("/agents/stats")
+async def agents_stats():
+    """How /agents/analyze requests were answered; every "agents" answer is an LLM call avoided."""
+    with _agent_path_lock:
+        stats = dict(_agent_path_stats)
+    return {**stats, "llm_calls_avoided": stats.get("agents", 0)}
+
+
+def _run_agents(request: AgentAnalyzeRequest, parsed: ParsedQuery, tickers: List[str]) -> AgentAnalyzeResponse:
+    """Orchestrator pass, then Gemini narration over the agents' results only if needed."""
+    orchestrator = get_orchestrator()
+    query_embedding = None
+    embedding_model = get_embedding_model()
+    if embedding_model is not None:
+        query_embedding = embedding_model.encode(request.query, convert_to_numpy=True)
+    
+    results = orchestrator.process_query(request.query, tickers[0], tickers, query_embedding=query_embedding,
+                                         parsed=parsed)
+    summary = orchestrator.generate_summary(results)
+    agent_results = results['agent_results']
+    answered = any(result.get('success') for result in agent_results.values())
+    
+    path = "agents"
+    analysis = None
+    llm_reason = "narration requested" if request.narrate else (None if answered else "no agent could answer")
+    if llm_reason:
+        if get_gemini_model() is None:
+            llm_reason += " (Gemini not configured)"
+        else:
+            # Narrate from what the agents already have: no second retrieval
+            sections = results['data_retrieval'].get('sections', [])
+            documents = "\n\n".join(
+                f"### {section['metadata'].get('ticker', '')} - {section['section']}\n{section['text']}"
+                for section in sections
+            )
+            prompt = (
+                f"User Query: {request.query}\n\n"
+                f"Structured results from analysis agents:\n{json.dumps(agent_results, default=str)}\n\n"
+                f"Documents:\n{documents}"
+            )
             try:
-                result = client.scroll(
-                    collection_name=COLLECTION_NAME,
-                    scroll_filter={
-                        "must": [
-                            {"key": "ticker", "match": {"value": ticker}}
-                        ]
-                    },
-                    limit=10  # Get multiple in case there are uploaded versions
-                )
-                
-                # Prefer uploaded files if available, otherwise use original
-                matching_point = None
-                uploaded_point = None
-                
-                for point in result[0]:
-                    payload = point.payload
-                    if payload.get("source") == "uploaded":
-                        uploaded_point = point
-                    elif not matching_point:
-                        matching_point = point
-                
-                # Use uploaded file if available, otherwise use original
-                if uploaded_point:
-                    payload = uploaded_point.payload
-                    file_path = payload.get("file_path")
-                    print(f"[INFO] Using uploaded file for {ticker}")
-                elif matching_point:
-                    payload = matching_point.payload
-                    file_path = payload.get("file_path")
-                    print(f"[INFO] Using original file for {ticker}")
-                else:
-                    print(f"[WARNING] Ticker {ticker} not found in Qdrant")
-                    continue
+                analysis = get_context_cache_manager().generate(prompt)
+                path = "llm"
             except Exception as e:
-                # Fallback: scroll all and filter in Python
-                print(f"[WARNING] Filter failed, using fallback: {e}")
-                result = client.scroll(collection_name=COLLECTION_NAME, limit=1000)
-                matching_point = None
-                for point in result[0]:
-                    if point.payload.get("ticker") == ticker:
-                        matching_point = point
-                        break
-                if not matching_point:
-                    print(f"[WARNING] Ticker {ticker} not found in Qdrant")
-                    continue
-                payload = matching_point.payload
-                file_path = payload.get("file_path")
+                print(f"[ERROR] Gemini narration failed: {e}")
+                llm_reason += f" (Gemini failed: {e})"
+    
+    # Only answers the agents handled on their own count as LLM calls avoided
+    _count_agent_path(path if path == "llm" or not llm_reason else "llm_failed")
+    print(f"[INFO] /agents/analyze answered via {path} path ({summary})")
+    
+    return AgentAnalyzeResponse(
+        query=request.query,
+        companies_found=tickers,
+        path=path,
+        summary=summary,
+        analysis=analysis,
+        agent_results=agent_results,
+        metadata={
+            "active_agents": results['active_agents'],
+            "sections_retrieved": results['sections_retrieved'],
+            "llm_reason": llm_reason,
+            "timing": results['timing']
+        }
+    )
+
+
+def _select_years(available: List[str], requested: List[str], span: Optional[int]) -> List[str]:
+    """
+    Fiscal years to analyze out of a company's indexed filings (sorted):
+    years named in the query, else the latest `span` years ("past 3 years"),
+    else the latest filing.
+    """
+    if requested:
+        matched = [year for year in available if year in requested]
+        if matched:
+            return matched
+        print(f"[WARNING] No filings for {requested}, using latest ({available[-1]})")
+    if span:
+        return available[-span:]
+    return available[-1:]
+
+
+def _run_analysis(request: AnalyzeRequest, parsed: ParsedQuery, tickers: List[str], version_stamp: str,
+                  cache_key: str) -> AnalyzeResponse:
+    """
+    Analysis pipeline behind the response cache: semantic cache, retrieval,
+    Gemini generation. Caches successful answers.
+    """
+    response_cache = get_response_cache()
+    
+    # Step 1c: Semantic cache - paraphrases of already answered queries.
+    # The query embedding is computed once here and reused for retrieval.
+    query_embedding = None
+    embedding_model = get_embedding_model()
+    if embedding_model is not None:
+        query_embedding = embedding_model.encode(request.query, convert_to_numpy=True)
+    
+    semantic_cache = get_semantic_cache()
+    if query_embedding is not None:
+        semantic_response = semantic_cache.lookup(request.query, query_embedding, tickers, version_stamp)
+        if semantic_response is not None:
+            semantic_response['query'] = request.query
+            semantic_response['metadata']['cache'] = 'semantic_hit'
+            return AnalyzeResponse(**semantic_response)
+    
+    # Step 2: Retriever - Find each company's filings in Qdrant and pick the fiscal years
+    client = get_qdrant_client()
+    file_paths = []
+    companies_data = []
+    requested_years = list(parsed.years)
+    year_span = parsed.year_span
+    
+    for ticker in tickers:
+        # Find company in Qdrant using filter (index now exists)
+        try:
+            result = client.scroll(
+                collection_name=COLLECTION_NAME,
+                scroll_filter=build_filing_filter(ticker),
+                limit=100  # One point per filing year, plus uploaded versions
+            )
+            points = result[0]
+        except Exception as e:
+            # Fallback: scroll all and filter in Python
+            print(f"[WARNING] Filter failed, using fallback: {e}")
+            result = client.scroll(collection_name=COLLECTION_NAME, limit=1000)
+            points = [point for point in result[0] if point.payload.get("ticker") == ticker]
+        
+        # One filing per fiscal year; prefer uploaded files over the original of the same year
+        filings = {}
+        for point in points:
+            year = point.payload.get("year", DEFAULT_FISCAL_YEAR)
+            if year not in filings or point.payload.get("source") == "uploaded":
+                filings[year] = point
+        
+        if not filings:
+            print(f"[WARNING] Ticker {ticker} not found in Qdrant")
+            continue
+        
+        years = _select_years(sorted(filings), requested_years, year_span)
+        print(f"[INFO] Filings for {ticker}: {sorted(filings)} -> using {years}")
+        
+        for year in years:
+            payload = filings[year].payload
+            file_path = payload.get("file_path")
+            source = "uploaded" if payload.get("source") == "uploaded" else "original"
+            print(f"[INFO] Using {source} file for {ticker} ({year})")
+            
+            if not file_path:
+                print(f"[WARNING] No file_path in payload for {ticker} ({year})")
+                continue
             
             # Normalize path (handle Windows/Unix paths)
-            if file_path:
-                # Convert backslashes to forward slashes
-                file_path = file_path.replace('\\', '/')
-                # Try multiple path variations
-                path_variations = [
-                    Path(file_path),  # Original path
-                    PROCESSED_DATA_DIR / Path(file_path).name,  # Just filename in processed_data
-                    PROCESSED_DATA_DIR / f"{ticker}_2024.md", # Fallback: construct from ticker
-                    Path(file_path).resolve(),  # Absolute path
-                ]
-                
-                found_path = None
-                for path_var in path_variations:
-                    if path_var.exists():
-                        found_path = path_var
-                        break
+            # Convert backslashes to forward slashes
+            file_path = file_path.replace('\\', '/')
+            # Try multiple path variations
+            path_variations = [
+                Path(file_path),  # Original path
+                PROCESSED_DATA_DIR / Path(file_path).name,  # Just filename in processed_data
+                PROCESSED_DATA_DIR / f"{filing_stem(ticker, year)}.md",  # Fallback: construct from ticker and year
+                Path(file_path).resolve(),  # Absolute path
+            ]
+            
+            found_path = None
+            for path_var in path_variations:
+                if path_var.exists():
+                    found_path = path_var
+                    break
+            
+            if found_path:
+                # Load full file
+                with open(found_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
                 
-                if found_path:
-                    # Load full file
-                    with open(found_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    file_paths.append(str(found_path))
-                    companies_data.append({
-                        "ticker": ticker,
-                        "file_path": str(found_path),
-                        "content_length": len(content),
-                        "metadata": payload
-                    })
-                    print(f"[INFO] Loaded file for {ticker}: {found_path}")
-                else:
-                    print(f"[WARNING] File not found for {ticker}. Tried: {file_path}")
-                    print(f"[WARNING] Variations tried: {path_variations}")
+                file_paths.append(str(found_path))
+                companies_data.append({
+                    "ticker": ticker,
+                    "year": year,
+                    "file_path": str(found_path),
+                    "content_length": len(content),
+                    "metadata": payload
+                })
+                print(f"[INFO] Loaded file for {ticker} ({year}): {found_path}")
             else:
-                print(f"[WARNING] No file_path in payload for {ticker}")
-        
-        # Step 4: Generator - Analyze with Gemini
-        gemini = get_gemini_model()
-        
-        if gemini is None:
-            # Fallback: Return file info without analysis
-            analysis = f"""
+                print(f"[WARNING] File not found for {ticker}. Tried: {file_path}")
+                print(f"[WARNING] Variations tried: {path_variations}")
+    
+    # Step 4: Generator - Analyze with Gemini
+    gemini = get_gemini_model()
+    retrieved_chunk_ids = []
+    analysis_succeeded = False
+    
+    if gemini is None:
+        # Fallback: Return file info without analysis
+        analysis = f"""
 [INFO] Analysis for query: "{request.query}"
 
 Companies analyzed: {', '.join(tickers)}
@@ -523,122 +855,130 @@ Total content size: {sum(c['content_length'] for c in companies_data)} character
 
 [NOTE] Gemini API not configured. Set GOOGLE_API_KEY environment variable to enable analysis.
 """
-        else:
-            # Prepare content for Gemini
-            all_content = []
-            total_tokens = 0
+    else:
+        # Cached prompt prefix: system prompt, plus the company's core
+        # sections once a single-company ticker becomes hot
+        context_cache = get_context_cache_manager()
+        prefix = None
+        if len(companies_data) == 1 and context_cache.record_query(companies_data[0]['ticker']):
+            hot_ticker = companies_data[0]['ticker']
+            hot_year = companies_data[0]['year']
             
-            for company_data in companies_data:
-                ticker = company_data['ticker']
-                file_path = company_data['file_path']
-                
-                # Priority 1: ALWAYS try smart section retrieval first (Proper RAG)
-                sections = retrieve_relevant_sections(request.query, ticker, limit=5)  # Reduced from 10 to 5
+            def company_prefix_contents():
+                company_context = build_company_context(hot_ticker, HOT_CONTEXT_SECTIONS, CONTEXT_CACHE_MAX_TOKENS,
+                                                        year=hot_year)
+                contents = [company_context['text']] if company_context['text'] else []
+                return contents, {'chunk_ids': company_context['chunk_ids']}
+            
+            try:
+                prefix = context_cache.get_prefix(f"company:{hot_ticker}:{hot_year}:{version_stamp}", company_prefix_contents)
+            except Exception as e:
+                print(f"[WARNING] Could not build cached context for {hot_ticker}: {e}")
+        cached_chunk_ids = prefix['metadata'].get('chunk_ids', set()) if prefix else set()
+        
+        # Prepare content for Gemini
+        all_content = []
+        total_tokens = 0
+        
+        for company_data in companies_data:
+            ticker = company_data['ticker']
+            year = company_data['year']
+            file_path = company_data['file_path']
+            
+            # Priority 1: ALWAYS try smart section retrieval first (Proper RAG)
+            sections = retrieve_relevant_sections(request.query, ticker, limit=5, query_embedding=query_embedding,
+                                                  year=year)  # Reduced from 10 to 5
+            
+            if sections and len(sections) > 0:
+                # Use retrieved sections (PROPER RAG) with token budget
+                section_texts = []
+                total_retrieved_tokens = 0
+                MAX_TOKENS_BUDGET = 50000  # Max 20K tokens from RAG
                 
-                if sections and len(sections) > 0:
-                    # Use retrieved sections (PROPER RAG) with token budget
-                    section_texts = []
-                    total_retrieved_tokens = 0
-                    MAX_TOKENS_BUDGET = 50000  # Max 20K tokens from RAG
+                for section in sections:
+                    if section.get('id') in cached_chunk_ids:
+                        # Already in the cached company context
+                        retrieved_chunk_ids.append(section['id'])
+                        continue
                     
-                    for section in sections:
-                        section_name = section.get('section', 'Unknown')
-                        section_text = section.get('text', '')
-                        score = section.get('score', 0)
-                        section_tokens = estimate_tokens(section_text)
-                        
-                        # Stop if adding this section would exceed budget
-                        if total_retrieved_tokens + section_tokens > MAX_TOKENS_BUDGET:
-                            print(f"[INFO] Token budget reached ({MAX_TOKENS_BUDGET:,} tokens), stopping retrieval")
-                            break
-                        
-                        section_texts.append(f"### {section_name} (Relevance: {score:.3f})\n{section_text}")
-                        total_retrieved_tokens += section_tokens
+                    section_name = section.get('section', 'Unknown')
+                    section_text = section.get('text', '')
+                    score = section.get('score', 0)
+                    section_tokens = estimate_tokens(section_text)
                     
-                    content = "\n\n".join(section_texts)
-                    tokens = estimate_tokens(content)
-                    total_tokens += tokens
-                    print(f"[INFO] ✅ Using RAG retrieval for {ticker}: {tokens:,} tokens from {len(section_texts)} relevant sections")
-                    full_file_tokens = estimate_tokens(Path(file_path).read_text(encoding='utf-8'))
-                    savings = ((full_file_tokens - tokens) / full_file_tokens) * 100
-                    print(f"[INFO] 📊 Token efficiency: Retrieved {tokens:,} tokens instead of full file (~{full_file_tokens:,} tokens) - {savings:.1f}% reduction")
-                else:
-                    # Fallback to full file ONLY if no chunks found (should be rare)
-                    print(f"[WARNING] ⚠️  No relevant sections found for {ticker}, falling back to full file")
-                    print(f"[WARNING] 💡 Run 'python -m backend.scripts.chunk_markdown_files' to enable proper RAG")
-                    content = Path(file_path).read_text(encoding='utf-8')
-                    tokens = estimate_tokens(content)
-                    total_tokens += tokens
-                    print(f"[INFO] Using full file for {ticker}: {tokens:,} tokens")
-                
-                # If total is too large, use smart extraction (fallback)
-                if total_tokens > MAX_TOKENS_PER_FILE * len(companies_data):
-                    print(f"[INFO] Content too large ({total_tokens} tokens), extracting relevant sections...")
-                    content = extract_relevant_sections(content, request.query)
-                    tokens = estimate_tokens(content)
-                    print(f"[INFO] Extracted content: {tokens} tokens")
+                    # Stop if adding this section would exceed budget
+                    if total_retrieved_tokens + section_tokens > MAX_TOKENS_BUDGET:
+                        print(f"[INFO] Token budget reached ({MAX_TOKENS_BUDGET:,} tokens), stopping retrieval")
+                        break
+                    
+                    section_texts.append(f"### {section_name} (Relevance: {score:.3f})\n{section_text}")
+                    total_retrieved_tokens += section_tokens
+                    if section.get('id'):
+                        retrieved_chunk_ids.append(section['id'])
                 
-                all_content.append(f"=== {ticker} ({company_data['metadata'].get('year', '2024')}) ===\n{content}\n")
+                content = "\n\n".join(section_texts)
+                tokens = estimate_tokens(content)
+                total_tokens += tokens
+                print(f"[INFO] ✅ Using RAG retrieval for {ticker}: {tokens:,} tokens from {len(section_texts)} relevant sections")
+                full_file_tokens = estimate_tokens(Path(file_path).read_text(encoding='utf-8'))
+                savings = ((full_file_tokens - tokens) / full_file_tokens) * 100
+                print(f"[INFO] 📊 Token efficiency: Retrieved {tokens:,} tokens instead of full file (~{full_file_tokens:,} tokens) - {savings:.1f}% reduction")
+            else:
+                # Fallback to full file ONLY if no chunks found (should be rare)
+                print(f"[WARNING] ⚠️  No relevant sections found for {ticker}, falling back to full file")
+                print(f"[WARNING] 💡 Run 'python -m backend.scripts.chunk_markdown_files' to enable proper RAG")
+                content = Path(file_path).read_text(encoding='utf-8')
+                tokens = estimate_tokens(content)
+                total_tokens += tokens
+                print(f"[INFO] Using full file for {ticker}: {tokens:,} tokens")
             
-            # Combine all content
-            combined_content = "\n\n".join(all_content)
-            final_tokens = estimate_tokens(combined_content)
+            # If total is too large, use smart extraction (fallback)
+            if total_tokens > MAX_TOKENS_PER_FILE * len(companies_data):
+                print(f"[INFO] Content too large ({total_tokens} tokens), extracting relevant sections...")
+                content = extract_relevant_sections(content, request.query, parsed)
+                tokens = estimate_tokens(content)
+                print(f"[INFO] Extracted content: {tokens} tokens")
             
-            print(f"[INFO] Sending to Gemini: {final_tokens} tokens")
+            all_content.append(f"=== {ticker} ({year}) ===\n{content}\n")
+        
+        # Combine all content
+        combined_content = "\n\n".join(all_content)
+        final_tokens = estimate_tokens(combined_content)
+        
+        print(f"[INFO] Sending to Gemini: {final_tokens} tokens")
+        
+        prompt = f"User Query: {request.query}\n\nDocuments:\n{combined_content}"
+        
+        try:
+            # Generate response (system prompt / company sections come from the cached prefix)
+            analysis = context_cache.generate(prompt, prefix)
             
-            # Create prompt
-            system_prompt = """You are a financial analyst expert. Analyze the provided financial documents and answer the user's query.
-
-CRITICAL INSTRUCTIONS FOR TABLES:
-- Pay EXTREMELY close attention to TABLES - they contain critical financial data
-- Preserve EXACT numbers, dates, and percentages from tables - do not round or approximate
-- When showing tables in your response, you MUST use proper markdown table format with pipe separators (|)
-- DO NOT use tabs, spaces, or any other format - ONLY use markdown table format
-- Markdown table format example:
-  | Column 1 | Column 2 | Column 3 |
-  |----------|----------|----------|
-  | Data 1   | Data 2   | Data 3   |
-- Extract data directly from tables - do not make up numbers
-- If the query asks for a table, reconstruct it completely with all rows and columns in markdown format
-- Preserve table structure: row headers (security types, categories), column headers (years, periods), and all data cells
-- For calculations (percentages, differences), show your work or cite the exact values used
-- Cite specific sections and table names when referencing data (e.g., "Interest Rate Risk table", "Item 7A")
-- If data is not found, clearly state that rather than guessing
-
-Format your response as a clear, structured analysis with properly formatted markdown tables when relevant. ALWAYS use | separators for tables, never tabs or spaces."""
+            # Post-process to fix table formatting if needed
+            # Check if response contains tab-separated tables
+            if '\t' in analysis and analysis.count('\t') > 10:
+                print("[INFO] Detected tab-separated tables, attempting to fix format...")
+                try:
+                    # Simple fix: replace tabs with | separators for table-like lines
+                    lines = analysis.split('\n')
+                    fixed_lines = []
+                    for line in lines:
+                        if '\t' in line and len(line.split('\t')) >= 3:
+                            # Convert tab-separated to markdown table row
+                            cells = [cell.strip() for cell in line.split('\t')]
+                            fixed_lines.append('| ' + ' | '.join(cells) + ' |')
+                        else:
+                            fixed_lines.append(line)
+                    analysis = '\n'.join(fixed_lines)
+                    print("[INFO] Table formatting fixed!")
+                except Exception as e:
+                    print(f"[WARNING] Could not fix table formatting: {e}")
             
-            full_prompt = f"{system_prompt}\n\nUser Query: {request.query}\n\nDocuments:\n{combined_content}"
+            analysis_succeeded = True
+            print(f"[SUCCESS] Gemini analysis complete!")
             
-            try:
-                # Generate response
-                response = gemini.generate_content(full_prompt)
-                analysis = response.text
-                
-                # Post-process to fix table formatting if needed
-                # Check if response contains tab-separated tables
-                if '\t' in analysis and analysis.count('\t') > 10:
-                    print("[INFO] Detected tab-separated tables, attempting to fix format...")
-                    try:
-                        # Simple fix: replace tabs with | separators for table-like lines
-                        lines = analysis.split('\n')
-                        fixed_lines = []
-                        for line in lines:
-                            if '\t' in line and len(line.split('\t')) >= 3:
-                                # Convert tab-separated to markdown table row
-                                cells = [cell.strip() for cell in line.split('\t')]
-                                fixed_lines.append('| ' + ' | '.join(cells) + ' |')
-                            else:
-                                fixed_lines.append(line)
-                        analysis = '\n'.join(fixed_lines)
-                        print("[INFO] Table formatting fixed!")
-                    except Exception as e:
-                        print(f"[WARNING] Could not fix table formatting: {e}")
-                
-                print(f"[SUCCESS] Gemini analysis complete!")
-                
-            except Exception as e:
-                print(f"[ERROR] Gemini analysis failed: {e}")
-                analysis = f"""
+        except Exception as e:
+            print(f"[ERROR] Gemini analysis failed: {e}")
+            analysis = f"""
 [ERROR] Analysis failed: {str(e)}
 
 Companies analyzed: {', '.join(tickers)}
@@ -647,18 +987,26 @@ Total tokens: {final_tokens}
 
 Please check your GEMINI_API_KEY and try again.
 """
-        
-        return AnalyzeResponse(
-            query=request.query,
-            companies_found=tickers,
-            file_paths=file_paths,
-            analysis=analysis,
-            metadata={
-                "total_files": len(file_paths),
-                "total_content_size": sum(c['content_length'] for c in companies_data),
-                "companies": companies_data
-            }
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error analyzing: {str(e)}")
+    
+    response = AnalyzeResponse(
+        query=request.query,
+        companies_found=tickers,
+        file_paths=file_paths,
+        analysis=analysis,
+        metadata={
+            "total_files": len(file_paths),
+            "total_content_size": sum(c['content_length'] for c in companies_data),
+            "companies": companies_data,
+            "retrieved_chunk_ids": retrieved_chunk_ids,
+            "cache": "miss"
+        }
+    )
+    
+    # Only cache real answers (not fallbacks or errors)
+    if analysis_succeeded:
+        response_cache.set(cache_key, tickers, retrieved_chunk_ids, response.model_dump())
+        if query_embedding is not None:
+            semantic_cache.add(request.query, query_embedding, tickers, version_stamp, response.model_dump())
+    
+    return response
+
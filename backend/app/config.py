@@ -9,42 +9,83 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-# Qdrant Configuration
-QDRANT_URL = os.getenv("QDRANT_URL", "")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
-
-# Collections
-COLLECTION_NAME = "financial_reports"  # Original collection (company-level)
-SECTIONS_COLLECTION = "financial_sections"  # New collection (section-level chunks)
-
 # Embedding Model
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 EMBEDDING_DIM = 384
 
-# Directories
-BASE_DIR = Path(__file__).parent.parent.parent
-PROCESSED_DATA_DIR = BASE_DIR / "processed_data"
-UPLOAD_DIR = BASE_DIR / "uploads"
-OUTPUT_DIR = BASE_DIR / "output"
-DATA_DIR = BASE_DIR / "data"
+# Directories, store paths and Qdrant settings (no credentials needed, see paths.py)
+from backend.app.paths import (
+    QDRANT_MODE, QDRANT_URL, QDRANT_API_KEY, QDRANT_PREFER_GRPC, VECTOR_QUANTIZATION,
+    QUANTIZATION_RESCORE, QUANTIZATION_OVERSAMPLING, HNSW_M, HNSW_EF_CONSTRUCT, HNSW_EF_SEARCH,
+    COLLECTION_NAME, SECTIONS_COLLECTION,
+    BASE_DIR, PROCESSED_DATA_DIR, UPLOAD_DIR, OUTPUT_DIR, DATA_DIR, CACHE_DIR, CHUNK_STORE_DIR,
+    TABLE_STORE_PATH, TIME_SERIES_PANEL_PATH, KNOWLEDGE_GRAPH_PATH, CIK_TICKERS_PATH, QDRANT_LOCAL_PATH,
+    RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES,
+    GRAPH_MAX_DEPTH, GRAPH_MAX_FANOUT, GRAPH_MEMO_MAX_ENTRIES
+)
 
 # Create directories if they don't exist
 UPLOAD_DIR.mkdir(exist_ok=True)
 PROCESSED_DATA_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
+CACHE_DIR.mkdir(exist_ok=True)
 
 # Gemini Configuration
 GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")  # Optional override (e.g. a local fake server)
+
+# LLM Client Limits (rate limiting, concurrency, retries, deadlines)
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))  # Deadline per call, retries included
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE_SECONDS = 1.0
+LLM_BACKOFF_MAX_SECONDS = 20.0
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"  # Duplicate calls slower than p95
+
+# Gemini Context Caching (system prompt + hot-company sections)
+CONTEXT_CACHE_BACKEND = os.getenv("CONTEXT_CACHE_BACKEND", "gemini")  # "gemini" (provider-side) or "local"
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "3600"))
+CONTEXT_CACHE_MAX_HANDLES = int(os.getenv("CONTEXT_CACHE_MAX_HANDLES", "16"))
+CONTEXT_CACHE_HOT_THRESHOLD = int(os.getenv("CONTEXT_CACHE_HOT_THRESHOLD", "3"))  # Queries before a ticker gets cached
+CONTEXT_CACHE_MAX_TOKENS = 100000  # Cap on company sections per cached context
+HOT_CONTEXT_SECTIONS = [
+    "MD&A", "Financial Statements", "Income Statement", "Balance Sheet",
+    "Cash Flow Statement", "Segment Information",
+]
+
+# Filings
+from backend.app.utils.sec_header import DEFAULT_FISCAL_YEAR  # Defined with the filename helpers (offline scripts)
 
 # Analysis Configuration
 MAX_TOKENS_PER_FILE = 800000  # Leave room in 1M token window
 USE_SMART_RETRIEVAL = True  # Toggle: True = smart retrieval, False = full file
 
+# Multi-Agent Orchestrator (agents run concurrently once their dependencies finish)
+AGENT_TIMEOUT_SECONDS = float(os.getenv("AGENT_TIMEOUT_SECONDS", "30"))  # Per agent
+AGENT_MAX_WORKERS = int(os.getenv("AGENT_MAX_WORKERS", "4"))
+
+# Knowledge Graph Queries (/graph endpoints): GRAPH_* in paths.py, re-exported above
+
+# Response Cache Configuration (/analyze answers): RESPONSE_CACHE_* in paths.py,
+# since the indexing scripts open the cache to invalidate it
+
+# Semantic Cache Configuration (paraphrased queries)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))  # Cosine similarity
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "256"))  # Per ticker set
+SEMANTIC_CACHE_MAX_TOTAL_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_TOTAL_ENTRIES", "4096"))  # All ticker sets (LRU sets dropped)
+SEMANTIC_CACHE_AUDIT_SIZE = 500  # Recent hits kept for false-hit review
+
 # Validate required environment variables
-if not QDRANT_URL:
+if VECTOR_QUANTIZATION not in ("none", "scalar", "binary"):
+    raise ValueError(f"VECTOR_QUANTIZATION must be 'none', 'scalar' or 'binary', got '{VECTOR_QUANTIZATION}'")
+if QDRANT_MODE not in ("remote", "local", "memory"):
+    raise ValueError(f"QDRANT_MODE must be 'remote', 'local' or 'memory', got '{QDRANT_MODE}'")
+if QDRANT_MODE == "remote" and not QDRANT_URL:
     raise ValueError("QDRANT_URL environment variable is required. Please set it in .env file")
-if not QDRANT_API_KEY:
+if QDRANT_MODE == "remote" and not QDRANT_API_KEY:
     raise ValueError("QDRANT_API_KEY environment variable is required. Please set it in .env file")
 if not GEMINI_API_KEY:
     raise ValueError("GOOGLE_API_KEY environment variable is required. Please set it in .env file")
@@ -3,6 +3,7 @@ Main FastAPI application entry point
 """
 
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Add project root to Python path
@@ -14,12 +15,22 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.app.api.routes import router
+from backend.app.services.knowledge_graph import get_knowledge_graph
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the knowledge graph snapshot (see scripts/build_knowledge_graph.py) before serving."""
+    get_knowledge_graph()
+    yield
+
 
 # Initialize FastAPI
 app = FastAPI(
     title="Financial Analyst Agent API",
     description="Table-Aware RAG pipeline for financial document analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
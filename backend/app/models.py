@@ -21,6 +21,24 @@ class AnalyzeResponse(BaseModel):
     metadata: Dict[str, Any]
 
 
+class AgentAnalyzeRequest(BaseModel):
+    """Request model for agent-first analysis"""
+    query: str
+    max_companies: Optional[int] = 5
+    narrate: bool = False  # Always have the LLM write up the agent results
+
+
+class AgentAnalyzeResponse(BaseModel):
+    """Response model for agent-first analysis"""
+    query: str
+    companies_found: List[str]
+    path: str  # "agents" (structured results only) or "llm" (agents + LLM narration)
+    summary: str
+    analysis: Optional[str] = None
+    agent_results: Dict[str, Any]
+    metadata: Dict[str, Any]
+
+
 class CompanyInfo(BaseModel):
     """Company information model"""
     ticker: str
@@ -36,6 +54,7 @@ class ProcessFileResponse(BaseModel):
     success: bool
     steps: Dict[str, Any]
     ticker: Optional[str]
+    year: Optional[str] = None
     html_size: int
     markdown_size: int
     markdown_preview: str
@@ -0,0 +1,64 @@
+"""
+Filesystem locations of the local data and stores, plus the Qdrant, response
+cache and knowledge graph query settings.
+
+Kept apart from config.py, which validates API credentials on import, so
+offline scripts (chunking, indexing, table store builds) can reach the stores
+without GOOGLE_API_KEY / QDRANT_URL. config.py re-exports everything here.
+"""
+
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Directories
+BASE_DIR = Path(__file__).parent.parent.parent
+PROCESSED_DATA_DIR = BASE_DIR / "processed_data"
+UPLOAD_DIR = BASE_DIR / "uploads"
+OUTPUT_DIR = BASE_DIR / "output"
+DATA_DIR = BASE_DIR / "data"
+CACHE_DIR = BASE_DIR / "cache"
+CHUNK_STORE_DIR = Path(os.getenv("CHUNK_STORE_DIR", str(BASE_DIR / "chunk_store")))  # Section chunk texts (mmap)
+TABLE_STORE_PATH = Path(os.getenv("TABLE_STORE_PATH", str(BASE_DIR / "table_store" / "financial_tables.sqlite3")))  # Parsed table rows
+TIME_SERIES_PANEL_PATH = TABLE_STORE_PATH.parent / "time_series_panel.npz"  # Metric panel built from the table store
+KNOWLEDGE_GRAPH_PATH = Path(os.getenv("KNOWLEDGE_GRAPH_PATH", str(BASE_DIR / "knowledge_graph" / "graph.json")))
+CIK_TICKERS_PATH = Path(os.getenv("CIK_TICKERS_PATH", str(Path(__file__).parent / "data" / "cik_tickers.json")))  # Bundled CIK -> ticker table
+QDRANT_LOCAL_PATH = Path(os.getenv("QDRANT_LOCAL_PATH", str(BASE_DIR / "qdrant_local")))
+
+# Response cache (/analyze answers); the indexing scripts open it to invalidate re-indexed tickers
+RESPONSE_CACHE_PATH = CACHE_DIR / "response_cache.sqlite3"
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(24 * 3600)))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+
+# Knowledge Graph Queries (/graph endpoints); the graph build scripts load the service offline
+GRAPH_MAX_DEPTH = 3  # Hop limit for traversals
+GRAPH_MAX_FANOUT = int(os.getenv("GRAPH_MAX_FANOUT", "20"))  # Heaviest neighbors followed per node
+GRAPH_MEMO_MAX_ENTRIES = 4096  # Memoized query results per graph version
+
+# Qdrant Configuration
+# "remote": Qdrant server at QDRANT_URL
+# "local":  embedded in-process store at QDRANT_LOCAL_PATH (exact search, no network;
+#           the path is locked by one process, so stop the API server while indexing)
+# "memory": embedded, non-persistent (offline tests)
+QDRANT_MODE = os.getenv("QDRANT_MODE", "remote")
+QDRANT_URL = os.getenv("QDRANT_URL", "")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"  # Binary protobuf transport
+
+# Vector Quantization (must match what the indexing scripts created)
+# "none": float32 only, "scalar": int8 (4x smaller), "binary": 1 bit/dim (32x smaller)
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
+QUANTIZATION_RESCORE = True  # Re-rank quantized candidates with the original float vectors
+QUANTIZATION_OVERSAMPLING = float(os.getenv("QUANTIZATION_OVERSAMPLING", "2.0"))  # Candidates = limit * oversampling
+
+# HNSW graph (m / ef_construct are used when the indexing scripts create a collection)
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCT = int(os.getenv("HNSW_EF_CONSTRUCT", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "128"))
+
+# Collections
+COLLECTION_NAME = "financial_reports"  # Original collection (company-level)
+SECTIONS_COLLECTION = "financial_sections"  # New collection (section-level chunks)
@@ -1,17 +1,26 @@
 """
 Service layer for business logic
+
+Re-exports are resolved on first access, so importing one service module
+(e.g. chunk_store from an offline script) does not load config.py and the
+API credentials it requires.
 """
 
-from .qdrant_service import get_qdrant_client
-from .embedding_service import get_embedding_model
-from .llm_service import get_gemini_model, estimate_tokens
-from .file_service import retrieve_relevant_sections, extract_relevant_sections
+import importlib
+
+_EXPORTS = {
+    "get_qdrant_client": ".qdrant_service",
+    "get_embedding_model": ".embedding_service",
+    "get_gemini_model": ".llm_service",
+    "estimate_tokens": ".llm_service",
+    "retrieve_relevant_sections": ".file_service",
+    "extract_relevant_sections": ".file_service",
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    "get_qdrant_client",
-    "get_embedding_model",
-    "get_gemini_model",
-    "estimate_tokens",
-    "retrieve_relevant_sections",
-    "extract_relevant_sections",
-]
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
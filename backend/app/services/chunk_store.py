@@ -0,0 +1,154 @@
+"""
+Chunk Text Store
+Section chunk text kept on local disk instead of in Qdrant payloads.
+
+Layout (both files are append-only):
+    chunks.bin  - UTF-8 chunk texts back to back
+    chunks.idx  - fixed-size records: 16-byte chunk id, uint64 offset, uint32 length
+
+Chunk ids are content addressed (hash of the filing name + text, formatted
+as a UUID so they double as Qdrant point ids). Writing a chunk that is
+already stored is a no-op. Readers memory-map chunks.bin and slice it by
+offset; appends from the indexing script are picked up on the next miss.
+"""
+
+import hashlib
+import mmap
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.app.paths import CHUNK_STORE_DIR
+
+DATA_FILE = "chunks.bin"
+INDEX_FILE = "chunks.idx"
+INDEX_DTYPE = np.dtype([('id', 'V16'), ('offset', '<u8'), ('length', '<u4')])
+
+
+def make_chunk_id(namespace: str, text: str) -> str:
+    """Content-addressed chunk id (UUID string). namespace is the filing, e.g. 'AAPL_2024'."""
+    digest = hashlib.sha256(f"{namespace}\0{text}".encode('utf-8')).digest()
+    return str(uuid.UUID(bytes=digest[:16]))
+
+
+class ChunkStore:
+    """
+    Append-only chunk text file plus offset index, read through mmap.
+    """
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = Path(store_dir)
+        self.data_path = self.store_dir / DATA_FILE
+        self.index_path = self.store_dir / INDEX_FILE
+        self._offsets: Dict[bytes, tuple] = {}  # {id bytes: (offset, length)}
+        self._index_size = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Read index records appended since the last load and remap the data file."""
+        if not self.index_path.exists() or not self.data_path.exists():
+            return
+
+        index_size = self.index_path.stat().st_size
+        index_size -= index_size % INDEX_DTYPE.itemsize  # Ignore a torn trailing record
+        if index_size > self._index_size:
+            with open(self.index_path, 'rb') as f:
+                f.seek(self._index_size)
+                records = np.frombuffer(f.read(index_size - self._index_size), dtype=INDEX_DTYPE)
+            for record in records:
+                self._offsets[bytes(record['id'])] = (int(record['offset']), int(record['length']))
+            self._index_size = index_size
+
+        data_size = self.data_path.stat().st_size
+        if data_size and (self._mmap is None or len(self._mmap) < data_size):
+            # The old map is left to the GC: views handed out by get_bytes may still use it
+            with open(self.data_path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get_bytes(self, chunk_id: str) -> Optional[memoryview]:
+        """Zero-copy view of a chunk's UTF-8 bytes, or None if not stored."""
+        key = uuid.UUID(chunk_id).bytes
+        with self._lock:
+            location = self._offsets.get(key)
+            if location is None:
+                self._load()  # The indexer may have appended since we last looked
+                location = self._offsets.get(key)
+            if location is None or self._mmap is None:
+                return None
+            offset, length = location
+            return memoryview(self._mmap)[offset:offset + length]
+
+    def get(self, chunk_id: str) -> Optional[str]:
+        """Chunk text, or None if not stored."""
+        view = self.get_bytes(chunk_id)
+        return None if view is None else str(view, 'utf-8')
+
+    def get_many(self, chunk_ids: List[str]) -> Dict[str, str]:
+        """Texts for the stored ids (missing ids are left out)."""
+        texts = {}
+        for chunk_id in chunk_ids:
+            text = self.get(chunk_id)
+            if text is not None:
+                texts[chunk_id] = text
+        return texts
+
+    def put_many(self, chunks: Dict[str, str]) -> int:
+        """
+        Append {chunk_id: text} entries that are not stored yet.
+        Data is flushed before its index records, so readers never see an
+        offset past the end of chunks.bin. Returns the number written.
+        """
+        with self._lock:
+            self._load()
+            new_chunks = [
+                (uuid.UUID(chunk_id).bytes, text.encode('utf-8'))
+                for chunk_id, text in chunks.items()
+                if uuid.UUID(chunk_id).bytes not in self._offsets
+            ]
+            if not new_chunks:
+                return 0
+
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            records = np.zeros(len(new_chunks), dtype=INDEX_DTYPE)
+            with open(self.data_path, 'ab') as f:
+                offset = f.tell()
+                for i, (key, data) in enumerate(new_chunks):
+                    f.write(data)
+                    records[i] = (key, offset, len(data))
+                    offset += len(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            with open(self.index_path, 'ab') as f:
+                f.write(records.tobytes())
+
+            self._load()
+            return len(new_chunks)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+
+# Global instance
+_chunk_store = None
+
+def get_chunk_store() -> ChunkStore:
+    """Get or create chunk store instance."""
+    global _chunk_store
+    if _chunk_store is None:
+        _chunk_store = ChunkStore(CHUNK_STORE_DIR)
+    return _chunk_store
+
+
+def get_chunk_text(point) -> str:
+    """Text of a sections-collection point: payload text if present, else the chunk store."""
+    text = (point.payload or {}).get('text')
+    if text is None:
+        text = get_chunk_store().get(str(point.id))
+    return text or ''
@@ -2,10 +2,12 @@
 File retrieval and section extraction service
 """
 
-from typing import List, Dict, Any
-from backend.app.services.qdrant_service import get_qdrant_client
+from typing import List, Dict, Any, Optional
+from backend.app.services.qdrant_service import get_qdrant_client, get_search_params, build_filing_filter
 from backend.app.services.embedding_service import get_embedding_model
+from backend.app.services.chunk_store import get_chunk_text
 from backend.app.config import SECTIONS_COLLECTION
+from backend.app.utils.query_parser import ParsedQuery, parse_query
 
 # Try to use hybrid retriever if available
 try:
@@ -16,27 +18,24 @@ except ImportError:
     print("[INFO] Hybrid retriever not available, using dense-only search")
 
 
-def retrieve_relevant_sections(query: str, ticker: str, limit: int = 5, use_hybrid: bool = True) -> List[Dict[str, Any]]:
+def retrieve_relevant_sections(query: str, ticker: str, limit: int = 5, use_hybrid: bool = True,
+                               query_embedding=None, year: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Priority 1: Smart Section Retrieval
     Retrieve only relevant sections from Qdrant instead of loading full file.
     Uses hybrid search (dense + sparse/BM25) if available, otherwise falls back to dense-only.
+    Pass query_embedding to reuse an embedding the caller already computed,
+    and year to search a single fiscal year's filing.
     """
     # Try hybrid retriever first (if available and enabled)
     if use_hybrid and HYBRID_AVAILABLE:
         try:
             hybrid_retriever = get_hybrid_retriever()
-            results = hybrid_retriever.retrieve(query, ticker, limit, use_hybrid=True)
+            results = hybrid_retriever.retrieve(query, ticker, limit, use_hybrid=True,
+                                                query_embedding=query_embedding, year=year)
             
             # Convert to expected format
-            sections = []
-            for result in results:
-                sections.append({
-                    'text': result.get('text', ''),
-                    'section': result.get('section', 'Unknown'),
-                    'score': result.get('final_score', result.get('score', 0.0)),
-                    'metadata': result.get('metadata', {})
-                })
+            sections = [_to_section(result) for result in results]
             
             print(f"[INFO] ✅ Hybrid retrieval: {len(sections)} relevant sections for {ticker} (dense + BM25)")
             return sections
@@ -47,11 +46,13 @@ def retrieve_relevant_sections(query: str, ticker: str, limit: int = 5, use_hybr
     # Fallback: Dense-only search (original implementation)
     try:
         client = get_qdrant_client()
-        embedding_model = get_embedding_model()
         
-        if embedding_model is None:
-            print(f"[WARNING] Embedding model not available. Using full file.")
-            return []
+        if query_embedding is None:
+            embedding_model = get_embedding_model()
+            if embedding_model is None:
+                print(f"[WARNING] Embedding model not available. Using full file.")
+                return []
+            query_embedding = embedding_model.encode(query, convert_to_numpy=True)
         
         # Check if sections collection exists
         collections = client.get_collections()
@@ -62,33 +63,22 @@ def retrieve_relevant_sections(query: str, ticker: str, limit: int = 5, use_hybr
             print(f"[INFO] Run 'python -m backend.scripts.chunk_markdown_files' to create the sections collection.")
             return []
         
-        # Generate query embedding
-        query_embedding = embedding_model.encode(query, convert_to_numpy=True).tolist()
-        
-        # Import Filter for query
-        from qdrant_client.models import Filter, FieldCondition, MatchValue
+        query_embedding = [float(x) for x in query_embedding]
         
         # Search for relevant sections using query_points
         results = client.query_points(
             collection_name=SECTIONS_COLLECTION,
             query=query_embedding,
-            query_filter=Filter(
-                must=[
-                    FieldCondition(
-                        key="ticker",
-                        match=MatchValue(value=ticker)
-                    )
-                ]
-            ),
+            query_filter=build_filing_filter(ticker, year),
+            search_params=get_search_params(),
             limit=limit
-            # Note: SearchParams(ef=...) not supported in this Qdrant version
-            # Qdrant uses optimized HNSW by default
         )
         
         sections = []
         for result in results.points:
             sections.append({
-                'text': result.payload.get('text', ''),
+                'id': str(result.id),
+                'text': get_chunk_text(result),
                 'section': result.payload.get('section', 'Unknown'),
                 'score': result.score,
                 'metadata': result.payload
@@ -102,27 +92,93 @@ def retrieve_relevant_sections(query: str, ticker: str, limit: int = 5, use_hybr
         return []
 
 
-def extract_relevant_sections(content: str, query: str) -> str:
+def retrieve_sections_batch(query: str, tickers: List[str], limit: int = 5, query_embedding=None,
+                            year: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
     """
-    Smart section extraction based on query.
-    Keeps tables intact, extracts relevant sections.
+    retrieve_relevant_sections for several tickers at once: one query
+    embedding and one batched Qdrant search for all of them.
+    Returns {ticker: sections}.
     """
-    query_lower = query.lower()
+    if not tickers:
+        return {}
+    if query_embedding is None:
+        embedding_model = get_embedding_model()
+        if embedding_model is None:
+            print(f"[WARNING] Embedding model not available. Using full file.")
+            return {ticker: [] for ticker in tickers}
+        query_embedding = embedding_model.encode(query, convert_to_numpy=True)
     
-    # Key sections to look for
-    section_keywords = {
-        "revenue": ["revenue", "net sales", "segment", "aws", "azure"],
-        "income": ["income", "earnings", "profit", "loss"],
-        "balance": ["balance sheet", "assets", "liabilities"],
-        "cash": ["cash flow", "operating activities"],
-        "segment": ["segment", "business segment", "geographic"]
+    if HYBRID_AVAILABLE:
+        try:
+            results = get_hybrid_retriever().retrieve_batch(query, tickers, limit, query_embedding=query_embedding,
+                                                            year=year)
+            sections = {ticker: [_to_section(result) for result in results[ticker]] for ticker in tickers}
+            print(f"[INFO] ✅ Batched retrieval: {sum(len(s) for s in sections.values())} sections for {len(tickers)} companies")
+            return sections
+        except Exception as e:
+            print(f"[WARNING] Batched retrieval failed: {e}. Retrieving per company.")
+    
+    return {
+        ticker: retrieve_relevant_sections(query, ticker, limit, use_hybrid=False, query_embedding=query_embedding,
+                                           year=year)
+        for ticker in tickers
+    }
+
+
+def _to_section(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Hybrid retriever result -> section dict (id, text, section, score, metadata)."""
+    return {
+        'id': result.get('id'),
+        'text': result.get('text', ''),
+        'section': result.get('section', 'Unknown'),
+        'score': result.get('final_score', result.get('score', 0.0)),
+        'metadata': result.get('metadata', {})
     }
+
+
+def build_company_context(ticker: str, section_names: List[str], max_tokens: int,
+                          year: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Collect a company's core sections (in document order) for a cached
+    context prefix. Returns {'text', 'chunk_ids', 'tokens'}; empty text if
+    the sections collection has nothing for the ticker (and year).
+    """
+    from qdrant_client.models import FieldCondition, MatchAny
+    from backend.app.services.llm_service import estimate_tokens
     
-    # Find relevant keywords
-    relevant_sections = []
-    for section, keywords in section_keywords.items():
-        if any(kw in query_lower for kw in keywords):
-            relevant_sections.append(section)
+    client = get_qdrant_client()
+    scroll_filter = build_filing_filter(ticker, year)
+    scroll_filter.must.append(FieldCondition(key="section", match=MatchAny(any=section_names)))
+    points, _ = client.scroll(
+        collection_name=SECTIONS_COLLECTION,
+        scroll_filter=scroll_filter,
+        limit=1000
+    )
+    points.sort(key=lambda p: p.payload.get('start_line', 0))
+    
+    parts = []
+    chunk_ids = set()
+    total_tokens = 0
+    for point in points:
+        text = get_chunk_text(point)
+        tokens = estimate_tokens(text)
+        if total_tokens + tokens > max_tokens:
+            continue
+        parts.append(f"### {point.payload.get('section', 'Unknown')}\n{text}")
+        chunk_ids.add(str(point.id))
+        total_tokens += tokens
+    
+    text = f"=== {ticker} core sections ===\n" + "\n\n".join(parts) if parts else ""
+    return {'text': text, 'chunk_ids': chunk_ids, 'tokens': total_tokens}
+
+
+def extract_relevant_sections(content: str, query: str, parsed: Optional[ParsedQuery] = None) -> str:
+    """
+    Smart section extraction based on query.
+    Keeps tables intact, extracts relevant sections.
+    """
+    # Section hints ("revenue", "balance", "cash", ...) from the query analysis
+    relevant_sections = list((parsed or parse_query(query)).section_hints)
     
     # If no specific sections, return full content
     if not relevant_sections:
@@ -3,11 +3,13 @@ Hybrid Retriever: Combines dense vector search + sparse keyword search (BM25)
 for better retrieval accuracy.
 """
 
-from typing import List, Dict, Any
-from backend.app.services.qdrant_service import get_qdrant_client
+from typing import List, Dict, Any, Optional
+from qdrant_client.models import QueryRequest
+from backend.app.services.qdrant_service import get_qdrant_client, get_search_params, build_filing_filter
 from backend.app.services.embedding_service import get_embedding_model
+from backend.app.services.chunk_store import get_chunk_store, get_chunk_text
 from backend.app.config import SECTIONS_COLLECTION
-from qdrant_client.models import Filter, FieldCondition, MatchValue
+from backend.app.utils.sec_header import filing_stem
 
 try:
     from rank_bm25 import BM25Okapi
@@ -16,6 +18,12 @@ except ImportError:
     BM25_AVAILABLE = False
     print("[WARNING] rank-bm25 not installed. Install with: pip install rank-bm25")
 
+# Payload fields fetched for candidates; chunk text is only fetched for the winners
+SECTION_METADATA_FIELDS = [
+    'ticker', 'section', 'year', 'start_line', 'end_line', 'file_path',
+    'chunk_length', 'tables_count', 'source', 'ticker_year'
+]
+
 
 class HybridRetriever:
     """
@@ -27,9 +35,10 @@ class HybridRetriever:
     def __init__(self):
         self.client = get_qdrant_client()
         self.embedding_model = get_embedding_model()
-        self.bm25_indexes = {}  # Per-ticker BM25 indexes
+        self.bm25_indexes = {}  # Per-ticker (or per-filing, e.g. AAPL_2024) BM25 indexes
     
-    def retrieve(self, query: str, ticker: str, limit: int = 5, use_hybrid: bool = True) -> List[Dict[str, Any]]:
+    def retrieve(self, query: str, ticker: str, limit: int = 5, use_hybrid: bool = True,
+                 query_embedding=None, year: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Retrieve relevant sections using hybrid search.
         
@@ -38,82 +47,146 @@ class HybridRetriever:
             ticker: Company ticker
             limit: Number of results
             use_hybrid: Whether to use hybrid search (True) or dense only (False)
+            query_embedding: Precomputed query embedding (skips re-encoding the query)
+            year: Restrict to one fiscal year's filing (None = all years)
         """
         if not use_hybrid or not BM25_AVAILABLE:
             # Fallback to dense-only search
-            return self._dense_search(query, ticker, limit)
+            return self._dense_search(query, ticker, limit, query_embedding, year=year)
         
         # Hybrid search: combine dense + sparse
-        dense_results = self._dense_search(query, ticker, limit * 2)  # Get more candidates
-        sparse_results = self._sparse_search(query, ticker, limit * 2)
+        # Phase 1: ids, scores and light metadata for the candidates
+        dense_results = self._dense_search(query, ticker, limit * 2, query_embedding, with_text=False, year=year)  # Get more candidates
+        sparse_results = self._sparse_search(query, ticker, limit * 2, year=year)
         
         # Combine and rerank
         combined = self._combine_results(dense_results, sparse_results, limit)
         
+        # Phase 2: text for the winners only
+        self._attach_text(combined, [self._bm25_key(ticker, year)])
+        
         return combined
     
-    def _dense_search(self, query: str, ticker: str, limit: int) -> List[Dict[str, Any]]:
-        """Dense vector search using embeddings."""
-        if self.embedding_model is None:
-            return []
+    def retrieve_batch(self, query: str, tickers: List[str], limit: int = 5, use_hybrid: bool = True,
+                       query_embedding=None, year: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        retrieve() for several tickers in one pass: the query is embedded
+        once, dense candidates for every ticker come from one batched Qdrant
+        query, and missing chunk text is fetched in one call. Returns {ticker: results}.
+        """
+        if query_embedding is None:
+            if self.embedding_model is None:
+                return {ticker: [] for ticker in tickers}
+            query_embedding = self.embedding_model.encode(query, convert_to_numpy=True)
+        
+        hybrid = use_hybrid and BM25_AVAILABLE
+        dense_limit = limit * 2 if hybrid else limit
+        dense_by_ticker = self._dense_search_batch(tickers, dense_limit, query_embedding, with_text=False, year=year)
         
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode(query, convert_to_numpy=True).tolist()
+        results = {}
+        for ticker in tickers:
+            if hybrid:
+                sparse_results = self._sparse_search(query, ticker, limit * 2, year=year)
+                results[ticker] = self._combine_results(dense_by_ticker[ticker], sparse_results, limit)
+            else:
+                results[ticker] = dense_by_ticker[ticker]
+        
+        self._attach_text([r for ticker_results in results.values() for r in ticker_results],
+                          [self._bm25_key(ticker, year) for ticker in tickers])
+        return results
+    
+    @staticmethod
+    def _bm25_key(ticker: str, year: Optional[str]) -> str:
+        return filing_stem(ticker, year) if year else ticker
+    
+    def _dense_search(self, query: str, ticker: str, limit: int, query_embedding=None,
+                      with_text: bool = True, year: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Dense vector search using embeddings.
+        with_text=False fetches only SECTION_METADATA_FIELDS (no 'text' key in results).
+        """
+        if query_embedding is None:
+            if self.embedding_model is None:
+                return []
+            query_embedding = self.embedding_model.encode(query, convert_to_numpy=True)
+        query_embedding = [float(x) for x in query_embedding]
         
         # Search in Qdrant
         try:
             results = self.client.query_points(
                 collection_name=SECTIONS_COLLECTION,
                 query=query_embedding,
-                query_filter=Filter(
-                    must=[
-                        FieldCondition(
-                            key="ticker",
-                            match=MatchValue(value=ticker)
-                        )
-                    ]
-                ),
+                query_filter=build_filing_filter(ticker, year),
+                search_params=get_search_params(),
+                with_payload=True if with_text else SECTION_METADATA_FIELDS,
                 limit=limit
-                # Note: SearchParams(ef=...) not supported in this Qdrant version
-                # Qdrant uses optimized HNSW by default
             )
-            
-            sections = []
-            for result in results.points:
-                sections.append({
-                    'text': result.payload.get('text', ''),
-                    'section': result.payload.get('section', 'Unknown'),
-                    'score': result.score,
-                    'dense_score': result.score,
-                    'sparse_score': 0.0,
-                    'metadata': result.payload
-                })
-            
-            return sections
+            return [self._dense_section(result, with_text) for result in results.points]
         except Exception as e:
             print(f"[WARNING] Dense search failed: {e}")
             return []
     
-    def _sparse_search(self, query: str, ticker: str, limit: int) -> List[Dict[str, Any]]:
+    def _dense_search_batch(self, tickers: List[str], limit: int, query_embedding, with_text: bool = True,
+                            year: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """_dense_search for several tickers with one query_batch_points call."""
+        query_embedding = [float(x) for x in query_embedding]
+        requests = [
+            QueryRequest(
+                query=query_embedding,
+                filter=build_filing_filter(ticker, year),
+                params=get_search_params(),
+                with_payload=True if with_text else SECTION_METADATA_FIELDS,
+                limit=limit
+            )
+            for ticker in tickers
+        ]
+        try:
+            responses = self.client.query_batch_points(collection_name=SECTIONS_COLLECTION, requests=requests)
+        except Exception as e:
+            print(f"[WARNING] Batched dense search failed: {e}")
+            return {ticker: [] for ticker in tickers}
+        return {
+            ticker: [self._dense_section(result, with_text) for result in response.points]
+            for ticker, response in zip(tickers, responses)
+        }
+    
+    @staticmethod
+    def _dense_section(result, with_text: bool) -> Dict[str, Any]:
+        section = {
+            'id': str(result.id),
+            'section': result.payload.get('section', 'Unknown'),
+            'score': result.score,
+            'dense_score': result.score,
+            'sparse_score': 0.0,
+            'metadata': result.payload
+        }
+        if with_text:
+            section['text'] = get_chunk_text(result)
+        return section
+    
+    def _sparse_search(self, query: str, ticker: str, limit: int, year: Optional[str] = None) -> List[Dict[str, Any]]:
         """Sparse keyword search using BM25."""
+        key = self._bm25_key(ticker, year)
+        
         # Build BM25 index if not exists
-        if ticker not in self.bm25_indexes:
-            self._build_bm25_index(ticker)
+        if key not in self.bm25_indexes:
+            self._build_bm25_index(ticker, year)
         
-        if ticker not in self.bm25_indexes:
+        if key not in self.bm25_indexes:
             return []
         
         # Tokenize query
         query_tokens = query.lower().split()
         
         # Get BM25 scores
-        bm25 = self.bm25_indexes[ticker]['bm25']
+        bm25 = self.bm25_indexes[key]['bm25']
         scores = bm25.get_scores(query_tokens)
         
         # Get chunks with scores
-        chunks = self.bm25_indexes[ticker]['chunks']
+        chunks = self.bm25_indexes[key]['chunks']
         results = [
             {
+                'id': chunk['id'],
                 'text': chunk['text'],
                 'section': chunk['section'],
                 'score': float(score),
@@ -128,20 +201,14 @@ class HybridRetriever:
         results.sort(key=lambda x: x['sparse_score'], reverse=True)
         return results[:limit]
     
-    def _build_bm25_index(self, ticker: str):
-        """Build BM25 index for a ticker by fetching all chunks."""
+    def _build_bm25_index(self, ticker: str, year: Optional[str] = None):
+        """Build BM25 index for a ticker (or one of its filings) by fetching all chunks."""
+        key = self._bm25_key(ticker, year)
         try:
-            # Fetch all chunks for this ticker
+            # Fetch all chunks for this ticker / filing
             results = self.client.scroll(
                 collection_name=SECTIONS_COLLECTION,
-                scroll_filter=Filter(
-                    must=[
-                        FieldCondition(
-                            key="ticker",
-                            match=MatchValue(value=ticker)
-                        )
-                    ]
-                ),
+                scroll_filter=build_filing_filter(ticker, year),
                 limit=1000  # Adjust if needed
             )
             
@@ -149,9 +216,10 @@ class HybridRetriever:
             corpus = []
             
             for point in results[0]:
-                chunk_text = point.payload.get('text', '')
+                chunk_text = get_chunk_text(point)
                 if chunk_text:
                     chunks.append({
+                        'id': str(point.id),
                         'text': chunk_text,
                         'section': point.payload.get('section', 'Unknown'),
                         'metadata': point.payload
@@ -163,30 +231,69 @@ class HybridRetriever:
             if corpus:
                 # Create BM25 index
                 bm25 = BM25Okapi(corpus)
-                self.bm25_indexes[ticker] = {
+                self.bm25_indexes[key] = {
                     'bm25': bm25,
-                    'chunks': chunks
+                    'chunks': chunks,
+                    'by_id': {chunk['id']: chunk for chunk in chunks}
                 }
-                print(f"[INFO] Built BM25 index for {ticker} ({len(chunks)} chunks)")
+                print(f"[INFO] Built BM25 index for {key} ({len(chunks)} chunks)")
         except Exception as e:
-            print(f"[WARNING] Failed to build BM25 index for {ticker}: {e}")
+            print(f"[WARNING] Failed to build BM25 index for {key}: {e}")
+    
+    def _attach_text(self, results: List[Dict], bm25_keys: List[str]):
+        """
+        Fill in 'text' for results that don't have it yet: from the BM25
+        chunk caches of the given tickers/filings, then the local chunk store,
+        else one batched retrieve from Qdrant payloads.
+        """
+        missing = [r for r in results if 'text' not in r]
+        if not missing:
+            return
+        
+        cached = {}
+        for bm25_key in bm25_keys:
+            cached.update(self.bm25_indexes.get(bm25_key, {}).get('by_id', {}))
+        stored = get_chunk_store().get_many([r['id'] for r in missing if r['id'] not in cached])
+        to_fetch = []
+        for result in missing:
+            if result['id'] in cached:
+                result['text'] = cached[result['id']]['text']
+            elif result['id'] in stored:
+                result['text'] = stored[result['id']]
+            else:
+                to_fetch.append(result)
+        
+        if to_fetch:
+            try:
+                points = self.client.retrieve(
+                    collection_name=SECTIONS_COLLECTION,
+                    ids=[r['id'] for r in to_fetch],
+                    with_payload=['text'],
+                    with_vectors=False
+                )
+                texts = {str(p.id): p.payload.get('text', '') for p in points}
+            except Exception as e:
+                print(f"[WARNING] Failed to fetch chunk text: {e}")
+                texts = {}
+            for result in to_fetch:
+                result['text'] = texts.get(result['id'], '')
     
     def _combine_results(self, dense_results: List[Dict], sparse_results: List[Dict], limit: int) -> List[Dict]:
         """Combine dense and sparse results with weighted fusion."""
-        # Create a map of chunks by text (simple deduplication)
+        # Create a map of chunks by point id (deduplication)
         combined_map = {}
         
         # Add dense results
         for result in dense_results:
-            chunk_key = result['text'][:100]  # Use first 100 chars as key
-            combined_map[chunk_key] = result
+            combined_map[result['id']] = result
         
         # Add/update with sparse results
         for result in sparse_results:
-            chunk_key = result['text'][:100]
+            chunk_key = result['id']
             if chunk_key in combined_map:
-                # Update sparse score
+                # Update sparse score (and reuse the text BM25 already holds)
                 combined_map[chunk_key]['sparse_score'] = result['sparse_score']
+                combined_map[chunk_key].setdefault('text', result['text'])
             else:
                 combined_map[chunk_key] = result
         
@@ -1,11 +1,140 @@
 """
 Financial Knowledge Graph Builder
 Extracts entities and relationships from financial documents to build a knowledge graph.
+
+Edges are deduplicated on (source, target, relationship); adding the same
+edge again bumps its weight. Outgoing and incoming adjacency indexes keyed
+by relationship make neighbor queries O(degree) instead of a scan over
+every edge. The graph is persisted as JSON at KNOWLEDGE_GRAPH_PATH.
+
+Graphs merge associatively (weights and mention counts add up), so the
+build script fans filings out to worker processes and folds the partial
+graphs together. Each document's contribution is recorded, so re-adding
+a filing (e.g. a new upload) replaces it instead of counting it twice.
+
+Multi-hop queries are BFS over the adjacency indexes with depth and
+fan-out limits; results are memoized until the graph changes (version).
 """
 
-from typing import List, Dict, Any, Tuple
+import bisect
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional, FrozenSet
 import re
-from collections import defaultdict
+from collections import Counter, defaultdict
+
+from backend.app.paths import (
+    KNOWLEDGE_GRAPH_PATH, PROCESSED_DATA_DIR, GRAPH_MAX_DEPTH, GRAPH_MAX_FANOUT, GRAPH_MEMO_MAX_ENTRIES
+)
+from backend.app.utils.ticker_extractor import COMPANY_TICKERS
+
+EdgeKey = Tuple[str, str, str]  # (source_id, target_id, relationship)
+
+# Gazetteers: surface form (lowercase) -> canonical name
+PRODUCT_TERMS = {
+    term.lower(): term for term in [
+        'iPhone', 'iPad', 'Mac', 'Windows', 'Azure', 'AWS', 'Tesla Model', 'Xbox', 'PlayStation'
+    ]
+}
+METRIC_TERMS = {
+    term.lower(): term for term in [
+        'Revenue', 'Net Income', 'EBITDA', 'EPS', 'Cash Flow', 'Assets', 'Liabilities', 'Equity',
+        'Operating Margin', 'Profit Margin', 'ROE', 'ROA', 'Debt-to-Equity'
+    ]
+}
+COMPANY_TERMS = {name: ticker for name, ticker in COMPANY_TICKERS.items() if name not in PRODUCT_TERMS}
+COMPANY_TERMS.update({'nvidia': 'NVDA', 'tesla': 'TSLA'})
+
+PEOPLE_TITLES = r'(?:CEO|CFO|CTO|COO|President|Chairman|Chief\s+[A-Z][a-z]+\s+Officer)'
+# "First [M.] Last, <title>" (e.g. "Andrew R. Jassy, President"); the title-first
+# form ("CEO Amazon Web Services") is almost always a job title, not a name, and
+# "Officer of Optum Rx, President" names a business unit
+PERSON_NAME = r'(?<!Officer of )(?<!President of )[A-Z][a-z]+(?: [A-Z]\.)? [A-Z][a-z]+(?:-[A-Z][a-z]+)?'
+# Capitalized words that fill the name slot in titles, plan names and org units
+PERSON_NAME_STOPWORDS = frozenset("""
+    chief executive officer officers president vice senior deputy chairman chair director directors
+    founder partner principal general counsel secretary treasurer controller lead independent
+    interim acting former group global worldwide international corporate americas europe asia
+    north south pacific services service web stores retail consumer commercial cloud computing
+    devices products operations finance financial accounting marketing sales support legal human
+    resources technology technologies strategy development business people talent compensation
+    committee board plan pay ratio stock stocks shares restricted units performance award awards
+    incentive bonus equity annual long term letter agreement employment severance the our
+""".split())
+COMPETITIVE_CUES = r'(?:competitors?|compete[sd]?|competing|competition|rivals?|vs\.?|versus|compared\s+to)'
+
+METRIC_WINDOW_CHARS = 200  # Company -> metric mentioned right after it
+METRIC_WINDOW_ENTITIES = 10
+COMPETITOR_WINDOW_CHARS = 300  # Two companies plus a competitive cue between them
+PERSON_WINDOW_CHARS = 300  # Person -> company mentioned nearby
+
+
+def _trie_pattern(terms: List[str]) -> str:
+    """
+    Regex for a set of literal terms, factored into a trie so the engine
+    walks shared prefixes once (an automaton rather than N alternatives).
+    """
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        optional = '' in node
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if optional:
+            body = '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+@lru_cache(maxsize=1)
+def _known_tickers() -> FrozenSet[str]:
+    """Tickers of the filings on disk plus the company map (matched case-sensitively)."""
+    tickers = set(COMPANY_TICKERS.values())
+    if PROCESSED_DATA_DIR.exists():
+        tickers.update(path.stem.split('_')[0].upper() for path in PROCESSED_DATA_DIR.glob("*.md"))
+    # One-letter tickers (C, D, T, V) are indistinguishable from ordinary text
+    return frozenset(ticker for ticker in tickers if len(ticker) > 1)
+
+
+@lru_cache(maxsize=1)
+def _scanner() -> 're.Pattern':
+    """
+    One pattern for every entity kind; a single finditer pass tags each match
+    by group. The shared word-boundary prefix lets the engine skip positions
+    that can't start any entity before trying the alternatives.
+    """
+    return re.compile(
+        r'\b(?=[A-Za-z])(?:'
+        rf'(?P<person>(?P<person_name>{PERSON_NAME}),\s+{PEOPLE_TITLES}\b)'
+        rf'|(?P<product>(?i:{_trie_pattern(list(PRODUCT_TERMS))})\b)'
+        rf'|(?P<metric>(?i:{_trie_pattern(list(METRIC_TERMS))})\b)'
+        rf'|(?P<company>(?i:{_trie_pattern(list(COMPANY_TERMS))})\b)'
+        rf'|(?P<cue>(?i:{COMPETITIVE_CUES})(?!\w))'
+        r'|(?P<ticker>[A-Z]{2,5}(?:-[A-Z])?\b)'
+        r')'
+    )
+
+
+def _person_name(surface: str) -> Optional[str]:
+    """The name of a PERSON match, or None when a name slot holds a title, company or common word."""
+    tokens = surface.split()
+    for token in tokens:
+        word = token.rstrip('.').lower()
+        if word in PERSON_NAME_STOPWORDS or word in COMPANY_TERMS or word in PRODUCT_TERMS or word in METRIC_TERMS:
+            return None
+    return ' '.join(tokens)
+
 
 class FinancialKnowledgeGraph:
     """
@@ -16,144 +145,147 @@ class FinancialKnowledgeGraph:
     
     def __init__(self):
         self.nodes = {}  # {node_id: {type, name, properties}}
-        self.edges = []  # [{source, target, relationship, properties}]
-        self.node_counter = 0
+        self.edges: Dict[EdgeKey, Dict[str, Any]] = {}  # {key: {source, target, relationship, weight, properties}}
+        self._out = defaultdict(lambda: defaultdict(dict))  # {source_id: {relationship: {target_id: edge}}}
+        self._in = defaultdict(lambda: defaultdict(dict))  # {target_id: {relationship: {source_id: edge}}}
+        self.documents: Dict[str, Dict[str, Any]] = {}  # {doc_id: {'nodes': {id: mentions}, 'edges': [[s, t, r, w]]}}
+        self._lock = threading.RLock()
+        self.version = 0  # Bumped on every change; memoized query results are per version
+        self._memo: Dict[Tuple, Any] = {}
+        self._memo_version = 0
     
     def extract_entities(self, text: str, ticker: str) -> List[Dict[str, Any]]:
         """
-        Extract entities from text using pattern matching and NLP.
+        Extract entities from text using pattern matching.
+        Companies are reported by ticker ("Apple" -> AAPL), metrics and
+        products by their canonical name.
+        """
+        return self._scan(text, ticker)[0]
+    
+    def _scan(self, text: str, ticker: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        Single pass over the text: entities in offset order, plus the offsets
+        of competitive cues ("competitor", "versus", ...).
         """
+        tickers = _known_tickers() | ({ticker} if ticker else set())
         entities = []
-        
-        # Extract company mentions
-        company_patterns = [
-            r'\b([A-Z]{2,5})\b',  # Ticker symbols
-            r'\b(Apple|Microsoft|Google|Amazon|Tesla|Meta|NVIDIA)\b',  # Major companies
-        ]
-        
-        for pattern in company_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entity = {
-                    'text': match.group(1),
-                    'type': 'COMPANY',
-                    'start': match.start(),
-                    'end': match.end()
-                }
-                entities.append(entity)
-        
-        # Extract financial metrics
-        metric_patterns = [
-            r'\b(Revenue|Net Income|EBITDA|EPS|Cash Flow|Assets|Liabilities|Equity)\b',
-            r'\b(Operating Margin|Profit Margin|ROE|ROA|Debt-to-Equity)\b',
-        ]
-        
-        for pattern in metric_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entity = {
-                    'text': match.group(1),
-                    'type': 'METRIC',
-                    'start': match.start(),
-                    'end': match.end()
-                }
-                entities.append(entity)
-        
-        # Extract people (executives, board members)
-        people_patterns = [
-            r'\b(CEO|CFO|CTO|President|Chairman)\s+([A-Z][a-z]+\s+[A-Z][a-z]+)',
-            r'\b([A-Z][a-z]+\s+[A-Z][a-z]+),\s+(CEO|CFO|CTO|President)',
-        ]
-        
-        for pattern in people_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entity = {
-                    'text': match.group(0),
-                    'type': 'PERSON',
-                    'start': match.start(),
-                    'end': match.end()
-                }
-                entities.append(entity)
-        
-        # Extract products/services
-        product_patterns = [
-            r'\b(iPhone|iPad|Mac|Windows|Azure|AWS|Tesla Model|Xbox|PlayStation)\b',
-        ]
-        
-        for pattern in product_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entity = {
-                    'text': match.group(1),
-                    'type': 'PRODUCT',
-                    'start': match.start(),
-                    'end': match.end()
-                }
-                entities.append(entity)
-        
-        return entities
+        cues = []
+        for match in _scanner().finditer(text):
+            kind = match.lastgroup
+            surface = match.group(kind)
+            if kind == 'cue':
+                cues.append(match.start())
+                continue
+            if kind == 'ticker':
+                if surface not in tickers:
+                    continue
+                kind, name = 'company', surface
+            elif kind == 'company':
+                name = COMPANY_TERMS[surface.lower()]
+            elif kind == 'metric':
+                name = METRIC_TERMS[surface.lower()]
+            elif kind == 'product':
+                name = PRODUCT_TERMS[surface.lower()]
+            else:
+                name = _person_name(match.group('person_name'))
+                if name is None:
+                    continue
+            entities.append({
+                'text': name,
+                'type': kind.upper(),
+                'start': match.start(),
+                'end': match.end()
+            })
+        return entities, cues
     
-    def extract_relationships(self, text: str, entities: List[Dict]) -> List[Dict[str, Any]]:
+    def extract_relationships(self, text: str, entities: List[Dict],
+                              cues: Optional[List[int]] = None) -> List[Dict[str, Any]]:
         """
-        Extract relationships between entities.
+        Extract relationships between entities with a sliding window over
+        their (sorted) offsets, so each entity is only paired with neighbors.
         """
+        if cues is None:
+            cues = [match.start() for match in re.finditer(rf'\b{COMPETITIVE_CUES}(?!\w)', text, re.IGNORECASE)]
         relationships = []
         
-        # Pattern: Company has Metric
-        for i, entity1 in enumerate(entities):
-            if entity1['type'] == 'COMPANY':
-                # Look for metrics nearby
-                for entity2 in entities[i+1:i+10]:  # Check next 10 entities
-                    if entity2['type'] == 'METRIC':
-                        # Check if they're close in text
-                        if abs(entity1['end'] - entity2['start']) < 200:
-                            relationships.append({
-                                'source': entity1['text'],
-                                'target': entity2['text'],
-                                'relationship': 'HAS_METRIC',
-                                'confidence': 0.8
-                            })
-        
-        # Pattern: Company competes with Company
+        entities = sorted(entities, key=lambda e: e['start'])
         companies = [e for e in entities if e['type'] == 'COMPANY']
+        metrics = [e for e in entities if e['type'] == 'METRIC']
+        people = [e for e in entities if e['type'] == 'PERSON']
+        company_starts = [e['start'] for e in companies]
+        metric_starts = [e['start'] for e in metrics]
+        
+        # Pattern: Company has Metric (metrics shortly after the company)
+        for company in companies:
+            first = bisect.bisect_left(metric_starts, company['end'])
+            last = bisect.bisect_left(metric_starts, company['end'] + METRIC_WINDOW_CHARS)
+            for metric in metrics[first:min(last, first + METRIC_WINDOW_ENTITIES)]:
+                relationships.append({
+                    'source': company['text'],
+                    'source_type': 'COMPANY',
+                    'target': metric['text'],
+                    'target_type': 'METRIC',
+                    'relationship': 'HAS_METRIC',
+                    'confidence': 0.8
+                })
+        
+        # Pattern: Company competes with Company (a competitive cue between two nearby companies)
         for i, company1 in enumerate(companies):
-            for company2 in companies[i+1:]:
-                # Check if they appear in competitive context
-                text_between = text[min(company1['end'], company2['end']):max(company1['start'], company2['start'])]
-                competitive_keywords = ['competitor', 'compete', 'rival', 'vs', 'versus', 'compared to']
-                if any(kw in text_between.lower() for kw in competitive_keywords):
+            for company2 in companies[i + 1:]:
+                if company2['start'] - company1['end'] > COMPETITOR_WINDOW_CHARS:
+                    break
+                if company2['text'] == company1['text']:
+                    continue
+                cue = bisect.bisect_left(cues, company1['end'])
+                if cue < len(cues) and cues[cue] < company2['start']:
                     relationships.append({
                         'source': company1['text'],
+                        'source_type': 'COMPANY',
                         'target': company2['text'],
+                        'target_type': 'COMPANY',
                         'relationship': 'COMPETES_WITH',
                         'confidence': 0.7
                     })
         
         # Pattern: Person works_at Company
-        people = [e for e in entities if e['type'] == 'PERSON']
         for person in people:
-            # Find nearest company
-            for company in companies:
-                if abs(person['start'] - company['start']) < 300:
-                    relationships.append({
-                        'source': person['text'],
-                        'target': company['text'],
-                        'relationship': 'WORKS_AT',
-                        'confidence': 0.6
-                    })
+            first = bisect.bisect_left(company_starts, person['start'] - PERSON_WINDOW_CHARS + 1)
+            last = bisect.bisect_left(company_starts, person['start'] + PERSON_WINDOW_CHARS)
+            for company in companies[first:last]:
+                relationships.append({
+                    'source': person['text'],
+                    'source_type': 'PERSON',
+                    'target': company['text'],
+                    'target_type': 'COMPANY',
+                    'relationship': 'WORKS_AT',
+                    'confidence': 0.6
+                })
         
         return relationships
     
     def add_document(self, text: str, ticker: str, metadata: Dict = None):
         """
         Process a document and add nodes/edges to the graph.
+        metadata['doc_id'] (the filing stem, e.g. "AAPL_2024") records the
+        document's contribution; adding the same doc_id again (an upload of
+        that filing) replaces it.
         """
-        # Extract entities
-        entities = self.extract_entities(text, ticker)
+        part = FinancialKnowledgeGraph()
+        stats = part._ingest(text, ticker)
+        doc_id = (metadata or {}).get('doc_id')
+        if doc_id:
+            part.documents[doc_id] = part._contribution()
+        self.merge(part)
+        stats['nodes_added'] = len(self.nodes)
+        return stats
+    
+    def _ingest(self, text: str, ticker: str) -> Dict[str, int]:
+        """Add one document's entities and relationships to this (empty) graph."""
+        # Extract entities (and competitive cue offsets) in one pass
+        entities, cues = self._scan(text, ticker)
         
         # Extract relationships
-        relationships = self.extract_relationships(text, entities)
+        relationships = self.extract_relationships(text, entities, cues)
         
         # Add company node
         company_id = self._add_node(ticker, 'COMPANY', {'ticker': ticker})
@@ -170,16 +302,98 @@ class FinancialKnowledgeGraph:
         
         # Add relationship edges
         for rel in relationships:
-            source_id = self._get_or_create_node(rel['source'], self._infer_type(rel['source']))
-            target_id = self._get_or_create_node(rel['target'], self._infer_type(rel['target']))
+            source_id = self._get_or_create_node(rel['source'], rel.get('source_type') or self._infer_type(rel['source']))
+            target_id = self._get_or_create_node(rel['target'], rel.get('target_type') or self._infer_type(rel['target']))
+            if source_id == target_id:
+                continue  # e.g. "AAPL ... vs ... AAPL"
             self._add_edge(source_id, target_id, rel['relationship'], {'confidence': rel['confidence']})
         
+        # Mention counts for the entities that became nodes
+        mentions = Counter(f"{entity['type']}_{entity['text']}" for entity in entities)
+        for node_id, node in self.nodes.items():
+            node['mentions'] = node.get('mentions', 0) + mentions.get(node_id, 0)
+        
         return {
             'entities': len(entities),
             'relationships': len(relationships),
             'nodes_added': len(self.nodes)
         }
     
+    def _contribution(self) -> Dict[str, Any]:
+        """Node mentions and edge weights of this whole graph (used for single-document graphs)."""
+        return {
+            'nodes': {node_id: node.get('mentions', 0) for node_id, node in self.nodes.items()},
+            'edges': [[*key, edge['weight']] for key, edge in self.edges.items()]
+        }
+    
+    def merge(self, other: 'FinancialKnowledgeGraph') -> 'FinancialKnowledgeGraph':
+        """
+        Fold another graph into this one: node mentions and edge weights add,
+        confidences take the max. Documents already present are replaced.
+        Returns self, so partial graphs can be reduced.
+        """
+        with self._lock:
+            for doc_id in other.documents:
+                if doc_id in self.documents:
+                    self.remove_document(doc_id)
+            for node_id, node in other.nodes.items():
+                existing = self.nodes.get(node_id)
+                if existing is None:
+                    self.nodes[node_id] = dict(node, properties=dict(node.get('properties', {})))
+                else:
+                    existing['mentions'] = existing.get('mentions', 0) + node.get('mentions', 0)
+                    for key, value in node.get('properties', {}).items():
+                        existing['properties'].setdefault(key, value)
+            for edge in other.edges.values():
+                self._add_edge(edge['source'], edge['target'], edge['relationship'], edge['properties'], edge['weight'])
+            self.documents.update(other.documents)
+            self.version += 1
+        return self
+    
+    def remove_document(self, doc_id: str) -> bool:
+        """
+        Subtract a recorded document's contribution. Edges left with no weight
+        are dropped, and so are its nodes that no remaining document mentions
+        and no edge still uses.
+        """
+        with self._lock:
+            contribution = self.documents.pop(doc_id, None)
+            if contribution is None:
+                return False
+            for node_id, mentions in contribution['nodes'].items():
+                if node_id in self.nodes:
+                    self.nodes[node_id]['mentions'] = max(self.nodes[node_id].get('mentions', 0) - mentions, 0)
+            for source_id, target_id, relationship, weight in contribution['edges']:
+                edge = self.edges.get((source_id, target_id, relationship))
+                if edge is None:
+                    continue
+                edge['weight'] -= weight
+                if edge['weight'] <= 0:
+                    del self.edges[(source_id, target_id, relationship)]
+                    self._unlink(self._out, source_id, relationship, target_id)
+                    self._unlink(self._in, target_id, relationship, source_id)
+            
+            live_nodes = set()
+            for document in self.documents.values():
+                live_nodes.update(document['nodes'])
+            for node_id in contribution['nodes']:
+                node = self.nodes.get(node_id)
+                if (node is not None and node_id not in live_nodes and not node.get('mentions')
+                        and node_id not in self._out and node_id not in self._in):
+                    del self.nodes[node_id]
+            self.version += 1
+            return True
+    
+    @staticmethod
+    def _unlink(index, node_id: str, relationship: str, other_id: str):
+        """Drop one adjacency entry, and the node's entry once it has no links left."""
+        links = index[node_id]
+        del links[relationship][other_id]
+        if not links[relationship]:
+            del links[relationship]
+        if not links:
+            del index[node_id]
+    
     def _add_node(self, name: str, node_type: str, properties: Dict) -> str:
         """Add a node to the graph."""
         node_id = f"{node_type}_{name}"
@@ -209,19 +423,118 @@ class FinancialKnowledgeGraph:
             return 'PERSON'
         return 'ENTITY'
     
-    def _add_edge(self, source_id: str, target_id: str, relationship: str, properties: Dict):
-        """Add an edge to the graph."""
-        edge = {
-            'source': source_id,
-            'target': target_id,
-            'relationship': relationship,
-            'properties': properties
-        }
-        self.edges.append(edge)
+    def _add_edge(self, source_id: str, target_id: str, relationship: str, properties: Dict, weight: int = 1):
+        """Add an edge to the graph, or bump the weight of an existing one."""
+        key = (source_id, target_id, relationship)
+        edge = self.edges.get(key)
+        if edge is None:
+            edge = {
+                'source': source_id,
+                'target': target_id,
+                'relationship': relationship,
+                'weight': 0,
+                'properties': dict(properties)
+            }
+            self.edges[key] = edge
+            self._out[source_id][relationship][target_id] = edge
+            self._in[target_id][relationship][source_id] = edge
+        elif 'confidence' in properties:
+            edge['properties']['confidence'] = max(
+                edge['properties'].get('confidence', 0.0), properties['confidence']
+            )
+        edge['weight'] += weight
     
-    def query(self, query_type: str, **kwargs) -> List[Dict]:
+    def neighbors(self, node_id: str, relationship: str, direction: str = 'out') -> List[Tuple[str, int]]:
         """
-        Query the knowledge graph.
+        (node_id, weight) pairs linked to a node by one relationship, heaviest
+        first. direction: 'out' (node is the source), 'in' (node is the target) or 'both'.
+        """
+        weights: Dict[str, int] = defaultdict(int)
+        if direction in ('out', 'both') and node_id in self._out:
+            for target_id, edge in self._out[node_id].get(relationship, {}).items():
+                weights[target_id] += edge['weight']
+        if direction in ('in', 'both') and node_id in self._in:
+            for source_id, edge in self._in[node_id].get(relationship, {}).items():
+                weights[source_id] += edge['weight']
+        return sorted(weights.items(), key=lambda item: (-item[1], item[0]))
+    
+    def _neighbor_names(self, node_id: str, relationship: str, direction: str) -> List[str]:
+        return [
+            self.nodes[neighbor_id]['name']
+            for neighbor_id, _ in self.neighbors(node_id, relationship, direction)
+            if neighbor_id in self.nodes
+        ]
+    
+    def _memoized(self, key: Tuple, compute):
+        """Result of compute() cached under key until the graph version changes."""
+        with self._lock:
+            if self._memo_version != self.version or len(self._memo) >= GRAPH_MEMO_MAX_ENTRIES:
+                self._memo = {}
+                self._memo_version = self.version
+            if key not in self._memo:
+                self._memo[key] = compute()
+            return self._memo[key]
+    
+    def traverse(self, start_id: str, relationships: Tuple[str, ...], direction: str = 'out',
+                 max_depth: int = 1, max_fanout: int = GRAPH_MAX_FANOUT) -> Dict[str, int]:
+        """
+        BFS from a node over the given relationships: {node_id: hops} for every
+        node reached within max_depth (capped at GRAPH_MAX_DEPTH), start excluded.
+        Only the max_fanout heaviest neighbors of each node are followed.
+        """
+        max_depth = max(0, min(max_depth, GRAPH_MAX_DEPTH))
+        with self._lock:
+            hops = {start_id: 0}
+            frontier = [start_id]
+            for depth in range(1, max_depth + 1):
+                next_frontier = []
+                for node_id in frontier:
+                    weights: Dict[str, int] = defaultdict(int)
+                    for relationship in relationships:
+                        for neighbor_id, weight in self.neighbors(node_id, relationship, direction):
+                            weights[neighbor_id] += weight
+                    heaviest = sorted(weights.items(), key=lambda item: (-item[1], item[0]))[:max_fanout]
+                    for neighbor_id, _ in heaviest:
+                        if neighbor_id not in hops:
+                            hops[neighbor_id] = depth
+                            next_frontier.append(neighbor_id)
+                if not next_frontier:
+                    break
+                frontier = next_frontier
+            del hops[start_id]
+            return hops
+    
+    def competitors(self, ticker: str, depth: int = 1, max_fanout: int = GRAPH_MAX_FANOUT) -> List[Dict[str, Any]]:
+        """Companies within `depth` COMPETES_WITH hops of a ticker, nearest first: [{'ticker', 'hops'}]."""
+        def compute():
+            reached = self.traverse(f"COMPANY_{ticker}", ('COMPETES_WITH',), 'both', depth, max_fanout)
+            return [
+                {'ticker': self.nodes[node_id]['name'], 'hops': hops}
+                for node_id, hops in sorted(reached.items(), key=lambda item: item[1])
+                if node_id in self.nodes and self.nodes[node_id]['type'] == 'COMPANY'
+            ]
+        return self._memoized(('competitors', ticker, depth, max_fanout), compute)
+    
+    def companies_with_metrics(self, metrics: List[str]) -> List[str]:
+        """Companies linked (HAS_METRIC) to every one of the given metrics, sorted."""
+        def compute():
+            shared = None
+            for metric in metrics:
+                companies = {neighbor_id for neighbor_id, _ in self.neighbors(f"METRIC_{metric}", 'HAS_METRIC', 'in')}
+                shared = companies if shared is None else shared & companies
+            return sorted(self.nodes[node_id]['name'] for node_id in (shared or ()) if node_id in self.nodes)
+        return self._memoized(('companies_with_metrics', tuple(sorted(set(metrics)))), compute)
+    
+    def filed_tickers(self) -> FrozenSet[str]:
+        """Tickers with at least one filing in the graph (doc_ids look like AAPL_2024)."""
+        return self._memoized(('filed_tickers',), lambda: frozenset(
+            doc_id.split('_')[0].upper() for doc_id in self.documents
+        ))
+    
+    def query(self, query_type: str, **kwargs) -> List[str]:
+        """
+        Query the knowledge graph. Results are unique names, most frequently
+        linked first.
         
         Examples:
         - query('companies_with_metric', metric='Revenue')
@@ -229,43 +542,13 @@ class FinancialKnowledgeGraph:
         - query('metrics', company='AAPL')
         """
         if query_type == 'companies_with_metric':
-            metric = kwargs.get('metric')
-            results = []
-            for edge in self.edges:
-                if edge['relationship'] == 'HAS_METRIC':
-                    target_node = self.nodes.get(edge['target'])
-                    if target_node and target_node['name'] == metric:
-                        source_node = self.nodes.get(edge['source'])
-                        if source_node:
-                            results.append(source_node['name'])
-            return results
+            return self._neighbor_names(f"METRIC_{kwargs.get('metric')}", 'HAS_METRIC', 'in')
         
         elif query_type == 'competitors':
-            company = kwargs.get('company')
-            results = []
-            company_id = f"COMPANY_{company}"
-            for edge in self.edges:
-                if edge['relationship'] == 'COMPETES_WITH':
-                    if edge['source'] == company_id:
-                        target_node = self.nodes.get(edge['target'])
-                        if target_node:
-                            results.append(target_node['name'])
-                    elif edge['target'] == company_id:
-                        source_node = self.nodes.get(edge['source'])
-                        if source_node:
-                            results.append(source_node['name'])
-            return results
+            return self._neighbor_names(f"COMPANY_{kwargs.get('company')}", 'COMPETES_WITH', 'both')
         
         elif query_type == 'metrics':
-            company = kwargs.get('company')
-            company_id = f"COMPANY_{company}"
-            results = []
-            for edge in self.edges:
-                if edge['relationship'] == 'HAS_METRIC' and edge['source'] == company_id:
-                    target_node = self.nodes.get(edge['target'])
-                    if target_node:
-                        results.append(target_node['name'])
-            return results
+            return self._neighbor_names(f"COMPANY_{kwargs.get('company')}", 'HAS_METRIC', 'out')
         
         return []
     
@@ -276,23 +559,85 @@ class FinancialKnowledgeGraph:
             node_types[node['type']] += 1
         
         relationship_types = defaultdict(int)
-        for edge in self.edges:
+        total_weight = 0
+        for edge in self.edges.values():
             relationship_types[edge['relationship']] += 1
+            total_weight += edge['weight']
         
         return {
+            'version': self.version,
             'total_nodes': len(self.nodes),
             'total_edges': len(self.edges),
+            'total_edge_weight': total_weight,
             'node_types': dict(node_types),
             'relationship_types': dict(relationship_types)
         }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form (also what worker processes send back)."""
+        with self._lock:
+            return {
+                'nodes': list(self.nodes.values()),
+                'edges': [
+                    [edge['source'], edge['target'], edge['relationship'], edge['weight'], edge['properties']]
+                    for edge in self.edges.values()
+                ],
+                'documents': self.documents
+            }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FinancialKnowledgeGraph':
+        """Rebuild a graph (and its adjacency indexes) from to_dict() output."""
+        graph = cls()
+        for node in data.get('nodes', []):
+            graph.nodes[node['id']] = node
+        for source_id, target_id, relationship, weight, properties in data.get('edges', []):
+            graph._add_edge(source_id, target_id, relationship, properties, weight)
+        graph.documents = data.get('documents', {})
+        return graph
+    
+    def save(self, filepath: Path):
+        """Write the graph as JSON (written to a temp file and renamed, so readers never see a partial file)."""
+        filepath = Path(filepath)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        data = self.to_dict()
+        tmp_path = filepath.with_name(filepath.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, filepath)
+    
+    def load(self, filepath: Path):
+        """Replace the graph with one written by save(); adjacency indexes are rebuilt."""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            graph = FinancialKnowledgeGraph.from_dict(json.load(f))
+        with self._lock:
+            self.nodes, self.edges, self.documents = graph.nodes, graph.edges, graph.documents
+            self._out, self._in = graph._out, graph._in
+            self.version += 1
 
 
 # Global instance
 _knowledge_graph = None
 
 def get_knowledge_graph() -> FinancialKnowledgeGraph:
-    """Get or create knowledge graph instance."""
+    """Get or create knowledge graph instance (loaded from KNOWLEDGE_GRAPH_PATH if saved)."""
     global _knowledge_graph
     if _knowledge_graph is None:
-        _knowledge_graph = FinancialKnowledgeGraph()
+        graph = FinancialKnowledgeGraph()
+        if KNOWLEDGE_GRAPH_PATH.exists():
+            try:
+                graph.load(KNOWLEDGE_GRAPH_PATH)
+                print(f"[INFO] Knowledge graph loaded: {len(graph.nodes)} nodes, {len(graph.edges)} edges")
+            except Exception as e:
+                print(f"[WARNING] Could not load knowledge graph: {e}")
+                graph = FinancialKnowledgeGraph()
+        _knowledge_graph = graph
     return _knowledge_graph
+
+
+def add_filing_to_graph(text: str, ticker: str, doc_id: str) -> Dict[str, int]:
+    """Incremental update for a single filing (e.g. /upload): merge it into the graph and save the snapshot."""
+    graph = get_knowledge_graph()
+    stats = graph.add_document(text, ticker, {'doc_id': doc_id})
+    graph.save(KNOWLEDGE_GRAPH_PATH)
+    return stats
@@ -2,15 +2,52 @@
 LLM (Gemini) service
 """
 
+import datetime
+import random
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Callable, Tuple, TypeVar
+
 try:
     import google.generativeai as genai
+    from google.generativeai import caching as genai_caching
     GEMINI_AVAILABLE = True
 except ImportError:
     GEMINI_AVAILABLE = False
     print("[WARNING] Google Generative AI not installed. Gemini features will be disabled.")
     print("   Install with: pip install google-generativeai")
 
-from backend.app.config import GEMINI_API_KEY, GEMINI_MODEL
+from backend.app.config import (
+    GEMINI_API_KEY, GEMINI_MODEL, GEMINI_API_ENDPOINT,
+    LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, LLM_MAX_CONCURRENCY,
+    LLM_TIMEOUT_SECONDS, LLM_MAX_RETRIES, LLM_BACKOFF_BASE_SECONDS,
+    LLM_BACKOFF_MAX_SECONDS, LLM_HEDGE_ENABLED,
+    CONTEXT_CACHE_BACKEND, CONTEXT_CACHE_TTL_SECONDS, CONTEXT_CACHE_MAX_HANDLES,
+    CONTEXT_CACHE_HOT_THRESHOLD
+)
+
+# Static analyst instructions, sent as the system instruction of every call
+SYSTEM_PROMPT = """You are a financial analyst expert. Analyze the provided financial documents and answer the user's query.
+
+CRITICAL INSTRUCTIONS FOR TABLES:
+- Pay EXTREMELY close attention to TABLES - they contain critical financial data
+- Preserve EXACT numbers, dates, and percentages from tables - do not round or approximate
+- When showing tables in your response, you MUST use proper markdown table format with pipe separators (|)
+- DO NOT use tabs, spaces, or any other format - ONLY use markdown table format
+- Markdown table format example:
+  | Column 1 | Column 2 | Column 3 |
+  |----------|----------|----------|
+  | Data 1   | Data 2   | Data 3   |
+- Extract data directly from tables - do not make up numbers
+- If the query asks for a table, reconstruct it completely with all rows and columns in markdown format
+- Preserve table structure: row headers (security types, categories), column headers (years, periods), and all data cells
+- For calculations (percentages, differences), show your work or cite the exact values used
+- Cite specific sections and table names when referencing data (e.g., "Interest Rate Risk table", "Item 7A")
+- If data is not found, clearly state that rather than guessing
+
+Format your response as a clear, structured analysis with properly formatted markdown tables when relevant. ALWAYS use | separators for tables, never tabs or spaces."""
 
 # Global model instance (lazy loading)
 _gemini_model = None
@@ -26,7 +63,16 @@ def get_gemini_model():
             print("[WARNING] GOOGLE_API_KEY not set. Gemini features disabled.")
             return None
         try:
-            genai.configure(api_key=GEMINI_API_KEY)
+            if GEMINI_API_ENDPOINT:
+                # REST transport so the endpoint can be a plain HTTP (fake) server
+                genai.configure(
+                    api_key=GEMINI_API_KEY,
+                    transport="rest",
+                    client_options={"api_endpoint": GEMINI_API_ENDPOINT}
+                )
+                print(f"[INFO] Gemini endpoint overridden: {GEMINI_API_ENDPOINT}")
+            else:
+                genai.configure(api_key=GEMINI_API_KEY)
             _gemini_model = genai.GenerativeModel(GEMINI_MODEL)
             print(f"[SUCCESS] Gemini model '{GEMINI_MODEL}' loaded!")
             print(f"[INFO] API Key configured: {GEMINI_API_KEY[:20]}...{GEMINI_API_KEY[-4:]}")
@@ -39,3 +85,547 @@ def get_gemini_model():
 def estimate_tokens(text: str) -> int:
     """Rough token estimation (1 token ≈ 4 characters)."""
     return len(text) // 4
+
+
+T = TypeVar("T")
+
+# Provider errors worth retrying (google.api_core exception class names)
+RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "InternalServerError", "DeadlineExceeded", "GatewayTimeout", "LLMTimeoutError",
+}
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LLMTimeoutError(Exception):
+    """An LLM call did not finish before its deadline."""
+
+
+class LLMRateLimitError(Exception):
+    """Local rate limits could not admit the call before its deadline."""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity per minute."""
+    
+    def __init__(self, capacity_per_minute: int):
+        self.capacity = float(capacity_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def try_acquire(self, amount: float) -> float:
+        """Take amount if available (returns 0.0), else return seconds to wait."""
+        # A single call larger than the bucket is admitted once the bucket is full
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+    
+    def refund(self, amount: float):
+        """Return tokens taken for a call that was not made after all."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+    
+    def acquire(self, amount: float, deadline: float) -> bool:
+        """Block until amount is available; False if that would pass deadline."""
+        while True:
+            wait_seconds = self.try_acquire(amount)
+            if wait_seconds == 0.0:
+                return True
+            if time.monotonic() + wait_seconds > deadline:
+                return False
+            time.sleep(wait_seconds)
+
+
+def _is_retryable(error: Exception) -> bool:
+    if type(error).__name__ in RETRYABLE_ERRORS:
+        return True
+    code = getattr(error, "code", None)
+    code = getattr(code, "value", code)
+    return code in RETRYABLE_STATUS_CODES
+
+
+class LLMClient:
+    """
+    Wrapper around LLM calls with:
+    - token-bucket rate limits on requests/min and tokens/min
+    - a bounded concurrency semaphore
+    - jittered exponential retry on rate-limit / transient errors
+    - a deadline per call (all retries included); a stuck call frees the
+      request after the deadline instead of holding it forever, and its
+      provider request times out at that deadline too, after which its
+      concurrency slot is released
+    - optional hedging: a duplicate attempt is started once an attempt runs
+      longer than the observed p95 latency, and the first result wins
+    """
+    
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_concurrency: int,
+                 timeout_seconds: float, max_retries: int, backoff_base: float = 1.0,
+                 backoff_max: float = 20.0, hedge: bool = False, hedge_min_samples: int = 20):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        # Room for one hedge per concurrent call
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix="llm")
+        self._latencies = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self.stats = defaultdict(int)  # Updated from worker threads: use _count
+    
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+    
+    def _admit(self, estimated_tokens: int, deadline: float) -> bool:
+        """Take one request and estimated_tokens from the buckets, or neither."""
+        if not self.request_bucket.acquire(1, deadline):
+            return False
+        if not self.token_bucket.acquire(estimated_tokens, deadline):
+            self.request_bucket.refund(1)
+            return False
+        return True
+    
+    def _try_admit(self, estimated_tokens: int) -> bool:
+        """Non-blocking _admit (hedges only go out if both buckets have room now)."""
+        if self.request_bucket.try_acquire(1) != 0.0:
+            return False
+        if self.token_bucket.try_acquire(estimated_tokens) != 0.0:
+            self.request_bucket.refund(1)
+            return False
+        return True
+    
+    def _p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+    
+    def call(self, fn: Callable[[float], T], estimated_tokens: int = 0, timeout_seconds: Optional[float] = None) -> T:
+        """
+        Run fn(attempt_timeout) under the client's limits and return its result.
+        fn should pass attempt_timeout on to the provider request.
+        """
+        deadline = time.monotonic() + (timeout_seconds or self.timeout_seconds)
+        self._count('calls')
+        
+        for attempt in range(self.max_retries + 1):
+            if not self._admit(estimated_tokens, deadline):
+                self._count('rate_limited')
+                raise LLMRateLimitError("LLM rate limit: call could not be admitted before its deadline")
+            
+            if not self._semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                self._count('timeouts')
+                raise LLMTimeoutError("LLM call timed out waiting for a concurrency slot")
+            try:
+                # _run_attempt hands the slot back once its HTTP calls have ended
+                return self._run_attempt(fn, deadline, estimated_tokens)
+            except Exception as e:
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    if isinstance(e, LLMTimeoutError):
+                        self._count('timeouts')
+                    self._count('failures')
+                    raise
+                # Full jitter: sleep U(0, min(max, base * 2^attempt)), never past the deadline
+                backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                if time.monotonic() + backoff >= deadline:
+                    self._count('timeouts')
+                    raise LLMTimeoutError(f"LLM call deadline reached after {attempt + 1} attempts: {e}")
+                self._count('retries')
+                print(f"[WARNING] LLM call failed ({type(e).__name__}: {e}); retry {attempt + 1}/{self.max_retries} in {backoff:.1f}s")
+            
+            # Back off without holding a concurrency slot
+            time.sleep(backoff)
+    
+    def _release_when_done(self, futures: List[Future]):
+        """
+        Release the concurrency slot once every future of an attempt has
+        finished, so abandoned HTTP calls keep counting against the limit.
+        """
+        remaining = [len(futures)]
+        lock = threading.Lock()
+        
+        def finished(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self._semaphore.release()
+        
+        if not futures:
+            self._semaphore.release()
+        for future in futures:
+            future.add_done_callback(finished)
+    
+    def _run_attempt(self, fn: Callable[[float], T], deadline: float, estimated_tokens: int) -> T:
+        """
+        One attempt (plus an optional hedge), bounded by deadline. Takes over
+        the caller's semaphore slot. Every fn gets the time left until the
+        deadline as its request timeout, so an attempt abandoned here ends
+        on its own soon after.
+        """
+        start = time.monotonic()
+        attempt_timeout = max(0.0, deadline - start)
+        futures = []
+        try:
+            if attempt_timeout <= 0:
+                raise LLMTimeoutError("LLM call deadline reached before the request was sent")
+            futures.append(self._executor.submit(fn, attempt_timeout))
+            return self._await_attempt(futures, fn, start, deadline, estimated_tokens)
+        finally:
+            if any(not future.done() for future in futures):
+                self._count('abandoned')
+            self._release_when_done(futures)
+    
+    def _await_attempt(self, futures: List[Future], fn: Callable[[float], T], start: float,
+                       deadline: float, estimated_tokens: int) -> T:
+        """Wait for the first successful future; may add a hedge to futures."""
+        p95 = self._p95() if self.hedge else None
+        if p95 is not None and start + p95 < deadline:
+            done, _ = wait(futures, timeout=p95)
+            if not done and self._try_admit(estimated_tokens):
+                self._count('hedges')
+                futures.append(self._executor.submit(fn, max(0.0, deadline - time.monotonic())))
+        
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        self._count('hedge_wins')
+                    with self._lock:
+                        self._latencies.append(time.monotonic() - start)
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+        
+        if error is not None and not pending:
+            raise error
+        raise LLMTimeoutError(f"LLM call exceeded its deadline ({deadline - start:.1f}s)")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get client statistics."""
+        with self._lock:
+            ordered = sorted(self._latencies)
+            stats = dict(self.stats)
+        return {
+            'max_concurrency': self.max_concurrency,
+            'timeout_seconds': self.timeout_seconds,
+            'hedge': self.hedge,
+            'latency_p50': ordered[len(ordered) // 2] if ordered else None,
+            'latency_p95': ordered[int(0.95 * (len(ordered) - 1))] if ordered else None,
+            **stats
+        }
+
+
+# Global instance
+_llm_client = None
+
+def get_llm_client() -> LLMClient:
+    """Get or create the shared LLM client."""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient(
+            requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+            max_concurrency=LLM_MAX_CONCURRENCY,
+            timeout_seconds=LLM_TIMEOUT_SECONDS,
+            max_retries=LLM_MAX_RETRIES,
+            backoff_base=LLM_BACKOFF_BASE_SECONDS,
+            backoff_max=LLM_BACKOFF_MAX_SECONDS,
+            hedge=LLM_HEDGE_ENABLED
+        )
+    return _llm_client
+
+
+def _generate_text(model, prompt: str) -> str:
+    """generate_content through the shared LLM client (limits, retries, deadline)."""
+    return get_llm_client().call(
+        lambda timeout: model.generate_content(prompt, request_options={"timeout": timeout}).text,
+        estimated_tokens=estimate_tokens(prompt)
+    )
+
+
+class ContextCacheBackend:
+    """
+    Interface for cached prompt prefixes (system instruction + documents).
+    Implementations: provider-side Gemini caches, or a local stand-in.
+    Tests can pass any object with these methods to ContextCacheManager.
+    """
+    
+    def create(self, system_instruction: str, contents: List[str], ttl_seconds: int) -> str:
+        """Create a cached context and return its handle name."""
+        raise NotImplementedError
+    
+    def refresh(self, name: str, ttl_seconds: int):
+        """Extend the TTL of a cached context."""
+        raise NotImplementedError
+    
+    def delete(self, name: str):
+        """Drop a cached context."""
+        raise NotImplementedError
+    
+    def generate(self, name: str, prompt: str) -> str:
+        """Generate with a cached context as the prompt prefix."""
+        raise NotImplementedError
+    
+    def generate_uncached(self, system_instruction: str, prompt: str) -> str:
+        """Generate with the prefix sent inline (no cached context)."""
+        raise NotImplementedError
+
+
+class GeminiContextCacheBackend(ContextCacheBackend):
+    """Provider-side cached contents (google.generativeai.caching)."""
+    
+    def __init__(self):
+        self._caches = {}  # {name: CachedContent}
+        self._models = {}  # {name: GenerativeModel bound to the cache}
+    
+    def create(self, system_instruction: str, contents: List[str], ttl_seconds: int) -> str:
+        if get_gemini_model() is None:
+            raise RuntimeError("Gemini not configured")
+        cache = genai_caching.CachedContent.create(
+            model=f"models/{GEMINI_MODEL}",
+            system_instruction=system_instruction,
+            contents=contents or None,
+            ttl=datetime.timedelta(seconds=ttl_seconds)
+        )
+        self._caches[cache.name] = cache
+        self._models[cache.name] = genai.GenerativeModel.from_cached_content(cached_content=cache)
+        return cache.name
+    
+    def refresh(self, name: str, ttl_seconds: int):
+        self._caches[name].update(ttl=datetime.timedelta(seconds=ttl_seconds))
+    
+    def delete(self, name: str):
+        cache = self._caches.pop(name, None)
+        self._models.pop(name, None)
+        if cache is not None:
+            cache.delete()
+    
+    def generate(self, name: str, prompt: str) -> str:
+        return _generate_text(self._models[name], prompt)
+    
+    def generate_uncached(self, system_instruction: str, prompt: str) -> str:
+        gemini = get_gemini_model()
+        if gemini is None:
+            raise RuntimeError("Gemini not configured")
+        return _generate_text(gemini, f"{system_instruction}\n\n{prompt}")
+
+
+class LocalContextCacheBackend(ContextCacheBackend):
+    """
+    Local stand-in for provider caches: prefixes are kept in memory and sent
+    inline. Same code path as the Gemini backend, so it works offline with
+    a fake generate_fn and when provider caching is unavailable.
+    """
+    
+    def __init__(self, generate_fn: Optional[Callable[[str], str]] = None):
+        self.generate_fn = generate_fn or self._gemini_generate
+        self._prefixes = {}  # {name: prefix text}
+    
+    @staticmethod
+    def _gemini_generate(prompt: str) -> str:
+        gemini = get_gemini_model()
+        if gemini is None:
+            raise RuntimeError("Gemini not configured")
+        return _generate_text(gemini, prompt)
+    
+    def create(self, system_instruction: str, contents: List[str], ttl_seconds: int) -> str:
+        name = f"local/{len(self._prefixes)}-{time.time_ns()}"
+        self._prefixes[name] = "\n\n".join([system_instruction] + list(contents))
+        return name
+    
+    def refresh(self, name: str, ttl_seconds: int):
+        pass
+    
+    def delete(self, name: str):
+        self._prefixes.pop(name, None)
+    
+    def generate(self, name: str, prompt: str) -> str:
+        return self.generate_fn(f"{self._prefixes[name]}\n\n{prompt}")
+    
+    def generate_uncached(self, system_instruction: str, prompt: str) -> str:
+        return self.generate_fn(f"{system_instruction}\n\n{prompt}")
+
+
+class ContextCacheManager:
+    """
+    LRU of cached-context handles with TTL refresh.
+    
+    - The static SYSTEM_PROMPT always goes into the cached prefix.
+    - Tickers become "hot" after CONTEXT_CACHE_HOT_THRESHOLD queries; callers
+      can then put that company's core sections into the prefix as well.
+    - Prefix keys must change when their contents change (e.g. include the
+      index version stamp); contents are only built when a handle is created.
+    - If the provider refuses a cache (e.g. prefix below its minimum token
+      count) the prefix is kept locally for one TTL and sent inline.
+    """
+    
+    def __init__(self, backend: ContextCacheBackend, max_handles: int = 16,
+                 ttl_seconds: int = 3600, hot_threshold: int = 3):
+        self.backend = backend
+        self.max_handles = max_handles
+        self.ttl_seconds = ttl_seconds
+        self.hot_threshold = hot_threshold
+        self._prefixes = OrderedDict()  # {key: {'key', 'name', 'contents', 'metadata', 'expires_at', 'tokens'}}
+        self._ticker_queries = defaultdict(int)
+        self._lock = threading.Lock()
+        self.stats = defaultdict(int)
+    
+    def record_query(self, ticker: str) -> bool:
+        """Count a query for a ticker; returns True once the ticker is hot."""
+        with self._lock:
+            self._ticker_queries[ticker] += 1
+            return self._ticker_queries[ticker] >= self.hot_threshold
+    
+    def get_prefix(self, key: str = "system",
+                   contents_factory: Optional[Callable[[], Tuple[List[str], Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """
+        Return the cached prefix for key, creating it from contents_factory
+        (-> (contents, metadata)) on first use or after expiry.
+        """
+        now = time.time()
+        with self._lock:
+            prefix = self._prefixes.get(key)
+            if prefix and prefix['expires_at'] > now:
+                self._prefixes.move_to_end(key)
+                self._touch(prefix, now)
+                return prefix
+            if prefix:
+                self._drop(key)
+        
+        # Build and create outside the lock (Qdrant scroll + provider round-trip)
+        contents, metadata = contents_factory() if contents_factory else ([], {})
+        tokens = estimate_tokens(SYSTEM_PROMPT) + sum(estimate_tokens(c) for c in contents)
+        try:
+            name = self.backend.create(SYSTEM_PROMPT, contents, self.ttl_seconds)
+            self.stats['creates'] += 1
+            print(f"[INFO] Created cached context '{key}' (~{tokens:,} tokens)")
+        except Exception as e:
+            name = None
+            self.stats['create_failures'] += 1
+            print(f"[INFO] Context cache not created for '{key}' ({e}); sending prefix inline")
+        
+        prefix = {
+            'key': key,
+            'name': name,
+            'contents': contents,
+            'metadata': metadata,
+            'expires_at': now + self.ttl_seconds,
+            'tokens': tokens
+        }
+        with self._lock:
+            existing = self._prefixes.get(key)
+            if existing and existing['expires_at'] > now:
+                # Another request created it meanwhile; keep theirs
+                if name:
+                    self._delete_handle(name)
+                return existing
+            self._prefixes[key] = prefix
+            while len(self._prefixes) > self.max_handles:
+                self._drop(next(iter(self._prefixes)))
+                self.stats['evictions'] += 1
+        return prefix
+    
+    def _touch(self, prefix: Dict[str, Any], now: float):
+        """Record a hit and refresh the provider TTL once half of it is used up."""
+        if not prefix['name']:
+            return
+        self.stats['hits'] += 1
+        self.stats['prefix_tokens_reused'] += prefix['tokens']
+        if prefix['expires_at'] - now < self.ttl_seconds / 2:
+            try:
+                self.backend.refresh(prefix['name'], self.ttl_seconds)
+                prefix['expires_at'] = now + self.ttl_seconds
+                self.stats['refreshes'] += 1
+            except Exception as e:
+                print(f"[WARNING] Context cache refresh failed for '{prefix['key']}': {e}")
+    
+    def _drop(self, key: str):
+        prefix = self._prefixes.pop(key, None)
+        if prefix and prefix['name']:
+            self._delete_handle(prefix['name'])
+    
+    def _delete_handle(self, name: str):
+        try:
+            self.backend.delete(name)
+        except Exception as e:
+            print(f"[WARNING] Failed to delete cached context {name}: {e}")
+    
+    def generate(self, prompt: str, prefix: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate an answer for prompt behind a cached prefix
+        (defaults to the SYSTEM_PROMPT-only prefix).
+        """
+        if prefix is None:
+            prefix = self.get_prefix("system")
+        
+        if prefix['name']:
+            try:
+                return self.backend.generate(prefix['name'], prompt)
+            except Exception as e:
+                print(f"[WARNING] Cached-context generation failed for '{prefix['key']}': {e}")
+                with self._lock:
+                    if self._prefixes.get(prefix['key']) is prefix:
+                        self._drop(prefix['key'])
+        
+        self.stats['inline'] += 1
+        inline_prompt = "\n\n".join(prefix['contents'] + [prompt])
+        return self.backend.generate_uncached(SYSTEM_PROMPT, inline_prompt)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get context cache statistics."""
+        with self._lock:
+            return {
+                'backend': type(self.backend).__name__,
+                'prefixes': {k: ('cached' if p['name'] else 'inline') for k, p in self._prefixes.items()},
+                'max_handles': self.max_handles,
+                'ttl_seconds': self.ttl_seconds,
+                'hot_tickers': sorted(t for t, n in self._ticker_queries.items() if n >= self.hot_threshold),
+                **dict(self.stats)
+            }
+
+
+# Global instance
+_context_cache_manager = None
+
+def get_context_cache_manager() -> ContextCacheManager:
+    """Get or create context cache manager (backend chosen by CONTEXT_CACHE_BACKEND)."""
+    global _context_cache_manager
+    if _context_cache_manager is None:
+        if CONTEXT_CACHE_BACKEND == "gemini" and GEMINI_AVAILABLE:
+            backend = GeminiContextCacheBackend()
+        else:
+            backend = LocalContextCacheBackend()
+        _context_cache_manager = ContextCacheManager(
+            backend,
+            max_handles=CONTEXT_CACHE_MAX_HANDLES,
+            ttl_seconds=CONTEXT_CACHE_TTL_SECONDS,
+            hot_threshold=CONTEXT_CACHE_HOT_THRESHOLD
+        )
+    return _context_cache_manager
@@ -1,11 +1,28 @@
 """
 Multi-Agent Orchestration System
 Coordinates multiple specialized AI agents to answer complex queries.
+
+Agents declare the agents they depend on (depends_on); the orchestrator
+runs each one in a thread pool as soon as its dependencies have finished,
+so independent agents overlap and the query takes as long as the critical
+path rather than the sum of all agents.
+
+Retrieval runs once for all tickers (one embedding, one batched search).
+Its sections go into a read-only shared context, and each agent gets a
+view filtered to the sections it reads instead of querying again.
 """
 
-from typing import List, Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, Mapping
 from enum import Enum
 
+from backend.app.config import AGENT_TIMEOUT_SECONDS, AGENT_MAX_WORKERS
+from backend.app.utils.query_parser import ParsedQuery, parse_query
+
+RETRIEVAL_LIMIT_PER_TICKER = 10
+
 class AgentType(Enum):
     DATA_RETRIEVAL = "data_retrieval"
     TABLE_EXTRACTION = "table_extraction"
@@ -18,60 +35,67 @@ class AgentType(Enum):
 class Agent:
     """Base class for specialized agents."""
     
+    depends_on: Tuple[AgentType, ...] = ()  # Agents whose results this one reads from the context
+    section_keywords: Tuple[str, ...] = ()  # Sections this agent sees (by section name); empty = all
+    intent: Optional[str] = None  # ParsedQuery intent that activates this agent
+    metrics: Tuple[str, ...] = ()  # Metrics this agent can work with
+    
     def __init__(self, agent_type: AgentType):
         self.agent_type = agent_type
         self.name = agent_type.value
     
-    def can_handle(self, query: str) -> bool:
+    def can_handle(self, parsed: ParsedQuery) -> bool:
         """Check if this agent can handle the query."""
-        raise NotImplementedError
+        return parsed.has_intent(self.intent)
     
-    def execute(self, query: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute the agent's task."""
+    def execute(self, query: str, context: Mapping[str, Any]) -> Dict[str, Any]:
+        """Execute the agent's task. context is read-only."""
         raise NotImplementedError
+    
+    def wants_section(self, section: Mapping[str, Any]) -> bool:
+        """Whether a retrieved section belongs in this agent's view of the context."""
+        if not self.section_keywords:
+            return True
+        name = section.get('section', '').lower()
+        return any(keyword in name for keyword in self.section_keywords)
 
 class DataRetrievalAgent(Agent):
-    """Retrieves relevant documents and sections."""
+    """Retrieves relevant sections for every ticker in the query, in one batched pass."""
     
     def __init__(self):
         super().__init__(AgentType.DATA_RETRIEVAL)
-        from backend.app.services.file_service import retrieve_relevant_sections
-        self.retrieve = retrieve_relevant_sections
+        from backend.app.services.file_service import retrieve_sections_batch
+        self.retrieve = retrieve_sections_batch
     
-    def can_handle(self, query: str) -> bool:
+    def can_handle(self, parsed: ParsedQuery) -> bool:
         return True  # Always needed
     
-    def execute(self, query: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        ticker = context.get('ticker', '')
-        sections = self.retrieve(query, ticker, limit=10)
+    def execute(self, query: str, context: Mapping[str, Any]) -> Dict[str, Any]:
+        tickers = list(context.get('tickers') or [context.get('ticker', '')])
+        sections_by_ticker = self.retrieve(query, tickers, limit=RETRIEVAL_LIMIT_PER_TICKER,
+                                           query_embedding=context.get('query_embedding'))
+        sections = [section for ticker in tickers for section in sections_by_ticker.get(ticker, [])]
         return {
             'agent': self.name,
             'sections': sections,
+            'sections_by_ticker': sections_by_ticker,
             'success': len(sections) > 0
         }
 
 class TrendAnalysisAgent(Agent):
     """Analyzes trends in time-series data."""
     
+    intent = 'trend'
+    metrics = ('revenue', 'operating income', 'income', 'profit', 'cash flow', 'assets', 'liabilities')
+    
     def __init__(self):
         super().__init__(AgentType.TREND_ANALYSIS)
         from backend.app.services.time_series_extractor import get_time_series_extractor
         self.ts_extractor = get_time_series_extractor()
     
-    def can_handle(self, query: str) -> bool:
-        keywords = ['trend', 'growth', 'increase', 'decrease', 'over time', 'years', 'historical']
-        return any(kw in query.lower() for kw in keywords)
-    
-    def execute(self, query: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    def execute(self, query: str, context: Mapping[str, Any]) -> Dict[str, Any]:
         ticker = context.get('ticker', '')
-        
-        # Extract metric from query
-        metrics = ['revenue', 'income', 'profit', 'cash flow', 'assets', 'liabilities']
-        metric = None
-        for m in metrics:
-            if m in query.lower():
-                metric = m
-                break
+        metric = context['parsed'].first_metric(self.metrics)
         
         if not metric:
             return {'agent': self.name, 'error': 'No metric found in query'}
@@ -91,28 +115,21 @@ class TrendAnalysisAgent(Agent):
 class ComparisonAgent(Agent):
     """Compares companies, metrics, or time periods."""
     
+    intent = 'comparison'
+    metrics = ('revenue', 'operating income', 'income', 'profit', 'margin')
+    
     def __init__(self):
         super().__init__(AgentType.COMPARISON)
         from backend.app.services.time_series_extractor import get_time_series_extractor
         self.ts_extractor = get_time_series_extractor()
     
-    def can_handle(self, query: str) -> bool:
-        keywords = ['compare', 'comparison', 'vs', 'versus', 'difference', 'better', 'worse']
-        return any(kw in query.lower() for kw in keywords)
-    
-    def execute(self, query: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    def execute(self, query: str, context: Mapping[str, Any]) -> Dict[str, Any]:
         tickers = context.get('tickers', [])
         
         if len(tickers) < 2:
             return {'agent': self.name, 'error': 'Need at least 2 companies to compare'}
         
-        # Extract metric
-        metrics = ['revenue', 'income', 'profit', 'margin', 'growth']
-        metric = None
-        for m in metrics:
-            if m in query.lower():
-                metric = m
-                break
+        metric = context['parsed'].first_metric(self.metrics)
         
         if not metric:
             return {'agent': self.name, 'error': 'No metric found'}
@@ -134,18 +151,16 @@ class ComparisonAgent(Agent):
 class RiskAssessmentAgent(Agent):
     """Assesses financial risks."""
     
+    depends_on = (AgentType.DATA_RETRIEVAL,)  # Reads the retrieved sections
+    section_keywords = ('risk',)
+    intent = 'risk'
+    
     def __init__(self):
         super().__init__(AgentType.RISK_ASSESSMENT)
     
-    def can_handle(self, query: str) -> bool:
-        keywords = ['risk', 'risky', 'danger', 'warning', 'concern', 'threat']
-        return any(kw in query.lower() for kw in keywords)
-    
-    def execute(self, query: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        sections = context.get('sections', [])
-        
-        # Look for risk-related sections
-        risk_sections = [s for s in sections if 'risk' in s.get('section', '').lower()]
+    def execute(self, query: str, context: Mapping[str, Any]) -> Dict[str, Any]:
+        # The orchestrator's view only holds risk-related sections
+        risk_sections = context.get('sections', ())
         
         # Extract risk factors
         risk_factors = []
@@ -169,64 +184,163 @@ class MultiAgentOrchestrator:
     Orchestrates multiple agents to answer complex queries.
     """
     
-    def __init__(self):
+    def __init__(self, timeout_seconds: float = AGENT_TIMEOUT_SECONDS, max_workers: int = AGENT_MAX_WORKERS):
         self.agents = [
             DataRetrievalAgent(),
             TrendAnalysisAgent(),
             ComparisonAgent(),
             RiskAssessmentAgent(),
         ]
+        self.timeout_seconds = timeout_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent")
     
-    def process_query(self, query: str, ticker: str, tickers: Optional[List[str]] = None) -> Dict[str, Any]:
+    def process_query(self, query: str, ticker: str, tickers: Optional[List[str]] = None,
+                      query_embedding=None, parsed: Optional[ParsedQuery] = None) -> Dict[str, Any]:
         """
-        Process a query using multiple agents.
+        Process a query using multiple agents. Pass query_embedding / parsed
+        to reuse the embedding and query analysis the caller already has.
         """
         if tickers is None:
             tickers = [ticker] if ticker else []
+        parsed = parsed or parse_query(query)
         
         context = {
             'query': query,
+            'parsed': parsed,
             'ticker': ticker,
-            'tickers': tickers,
-            'sections': [],
-            'results': {}
+            'tickers': tuple(tickers),
+            'query_embedding': query_embedding,
+            'sections': (),
+            'sections_by_ticker': MappingProxyType({})
         }
         
-        # Step 1: Always retrieve data first
+        # Step 1: Data retrieval always runs; other agents only if the query needs them
         data_agent = self.agents[0]  # DataRetrievalAgent
-        data_result = data_agent.execute(query, context)
-        context['sections'] = data_result.get('sections', [])
+        active_agents = [agent for agent in self.agents[1:] if agent.can_handle(parsed)]
         
-        # Step 2: Determine which agents are needed
-        active_agents = []
-        for agent in self.agents[1:]:  # Skip data retrieval (already done)
-            if agent.can_handle(query):
-                active_agents.append(agent)
+        # Step 2: Run the dependency DAG
+        start = time.monotonic()
+        results, timings = self._run_dag([data_agent] + active_agents, query, context)
+        wall_seconds = time.monotonic() - start
         
-        # Step 3: Execute active agents in parallel (simulated)
-        agent_results = {}
-        for agent in active_agents:
-            try:
-                result = agent.execute(query, context)
-                agent_results[agent.name] = result
-            except Exception as e:
-                agent_results[agent.name] = {
-                    'agent': agent.name,
-                    'error': str(e),
-                    'success': False
-                }
+        data_result = results.pop(data_agent.name)
+        agent_ms = {name: round(seconds * 1000, 1) for name, seconds in timings.items()}
         
-        # Step 4: Combine results
+        # Step 3: Combine results
         return {
             'query': query,
             'ticker': ticker,
             'tickers': tickers,
             'data_retrieval': data_result,
-            'agent_results': agent_results,
+            'agent_results': results,
             'active_agents': [a.name for a in active_agents],
-            'sections_retrieved': len(context['sections'])
+            'sections_retrieved': len(context['sections']),
+            'timing': {
+                'wall_ms': round(wall_seconds * 1000, 1),
+                'agents_ms': agent_ms,
+                'sum_ms': round(sum(timings.values()) * 1000, 1),
+                'critical_path': self._critical_path([data_agent] + active_agents, timings)
+            }
         }
     
+    def _run_dag(self, agents: List[Agent], query: str, context: Dict[str, Any]) -> Tuple[Dict[str, Dict], Dict[str, float]]:
+        """
+        Submit each agent once all of its dependencies have finished; agents
+        whose dependency failed or timed out are skipped. Each agent gets
+        timeout_seconds from when it is submitted. Returns (results, latencies).
+        """
+        by_type = {agent.agent_type: agent for agent in agents}
+        waiting = list(agents)
+        results: Dict[str, Dict] = {}
+        timings: Dict[str, float] = {}
+        running = {}  # {future: (agent, deadline)}
+        
+        def timed(agent: Agent, agent_context: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+            started = time.monotonic()
+            try:
+                result = agent.execute(query, agent_context)
+            except Exception as e:
+                result = {'agent': agent.name, 'error': str(e), 'success': False}
+            return result, time.monotonic() - started
+        
+        while waiting or running:
+            for agent in list(waiting):
+                dependencies = [by_type[dep] for dep in agent.depends_on if dep in by_type]
+                if any(dep.name not in results for dep in dependencies):
+                    continue
+                waiting.remove(agent)
+                failed = [dep.name for dep in dependencies if 'error' in results[dep.name]]
+                if failed:
+                    results[agent.name] = {'agent': agent.name, 'error': f"Skipped: {', '.join(failed)} failed",
+                                           'skipped': True, 'success': False}
+                    continue
+                future = self._executor.submit(timed, agent, self._view(agent, context))
+                running[future] = (agent, time.monotonic() + self.timeout_seconds)
+            
+            if not running:
+                continue
+            
+            next_deadline = min(deadline for _, deadline in running.values())
+            done, _ = wait(running, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                agent, _ = running.pop(future)
+                results[agent.name], timings[agent.name] = future.result()
+                if agent.agent_type == AgentType.DATA_RETRIEVAL:
+                    self._share_sections(context, results[agent.name])
+            
+            now = time.monotonic()
+            for future, (agent, deadline) in list(running.items()):
+                if now >= deadline and not future.done():
+                    # Cancels it if it hasn't started; a running agent's thread finishes in the background
+                    future.cancel()
+                    running.pop(future)
+                    timings[agent.name] = self.timeout_seconds
+                    results[agent.name] = {'agent': agent.name, 'error': f"Timed out after {self.timeout_seconds:.1f}s",
+                                           'timed_out': True, 'success': False}
+                    print(f"[WARNING] Agent {agent.name} timed out after {self.timeout_seconds:.1f}s")
+        
+        return results, timings
+    
+    @staticmethod
+    def _share_sections(context: Dict[str, Any], retrieval_result: Dict[str, Any]):
+        """Publish retrieved sections in the shared context as read-only mappings and tuples."""
+        by_ticker = {
+            ticker: tuple(MappingProxyType(section) for section in sections)
+            for ticker, sections in retrieval_result.get('sections_by_ticker', {}).items()
+        }
+        context['sections_by_ticker'] = MappingProxyType(by_ticker)
+        context['sections'] = tuple(section for sections in by_ticker.values() for section in sections)
+    
+    @staticmethod
+    def _view(agent: Agent, context: Dict[str, Any]) -> Mapping[str, Any]:
+        """Read-only view of the shared context with only the sections the agent wants."""
+        if not agent.section_keywords:
+            return MappingProxyType(dict(context))
+        by_ticker = {
+            ticker: tuple(section for section in sections if agent.wants_section(section))
+            for ticker, sections in context['sections_by_ticker'].items()
+        }
+        return MappingProxyType(dict(
+            context,
+            sections_by_ticker=MappingProxyType(by_ticker),
+            sections=tuple(section for sections in by_ticker.values() for section in sections)
+        ))
+    
+    @staticmethod
+    def _critical_path(agents: List[Agent], timings: Dict[str, float]) -> List[str]:
+        """Chain of dependent agents with the largest total latency (what bounds the query's wall time)."""
+        by_type = {agent.agent_type: agent for agent in agents}
+        paths: Dict[str, Tuple[float, List[str]]] = {}
+        
+        def longest(agent: Agent) -> Tuple[float, List[str]]:
+            if agent.name not in paths:
+                upstream = [longest(by_type[dep]) for dep in agent.depends_on if dep in by_type]
+                cost, path = max(upstream, default=(0.0, []))
+                paths[agent.name] = (cost + timings.get(agent.name, 0.0), path + [agent.name])
+            return paths[agent.name]
+        
+        return max((longest(agent) for agent in agents), default=(0.0, []))[1]
+    
     def generate_summary(self, results: Dict[str, Any]) -> str:
         """Generate a summary from agent results."""
         summary_parts = []
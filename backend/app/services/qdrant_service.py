@@ -1,20 +1,110 @@
 """
 Qdrant client service
+Also holds the collection helpers shared by the indexing scripts; settings come
+from paths.py so the scripts can import this module without API credentials.
 """
 
+from typing import List, Optional
+
 from qdrant_client import QdrantClient
-from backend.app.config import QDRANT_URL, QDRANT_API_KEY
+from qdrant_client.models import (
+    SearchParams, QuantizationSearchParams, Filter, FieldCondition, MatchValue, PayloadSchemaType,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization, BinaryQuantizationConfig
+)
+from backend.app.paths import (
+    QDRANT_MODE, QDRANT_URL, QDRANT_API_KEY, QDRANT_LOCAL_PATH, QDRANT_PREFER_GRPC,
+    VECTOR_QUANTIZATION, QUANTIZATION_RESCORE, QUANTIZATION_OVERSAMPLING, HNSW_EF_SEARCH
+)
+from backend.app.utils.sec_header import filing_stem
+
+# Keyword indexes for filtered search, per collection (only fields the points actually carry)
+REPORT_INDEX_FIELDS = ["ticker", "year", "source", "ticker_year"]
+SECTION_INDEX_FIELDS = REPORT_INDEX_FIELDS + ["section"]
 
 # Global client instance (lazy loading)
 _qdrant_client = None
 
 
 def get_qdrant_client() -> QdrantClient:
-    """Get or create Qdrant client."""
+    """
+    Get or create Qdrant client.
+    QDRANT_MODE selects a remote server or the embedded (local / in-memory) store;
+    all modes expose the same client API.
+    """
     global _qdrant_client
     if _qdrant_client is None:
-        _qdrant_client = QdrantClient(
-            url=QDRANT_URL,
-            api_key=QDRANT_API_KEY
-        )
+        if QDRANT_MODE == "memory":
+            _qdrant_client = QdrantClient(location=":memory:")
+        elif QDRANT_MODE == "local":
+            _qdrant_client = QdrantClient(path=str(QDRANT_LOCAL_PATH))
+            print(f"[INFO] Using embedded Qdrant store at {QDRANT_LOCAL_PATH}")
+        else:
+            _qdrant_client = QdrantClient(
+                url=QDRANT_URL,
+                api_key=QDRANT_API_KEY,
+                prefer_grpc=QDRANT_PREFER_GRPC
+            )
     return _qdrant_client
+
+
+def get_quantization_config():
+    """
+    Quantization for a new collection (None = float32 only).
+    Quantized vectors stay in RAM; originals are kept for rescoring.
+    """
+    if VECTOR_QUANTIZATION == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if VECTOR_QUANTIZATION == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def create_payload_indexes(client: QdrantClient, collection_name: str, fields: List[str]):
+    """Keyword indexes for the filter fields, so filtered search never full-scans."""
+    if QDRANT_MODE != "remote":
+        return  # The embedded store always scans; payload indexes are server-only
+    for field_name in fields:
+        try:
+            client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=PayloadSchemaType.KEYWORD
+            )
+        except Exception as e:
+            if "already exists" not in str(e).lower():
+                print(f"[WARNING] Failed to create index on '{field_name}': {e}")
+    print(f"[INFO] Payload indexes on '{collection_name}': {', '.join(fields)}")
+
+
+def get_search_params() -> Optional[SearchParams]:
+    """
+    Search params for query_points: HNSW beam width (hnsw_ef) and, with
+    quantized collections, search the compressed vectors for
+    limit * oversampling candidates, then rescore them with the originals.
+    Returns None for the embedded store (it always does exact search).
+    """
+    if QDRANT_MODE != "remote":
+        return None
+
+    quantization = None
+    if VECTOR_QUANTIZATION != "none":
+        quantization = QuantizationSearchParams(
+            rescore=QUANTIZATION_RESCORE,
+            oversampling=QUANTIZATION_OVERSAMPLING
+        )
+    return SearchParams(hnsw_ef=HNSW_EF_SEARCH, quantization=quantization)
+
+
+def build_filing_filter(ticker: str, year: Optional[str] = None) -> Filter:
+    """
+    Filter for one company's points, optionally a single fiscal year.
+    The year case matches the indexed ticker_year field (e.g. AAPL_2024), so
+    per-query cost stays flat as more years are added per ticker.
+    """
+    if year:
+        condition = FieldCondition(key="ticker_year", match=MatchValue(value=filing_stem(ticker, year)))
+    else:
+        condition = FieldCondition(key="ticker", match=MatchValue(value=ticker))
+    return Filter(must=[condition])
@@ -0,0 +1,195 @@
+"""
+Response cache for /analyze
+Persists generated answers in SQLite with TTL and LRU eviction.
+
+Entries are keyed on the normalized query, the resolved tickers and the
+index version stamp of those tickers. Re-indexing or re-uploading a ticker
+bumps its version (stored in the same SQLite file, so indexing scripts and
+the API server see the same stamp) and drops every entry that mentions it.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from backend.app.paths import (
+    RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES
+)
+
+# Version key used when a whole collection is rebuilt
+GLOBAL_VERSION_KEY = "*"
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups (case, whitespace, trailing punctuation)."""
+    normalized = re.sub(r'\s+', ' ', query.strip().lower())
+    return normalized.rstrip('?.! ')
+
+
+class ResponseCache:
+    """
+    SQLite-backed answer cache with TTL expiry and LRU eviction.
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: int, max_entries: int):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                tickers TEXT NOT NULL,
+                chunk_ids TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_last_accessed ON responses(last_accessed);
+            CREATE TABLE IF NOT EXISTS index_versions (
+                ticker TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            );
+        """)
+
+    def get_version_stamp(self, tickers: List[str]) -> str:
+        """Build the version stamp for a set of tickers (global version included)."""
+        keys = sorted(set(tickers)) + [GLOBAL_VERSION_KEY]
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ticker, version FROM index_versions WHERE ticker IN ({placeholders})",
+                keys
+            ).fetchall()
+        versions = dict(rows)
+        return "|".join(f"{key}:{versions.get(key, 0)}" for key in keys)
+
+    def make_key(self, query: str, tickers: List[str], version_stamp: Optional[str] = None) -> str:
+        """Cache key for a query over a set of tickers at the current index version."""
+        sorted_tickers = sorted(set(tickers))
+        if version_stamp is None:
+            version_stamp = self.get_version_stamp(sorted_tickers)
+        raw = json.dumps([normalize_query(query), sorted_tickers, version_stamp])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached response, or None on miss/expiry."""
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is None or now - row[1] > self.ttl_seconds:
+                    if row is not None:
+                        self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.misses += 1
+                    return None
+
+                self._conn.execute("UPDATE responses SET last_accessed = ? WHERE key = ?", (now, key))
+                self.hits += 1
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            print(f"[WARNING] Response cache read failed: {e}")
+            return None
+
+    def set(self, key: str, tickers: List[str], chunk_ids: List[str], response: Dict[str, Any]):
+        """Store a response and evict expired / least recently used entries."""
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        "," + ",".join(sorted(set(tickers))) + ",",
+                        json.dumps(chunk_ids),
+                        json.dumps(response),
+                        now,
+                        now
+                    )
+                )
+                self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+
+                count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if count > self.max_entries:
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY last_accessed ASC LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+        except sqlite3.Error as e:
+            print(f"[WARNING] Response cache write failed: {e}")
+
+    def bump_index_version(self, ticker: Optional[str] = None):
+        """
+        Invalidate cached answers after (re-)indexing.
+        ticker=None means the whole collection was rebuilt.
+        """
+        version_key = ticker or GLOBAL_VERSION_KEY
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO index_versions VALUES (?, 1) "
+                "ON CONFLICT(ticker) DO UPDATE SET version = version + 1",
+                (version_key,)
+            )
+            if ticker:
+                self._conn.execute("DELETE FROM responses WHERE tickers LIKE ?", (f"%,{ticker},%",))
+            else:
+                self._conn.execute("DELETE FROM responses")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+# Global instance
+_response_cache = None
+
+def get_response_cache() -> ResponseCache:
+    """Get or create response cache instance."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            RESPONSE_CACHE_PATH,
+            ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+            max_entries=RESPONSE_CACHE_MAX_ENTRIES
+        )
+    return _response_cache
+
+
+def bump_index_version(ticker: Optional[str] = None):
+    """Invalidate cached answers for a ticker (or everything if ticker is None)."""
+    get_response_cache().bump_index_version(ticker)
+
+
+def invalidate_response_cache(ticker: Optional[str] = None):
+    """bump_index_version for the indexing scripts: logs the result and warns instead of raising."""
+    try:
+        bump_index_version(ticker)
+        print(f"[INFO] Response cache invalidated for {ticker or 'all companies'}")
+    except Exception as e:
+        print(f"[WARNING] Could not invalidate response cache: {e}")
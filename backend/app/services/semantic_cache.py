@@ -0,0 +1,212 @@
+"""
+Semantic Query Cache
+Reuses Gemini answers for paraphrased queries ("Apple revenue 2024" vs
+"What was AAPL's 2024 revenue?") by nearest-neighbour search over the
+embeddings of previously answered queries, scoped to the same ticker set.
+"""
+
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from backend.app.config import (
+    SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_MAX_TOTAL_ENTRIES,
+    SEMANTIC_CACHE_AUDIT_SIZE
+)
+
+# Numbers (years, quarters, amounts) must match exactly: "revenue 2023" and
+# "revenue 2024" embed almost identically but need different answers.
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+
+class SemanticCache:
+    """
+    In-memory vector index of answered queries, one matrix per ticker set.
+    max_entries caps each ticker set; max_total_entries caps the whole cache
+    by dropping the least recently used ticker sets.
+    """
+
+    def __init__(self, threshold: float, max_entries: int, audit_size: int, max_total_entries: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_total_entries = max_total_entries
+        self._scopes = OrderedDict()  # {tickers_key: {'version': str, 'vectors': np.ndarray, 'entries': [...]}}, LRU first
+        self._total_entries = 0
+        self._lock = threading.Lock()
+
+        self.audit_log = deque(maxlen=audit_size)
+        self.hits = 0
+        self.misses = 0
+        self.guard_rejections = 0
+        self.false_hits = 0
+
+    @staticmethod
+    def _scope_key(tickers: List[str]) -> str:
+        return ",".join(sorted(set(tickers)))
+
+    def _drop_scope(self, scope_key: str):
+        self._total_entries -= len(self._scopes.pop(scope_key)['entries'])
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, query: str, query_embedding, tickers: List[str], version_stamp: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached response of the most similar past query, if it is
+        above the similarity threshold. Every hit is written to the audit log.
+        """
+        vector = self._normalize(query_embedding)
+
+        scope_key = self._scope_key(tickers)
+
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if scope is not None and scope['version'] != version_stamp:
+                self._drop_scope(scope_key)  # Re-indexed since: its answers are stale
+                scope = None
+            if scope is None or not scope['entries']:
+                self.misses += 1
+                return None
+            self._scopes.move_to_end(scope_key)
+
+            similarities = scope['vectors'] @ vector
+            candidates = np.flatnonzero(similarities >= self.threshold)
+            if not len(candidates):
+                self.misses += 1
+                return None
+
+            # Most similar entry whose numbers match ("revenue 2023" and
+            # "revenue 2024" can both clear the threshold)
+            numbers = set(NUMBER_PATTERN.findall(query))
+            matching = [i for i in candidates if scope['entries'][i]['numbers'] == numbers]
+            if not matching:
+                self.guard_rejections += 1
+                self.misses += 1
+                return None
+            best = max(matching, key=lambda i: similarities[i])
+            similarity = float(similarities[best])
+            entry = scope['entries'][best]
+
+            self.hits += 1
+            audit_id = str(uuid.uuid4())
+            self.audit_log.append({
+                'audit_id': audit_id,
+                'timestamp': time.time(),
+                'query': query,
+                'matched_query': entry['query'],
+                'entry_id': entry['entry_id'],
+                'tickers': sorted(set(tickers)),
+                'similarity': similarity,
+                'false_hit': False
+            })
+
+        print(f"[INFO] 🧠 Semantic cache hit ({similarity:.3f}): '{query}' ≈ '{entry['query']}'")
+        response = dict(entry['response'])
+        response['metadata'] = dict(response.get('metadata', {}))
+        response['metadata']['semantic_match'] = {
+            'query': entry['query'],
+            'similarity': similarity,
+            'audit_id': audit_id
+        }
+        return response
+
+    def add(self, query: str, query_embedding, tickers: List[str], version_stamp: str, response: Dict[str, Any]):
+        """Remember an answered query. Oldest entries, then least recently used ticker sets, are dropped first."""
+        vector = self._normalize(query_embedding)
+        scope_key = self._scope_key(tickers)
+
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if scope is None or scope['version'] != version_stamp:
+                # New ticker set, or it was re-indexed since: start over
+                if scope is not None:
+                    self._drop_scope(scope_key)
+                scope = {'version': version_stamp, 'vectors': np.empty((0, vector.shape[0]), dtype=np.float32), 'entries': []}
+                self._scopes[scope_key] = scope
+            self._scopes.move_to_end(scope_key)
+
+            scope['vectors'] = np.vstack([scope['vectors'], vector[np.newaxis, :]])
+            scope['entries'].append({
+                'entry_id': str(uuid.uuid4()),
+                'query': query,
+                'numbers': set(NUMBER_PATTERN.findall(query)),
+                'response': response
+            })
+            self._total_entries += 1
+
+            overflow = len(scope['entries']) - self.max_entries
+            if overflow > 0:
+                scope['vectors'] = scope['vectors'][overflow:]
+                scope['entries'] = scope['entries'][overflow:]
+                self._total_entries -= overflow
+
+            while self._total_entries > self.max_total_entries and len(self._scopes) > 1:
+                self._drop_scope(next(iter(self._scopes)))
+
+    def report_false_hit(self, audit_id: str) -> bool:
+        """
+        Mark an audited hit as wrong and evict the entry that produced it.
+        Returns False if the audit id is unknown (or already rotated out).
+        """
+        with self._lock:
+            record = next((r for r in self.audit_log if r['audit_id'] == audit_id), None)
+            if record is None:
+                return False
+
+            if not record['false_hit']:
+                record['false_hit'] = True
+                self.false_hits += 1
+
+            scope = self._scopes.get(self._scope_key(record['tickers']))
+            if scope is not None:
+                keep = [i for i, e in enumerate(scope['entries']) if e['entry_id'] != record['entry_id']]
+                self._total_entries -= len(scope['entries']) - len(keep)
+                scope['vectors'] = scope['vectors'][keep]
+                scope['entries'] = [scope['entries'][i] for i in keep]
+        return True
+
+    def get_audit_log(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent hits first."""
+        with self._lock:
+            return list(self.audit_log)[::-1][:limit]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': self._total_entries,
+                'max_total_entries': self.max_total_entries,
+                'scopes': len(self._scopes),
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'guard_rejections': self.guard_rejections,
+                'false_hits': self.false_hits,
+                'false_hit_rate': self.false_hits / self.hits if self.hits else 0.0
+            }
+
+
+# Global instance
+_semantic_cache = None
+
+def get_semantic_cache() -> SemanticCache:
+    """Get or create semantic cache instance."""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache(
+            threshold=SEMANTIC_CACHE_THRESHOLD,
+            max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+            audit_size=SEMANTIC_CACHE_AUDIT_SIZE,
+            max_total_entries=SEMANTIC_CACHE_MAX_TOTAL_ENTRIES
+        )
+    return _semantic_cache
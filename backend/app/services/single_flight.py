@@ -0,0 +1,55 @@
+"""
+Single-flight request coalescing
+Concurrent calls with the same key share one in-flight execution and all
+receive its result (or its exception).
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent async work by key (per process).
+
+    The shared work runs as its own task, so it keeps going for the other
+    waiters even if the request that started it is cancelled.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn() for key, or join the run already in flight.
+        Returns (result, shared) where shared is True for joined calls.
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+
+        if shared:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get coalescing statistics."""
+        return {
+            'in_flight': len(self._inflight),
+            'executions': self.executions,
+            'coalesced': self.coalesced
+        }
@@ -0,0 +1,360 @@
+"""
+Financial Table Store
+Markdown tables from each filing parsed into typed rows at ingest time.
+
+Every row is one cell of a period column:
+    ticker, year (filing), statement, line_item, period, value, unit
+
+Rows live in SQLite with indexes on (ticker, line_item_key, period), so
+numeric questions ("Apple's net income over the past 3 years") are a
+lookup instead of an LLM pass over the filing text. chunk_markdown_files
+fills the store; re-ingesting a filing replaces its rows.
+"""
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from backend.app.paths import TABLE_STORE_PATH
+from backend.app.utils.cell_parser import parse_cell, is_percent, detect_scale_unit, SCALE_UNITS
+
+# Statement headings, checked in order ("COMPREHENSIVE INCOME" before "INCOME")
+STATEMENT_PATTERNS = [
+    ('comprehensive_income', re.compile(r'COMPREHENSIVE\s+(INCOME|LOSS)', re.IGNORECASE)),
+    ('cash_flow', re.compile(r'CASH\s+FLOWS?\b', re.IGNORECASE)),
+    ('balance_sheet', re.compile(r'BALANCE\s+SHEETS?|FINANCIAL\s+(POSITION|CONDITION)', re.IGNORECASE)),
+    ('equity', re.compile(r"STATEMENTS?\s+OF\s+(SHARE|STOCK)HOLDERS|EQUITY\s+STATEMENTS?", re.IGNORECASE)),
+    ('income', re.compile(r'STATEMENTS?\s+OF\s+(OPERATIONS|INCOME|EARNINGS)|INCOME\s+STATEMENTS?', re.IGNORECASE)),
+]
+HEADING_MAX_CHARS = 120  # Longer lines are prose that merely mentions a statement
+CONTEXT_LINES = 6  # Non-empty lines above a table searched for its heading and unit
+
+DEFAULT_UNIT = 'units'
+
+YEAR_PATTERN = re.compile(r'\b(19\d{2}|20\d{2})\b')
+
+# Agent metric names -> (statement, line item keys in order of preference)
+METRIC_LINE_ITEMS = {
+    'revenue': ('income', ['total net sales', 'net sales', 'total revenue', 'total revenues', 'revenue',
+                           'revenues', 'net revenue', 'net revenues', 'total net revenue', 'total net revenues']),
+    'income': ('income', ['net income', 'net earnings', 'net income (loss)', 'consolidated net earnings']),
+    'profit': ('income', ['net income', 'net earnings', 'gross margin', 'gross profit']),
+    'margin': ('income', ['gross margin', 'gross profit']),
+    'operating income': ('income', ['operating income', 'income from operations', 'operating income (loss)']),
+    'cash flow': ('cash_flow', ['cash generated by operating activities', 'net cash from operations',
+                                'net cash provided by operating activities',
+                                'net cash provided by (used in) operating activities',
+                                'net cash provided by (used for) operating activities']),
+    'assets': ('balance_sheet', ['total assets']),
+    'liabilities': ('balance_sheet', ['total liabilities']),
+}
+
+
+def normalize_line_item(label: str) -> str:
+    """Lookup key for a line item: lowercase, single spaces, straight quotes, no trailing colon."""
+    key = label.replace('\u2019', "'").replace('\u00a0', ' ')
+    key = re.sub(r'\s+', ' ', key).strip().rstrip(':').strip()
+    return key.lower()
+
+
+def _split_cells(line: str) -> List[str]:
+    """
+    Cells of a markdown table row. Filings often put a negative's closing
+    paren in the next cell ("| (160,385 | ) |"); it is moved back onto the
+    number and its own cell left empty, so column positions don't shift.
+    """
+    cells = [cell.strip() for cell in line.strip().strip('|').split('|')]
+    for i in range(len(cells) - 1):
+        if cells[i + 1].startswith(')') and cells[i].startswith(('(', '$(', '$ (')) and ')' not in cells[i]:
+            cells[i], cells[i + 1] = cells[i] + cells[i + 1], ''
+    return cells
+
+
+def _classify_statement(context: List[str]) -> str:
+    for line in reversed(context):
+        if len(line) > HEADING_MAX_CHARS:
+            continue
+        for statement, pattern in STATEMENT_PATTERNS:
+            if pattern.search(line):
+                return statement
+    return 'other'
+
+
+def _detect_unit(lines: List[str]) -> str:
+    for line in lines:
+        unit = detect_scale_unit(line)
+        if unit:
+            return unit
+    return DEFAULT_UNIT
+
+
+def _header_periods(cells: List[str]) -> Optional[Dict[int, Optional[str]]]:
+    """
+    {column: period year} if this row is a period header (every cell after the
+    label names a year or is text like "Change"), else None. Columns that
+    aren't a single year map to None so their values are skipped.
+    """
+    columns = {}
+    has_year = False
+    for i, cell in enumerate(cells[1:], start=1):
+        if not cell:
+            continue
+        years = YEAR_PATTERN.findall(cell)
+        if len(years) == 1 and (cell == years[0] or parse_cell(cell) is None):
+            columns[i] = years[0]
+            has_year = True
+        elif parse_cell(cell) is None:
+            columns[i] = None
+        else:
+            return None
+    return columns if has_year else None
+
+
+def parse_table(table_lines: List[str], context: List[str]) -> List[Dict[str, Any]]:
+    """
+    Rows of one markdown table: {statement, line_item, line_item_key, period,
+    value, unit}. line_item is qualified by the label-only row above it
+    ("Net sales / Products"); line_item_key is the row's own normalized label,
+    so lookups don't depend on how a filing groups its rows. Values are
+    aligned to the nearest period header at or left of them (filings split
+    "$" and the amount into separate cells).
+    """
+    statement = _classify_statement(context)
+    table_unit = _detect_unit(context + table_lines[:6])
+
+    rows = []
+    columns: Dict[int, Optional[str]] = {}
+    group = None
+    for line in table_lines:
+        if re.match(r'^\|[\s|:-]*$', line.strip()) and '---' in line:
+            continue  # Separator row
+        cells = _split_cells(line)
+        if not any(cells):
+            continue
+
+        header = _header_periods(cells)
+        if header is not None:
+            columns = header
+            continue
+        if not columns:
+            continue
+
+        label = cells[0]
+        values = {}
+        percent = {}
+        for i, cell in enumerate(cells[1:], start=1):
+            value = parse_cell(cell)
+            if value is None:
+                continue
+            header_cols = [col for col in columns if col <= i]
+            col = max(header_cols) if header_cols else min(columns)
+            period = columns[col]
+            if period is None or period in values:
+                continue
+            values[period] = value
+            next_cell = cells[i + 1] if i + 1 < len(cells) else ''
+            percent[period] = is_percent(cell) or next_cell == '%'
+
+        if not label:
+            continue
+        if not values:
+            group = label.rstrip(':').strip()  # Label-only row heads the rows below it
+            continue
+
+        name = label.rstrip(':').strip()
+        if group and not name.lower().startswith('total'):
+            line_item = f"{group} / {name}"
+        else:
+            line_item = name
+            group = None  # A total closes its group
+
+        per_share = 'per share' in line_item.lower() and 'shares' not in line_item.lower()
+        for period, value in values.items():
+            unit = 'percent' if percent[period] else ('per_share' if per_share else table_unit)
+            rows.append({
+                'statement': statement,
+                'line_item': line_item,
+                'line_item_key': normalize_line_item(name),
+                'period': period,
+                'value': value,
+                'unit': unit
+            })
+    return rows
+
+
+def parse_markdown_tables(content: str) -> List[Dict[str, Any]]:
+    """
+    Typed rows for every table in a markdown filing. Each row also gets
+    table_index (position of its table in the filing).
+    """
+    rows = []
+    context: List[str] = []
+    table_lines: List[str] = []
+    table_index = 0
+
+    def flush():
+        nonlocal table_index
+        if table_lines:
+            for row in parse_table(table_lines, context):
+                row['table_index'] = table_index
+                rows.append(row)
+            table_index += 1
+
+    for line in content.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('|'):
+            table_lines.append(stripped)
+            continue
+        if table_lines:
+            flush()
+            table_lines = []
+            context = []
+        if stripped:
+            context.append(stripped)
+            context = context[-CONTEXT_LINES:]
+    flush()
+    return rows
+
+
+class TableStore:
+    """
+    SQLite store of parsed table rows, one replaceable set per filing.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS table_rows (
+                ticker TEXT NOT NULL,
+                year TEXT NOT NULL,
+                source TEXT NOT NULL,
+                statement TEXT NOT NULL,
+                line_item TEXT NOT NULL,
+                line_item_key TEXT NOT NULL,
+                period TEXT NOT NULL,
+                value REAL NOT NULL,
+                unit TEXT NOT NULL,
+                table_index INTEGER NOT NULL,
+                source_file TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_rows_lookup ON table_rows(ticker, line_item_key, period);
+            CREATE INDEX IF NOT EXISTS idx_rows_statement ON table_rows(ticker, statement, line_item_key);
+            CREATE INDEX IF NOT EXISTS idx_rows_item ON table_rows(line_item_key, statement);
+            CREATE INDEX IF NOT EXISTS idx_rows_filing ON table_rows(ticker, year, source);
+        """)
+
+    def replace_filing(self, ticker: str, year: str, rows: List[Dict[str, Any]],
+                       source_file: str, source: str = "original") -> int:
+        """Replace the rows of one filing (ticker, year, original/uploaded). Returns rows written."""
+        records = [
+            (ticker, year, source, row['statement'], row['line_item'], row['line_item_key'],
+             row['period'], row['value'], row['unit'], row['table_index'], source_file)
+            for row in rows
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "DELETE FROM table_rows WHERE ticker = ? AND year = ? AND source = ?",
+                    (ticker, year, source)
+                )
+                self._conn.executemany(
+                    "INSERT INTO table_rows (ticker, year, source, statement, line_item, line_item_key, "
+                    "period, value, unit, table_index, source_file) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    records
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(records)
+
+    def ingest_filing(self, ticker: str, year: str, content: str, source_file: str,
+                      source: str = "original") -> int:
+        """Parse every table in a markdown filing and replace that filing's rows."""
+        return self.replace_filing(ticker, year, parse_markdown_tables(content), source_file, source)
+
+    def lookup(self, ticker: str, line_item: str, statement: Optional[str] = None,
+               year: Optional[str] = None) -> List[Dict[str, Any]]:
+        """All rows for a line item label (case-insensitive), optionally for one statement/filing year."""
+        query = ("SELECT year, source, statement, line_item, period, value, unit, table_index "
+                 "FROM table_rows WHERE ticker = ? AND line_item_key = ?")
+        params: List[Any] = [ticker, normalize_line_item(line_item)]
+        if statement:
+            query += " AND statement = ?"
+            params.append(statement)
+        if year:
+            query += " AND year = ?"
+            params.append(year)
+        query += " ORDER BY period, year, table_index"
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def get_metric_series(self, ticker: str, metric: str) -> Dict[int, float]:
+        """
+        {period year: value in base units} for an agent metric name (see
+        METRIC_LINE_ITEMS) or a line item. Later filings win over earlier ones
+        (restatements), uploaded over original, the first table over repeats.
+        """
+        return self._metric_series(metric, ticker).get(ticker, {})
+
+    def get_metric_series_all(self, metric: str) -> Dict[str, Dict[int, float]]:
+        """get_metric_series for every ticker in one query: {ticker: {period: value}}."""
+        return self._metric_series(metric)
+
+    def _metric_series(self, metric: str, ticker: Optional[str] = None) -> Dict[str, Dict[int, float]]:
+        metric_key = normalize_line_item(metric)
+        statement, keys = METRIC_LINE_ITEMS.get(metric_key, (None, [metric_key]))
+        priority = {key: i for i, key in enumerate(keys)}
+
+        query = (f"SELECT ticker, line_item_key, period, value, unit FROM table_rows "
+                 f"WHERE line_item_key IN ({', '.join(['?'] * len(keys))})")
+        params: List[Any] = list(keys)
+        if ticker:
+            query += " AND ticker = ?"
+            params.append(ticker)
+        if statement:
+            query += " AND statement = ?"
+            params.append(statement)
+        query += " ORDER BY year, source = 'uploaded', table_index DESC"
+        with self._lock:
+            results = self._conn.execute(query, params).fetchall()
+
+        # Per ticker, only the most preferred line item that has data
+        best: Dict[str, int] = {}
+        for row_ticker, key, _, _, _ in results:
+            best[row_ticker] = min(best.get(row_ticker, len(keys)), priority[key])
+
+        series: Dict[str, Dict[int, float]] = {}
+        for row_ticker, key, period, value, unit in results:
+            if priority[key] == best[row_ticker]:
+                series.setdefault(row_ticker, {})[int(period)] = value * SCALE_UNITS.get(unit, 1.0)
+        return {t: dict(sorted(values.items())) for t, values in series.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows, filings = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT ticker || '_' || year || '_' || source) FROM table_rows"
+            ).fetchone()
+        return {'rows': rows, 'filings': filings, 'path': str(self.db_path)}
+
+
+# Global instance
+_table_store = None
+
+def get_table_store() -> TableStore:
+    """Get or create table store instance."""
+    global _table_store
+    if _table_store is None:
+        _table_store = TableStore(TABLE_STORE_PATH)
+    return _table_store
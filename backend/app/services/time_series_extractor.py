@@ -1,12 +1,71 @@
 """
 Time-Series Data Extractor
 Extracts time-series data from financial tables and stores in structured format.
+
+Data is held in a panel: a DataFrame indexed by (ticker, metric) with one
+float column per year (NaN where a filing has no value). Growth, CAGR,
+trend and ranking run as NumPy operations over every ticker at once, so a
+screen across all companies is a single vectorized pass.
 """
 
 import re
-from typing import List, Dict, Any, Optional
-from datetime import datetime
 import json
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.app.paths import TABLE_STORE_PATH, TIME_SERIES_PANEL_PATH
+from backend.app.utils.cell_parser import parse_scaled, detect_scale, detect_scale_unit
+
+TREND_THRESHOLD_PCT = 5.0  # Average yearly change (as % of the first value) counted as a trend
+
+
+def _empty_panel() -> pd.DataFrame:
+    index = pd.MultiIndex.from_arrays([[], []], names=['ticker', 'metric'])
+    return pd.DataFrame(index=index, columns=pd.Index([], dtype='int64', name='year'), dtype='float64')
+
+
+def _endpoints(values: np.ndarray):
+    """First/last non-NaN value per row, their column positions and the count of values."""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1)
+    first_pos = valid.argmax(axis=1)
+    last_pos = values.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)
+    rows = np.arange(values.shape[0])
+    return values[rows, first_pos], values[rows, last_pos], first_pos, last_pos, count
+
+
+def _classify_trends(values: np.ndarray) -> np.ndarray:
+    """
+    Trend label per row: average yearly change relative to the first value,
+    over the years that have data ("insufficient_data" with fewer than two).
+    """
+    if values.shape[1] == 0:
+        return np.full(values.shape[0], 'insufficient_data', dtype=object)
+    first, last, _, _, count = _endpoints(values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_change = (last - first) / (count - 1)  # Consecutive changes telescope
+        pct_change = np.where(first != 0, avg_change / first * 100, 0.0)
+    return np.select(
+        [count < 2, pct_change > TREND_THRESHOLD_PCT, pct_change < -TREND_THRESHOLD_PCT],
+        ['insufficient_data', 'increasing', 'decreasing'],
+        default='stable'
+    ).astype(object)
+
+
+def _cagr(values: np.ndarray, years: np.ndarray) -> np.ndarray:
+    """Compound annual growth rate (%) between each row's first and last value; NaN if undefined."""
+    if values.shape[1] == 0:
+        return np.full(values.shape[0], np.nan)
+    first, last, first_pos, last_pos, count = _endpoints(values)
+    span = (years[last_pos] - years[first_pos]).astype(float)
+    ok = (count >= 2) & (first > 0) & (last > 0) & (span > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = (np.power(last / first, 1.0 / span) - 1.0) * 100
+    return np.where(ok, rate, np.nan)
+
 
 class TimeSeriesExtractor:
     """
@@ -14,7 +73,7 @@ class TimeSeriesExtractor:
     """
     
     def __init__(self):
-        self.time_series_data = {}  # {ticker: {metric: {year: value}}}
+        self.panel = _empty_panel()  # (ticker, metric) x year
     
     def extract_from_table(self, table_text: str, ticker: str) -> Dict[str, Any]:
         """
@@ -26,8 +85,12 @@ class TimeSeriesExtractor:
         | 2022 | $100B   | $20B       |
         | 2023 | $120B   | $25B       |
         | 2024 | $150B   | $30B       |
+        
+        A scale in a column header or the table ("(in millions)") applies to
+        values without their own suffix.
         """
         lines = table_text.split('\n')
+        table_scale = detect_scale(table_text)
         
         # Find header row
         header_row = None
@@ -79,7 +142,8 @@ class TimeSeriesExtractor:
                     continue
                 
                 value_str = cells[i]
-                value = self._parse_value(value_str)
+                scale = detect_scale(header) if detect_scale_unit(header) else table_scale
+                value = self._parse_value(value_str, scale)
                 
                 if value is not None:
                     metric_name = self._normalize_metric_name(header)
@@ -87,67 +151,66 @@ class TimeSeriesExtractor:
                         extracted_data[metric_name] = {}
                     extracted_data[metric_name][year] = value
         
-        # Store in time-series data
-        if ticker not in self.time_series_data:
-            self.time_series_data[ticker] = {}
-        
-        for metric, values in extracted_data.items():
-            if metric not in self.time_series_data[ticker]:
-                self.time_series_data[ticker][metric] = {}
-            self.time_series_data[ticker][metric].update(values)
+        # Store in the panel
+        self.update({ticker: extracted_data})
         
         return extracted_data
     
-    def _parse_value(self, value_str: str) -> Optional[float]:
-        """Parse a value string to float."""
-        # Remove currency symbols, commas, etc.
-        cleaned = re.sub(r'[$,()]', '', value_str)
-        
-        # Handle negative values in parentheses
-        if '(' in value_str and ')' in value_str:
-            cleaned = '-' + cleaned.replace('(', '').replace(')', '')
-        
-        # Handle multipliers (B=billion, M=million, K=thousand)
-        multiplier = 1
-        if 'B' in value_str.upper():
-            multiplier = 1_000_000_000
-        elif 'M' in value_str.upper():
-            multiplier = 1_000_000
-        elif 'K' in value_str.upper():
-            multiplier = 1_000
-        
-        # Remove letters
-        cleaned = re.sub(r'[A-Za-z]', '', cleaned)
-        
-        try:
-            value = float(cleaned) * multiplier
-            return value
-        except ValueError:
-            return None
+    def update(self, data: Dict[str, Dict[str, Dict[int, float]]]):
+        """Merge {ticker: {metric: {year: value}}} into the panel; new values win."""
+        records = {
+            (ticker, metric): values
+            for ticker, metrics in data.items()
+            for metric, values in metrics.items()
+            if values
+        }
+        if not records:
+            return
+        new = pd.DataFrame.from_dict(records, orient='index', dtype='float64')
+        new.index = pd.MultiIndex.from_tuples(new.index, names=['ticker', 'metric'])
+        new.columns = new.columns.astype('int64')
+        panel = new.combine_first(self.panel) if len(self.panel) else new
+        self.panel = panel.reindex(columns=sorted(panel.columns)).rename_axis(columns='year')
+    
+    def _parse_value(self, value_str: str, scale: float = 1.0) -> Optional[float]:
+        """Parse a value string to float (see utils.cell_parser)."""
+        return parse_scaled(value_str, scale)
     
     def _normalize_metric_name(self, name: str) -> str:
         """Normalize metric name."""
         name = name.strip()
         # Remove common prefixes/suffixes
-        name = re.sub(r'^\(in\s+millions?\)', '', name, flags=re.IGNORECASE)
+        name = re.sub(r'\(in\s+(thousands|millions|billions)\)', '', name, flags=re.IGNORECASE)
         name = re.sub(r'\(USD\)', '', name, flags=re.IGNORECASE)
         return name.strip()
     
     def get_time_series(self, ticker: str, metric: str, years: Optional[List[int]] = None) -> Dict[int, float]:
-        """Get time-series data for a ticker and metric."""
-        if ticker not in self.time_series_data:
-            return {}
-        
-        if metric not in self.time_series_data[ticker]:
-            return {}
-        
-        data = self.time_series_data[ticker][metric]
+        """
+        Get time-series data for a ticker and metric.
+        Tables passed to extract_from_table take precedence; otherwise the
+        rows parsed from the filings at ingest time (table store) are used.
+        """
+        data = {}
+        if (ticker, metric) in self.panel.index:
+            row = self.panel.loc[(ticker, metric)].dropna()
+            data = {int(year): float(value) for year, value in row.items()}
+        if not data:
+            data = self._load_from_table_store(ticker, metric)
         
         if years:
             return {year: data[year] for year in years if year in data}
         
         return data
     
+    def _load_from_table_store(self, ticker: str, metric: str) -> Dict[int, float]:
+        """Series for a metric from the ingest-time table store ({} if unavailable)."""
+        try:
+            from backend.app.services.table_store import get_table_store
+            return get_table_store().get_metric_series(ticker, metric)
+        except Exception as e:
+            print(f"[WARNING] Table store lookup failed for {ticker}/{metric}: {e}")
+            return {}
+    
     def calculate_growth_rate(self, ticker: str, metric: str, year1: int, year2: int) -> Optional[float]:
         """Calculate growth rate between two years."""
         data = self.get_time_series(ticker, metric)
@@ -167,58 +230,208 @@ class TimeSeriesExtractor:
     def get_trend(self, ticker: str, metric: str, years: Optional[List[int]] = None) -> str:
         """Determine trend: increasing, decreasing, or stable."""
         data = self.get_time_series(ticker, metric, years)
-        
-        if len(data) < 2:
-            return "insufficient_data"
-        
-        sorted_years = sorted(data.keys())
-        values = [data[year] for year in sorted_years]
-        
-        # Calculate average change
-        changes = [values[i+1] - values[i] for i in range(len(values)-1)]
-        avg_change = sum(changes) / len(changes)
-        
-        # Calculate percentage change
-        if values[0] != 0:
-            pct_change = (avg_change / values[0]) * 100
-        else:
-            pct_change = 0
-        
-        if pct_change > 5:
-            return "increasing"
-        elif pct_change < -5:
-            return "decreasing"
-        else:
-            return "stable"
+        values = np.array([[data[year] for year in sorted(data)]], dtype='float64')
+        return str(_classify_trends(values)[0])
     
     def compare_companies(self, tickers: List[str], metric: str, year: int) -> Dict[str, float]:
         """Compare multiple companies on a metric for a given year."""
+        frame = self.metric_frame(metric)
         comparison = {}
+        if year in frame.columns:
+            values = frame[year].reindex(tickers).dropna()
+            comparison = {ticker: float(value) for ticker, value in values.items()}
         
+        # Tickers outside the panel (e.g. uploaded since it was built)
         for ticker in tickers:
-            data = self.get_time_series(ticker, metric, [year])
-            if year in data:
-                comparison[ticker] = data[year]
+            if ticker not in comparison:
+                data = self.get_time_series(ticker, metric, [year])
+                if year in data:
+                    comparison[ticker] = data[year]
         
         return comparison
     
+    # Batch operations: one vectorized pass over every ticker in the panel
+    
+    def metric_frame(self, metric: str, years: Optional[List[int]] = None) -> pd.DataFrame:
+        """ticker x year values for one metric."""
+        if metric not in self.panel.index.get_level_values('metric'):
+            return pd.DataFrame(columns=pd.Index(years or [], dtype='int64', name='year'), dtype='float64')
+        frame = self.panel.xs(metric, level='metric')
+        if years:
+            frame = frame.reindex(columns=sorted(years))
+        return frame.dropna(how='all')
+    
+    def yoy_growth(self, metric: str) -> pd.DataFrame:
+        """Year-over-year growth (%) per ticker and year; NaN where the prior year is missing or zero."""
+        frame = self.metric_frame(metric)
+        if frame.empty:
+            return frame
+        frame = frame.reindex(columns=range(frame.columns.min(), frame.columns.max() + 1))
+        values = frame.to_numpy()
+        previous = values[:, :-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = np.where(previous != 0, (values[:, 1:] - previous) / np.abs(previous) * 100, np.nan)
+        return pd.DataFrame(growth, index=frame.index, columns=frame.columns[1:])
+    
+    def cagr(self, metric: str, years: Optional[List[int]] = None) -> pd.Series:
+        """Compound annual growth rate (%) per ticker over its first and last available year."""
+        frame = self.metric_frame(metric, years)
+        return pd.Series(_cagr(frame.to_numpy(), frame.columns.to_numpy()), index=frame.index, name='cagr')
+    
+    def classify_trends(self, metric: str, years: Optional[List[int]] = None) -> pd.Series:
+        """get_trend for every ticker at once."""
+        frame = self.metric_frame(metric, years)
+        return pd.Series(_classify_trends(frame.to_numpy()), index=frame.index, name='trend')
+    
+    def summarize(self, metric: str, year: Optional[int] = None) -> pd.DataFrame:
+        """
+        Per ticker: value and YoY growth in `year` (default: each ticker's
+        latest year, since fiscal years end at different times), CAGR and
+        trend over all years.
+        """
+        frame = self.metric_frame(metric)
+        if frame.empty:
+            return pd.DataFrame(columns=['year', 'value', 'yoy', 'cagr', 'trend'])
+        frame = frame.reindex(columns=range(frame.columns.min(), frame.columns.max() + 1))
+        values = frame.to_numpy()
+        years = frame.columns.to_numpy()
+        growth = np.hstack([np.full((len(values), 1), np.nan), self.yoy_growth(metric).to_numpy()])
+        
+        rows = np.arange(len(values))
+        if year is None:
+            _, _, _, pos, _ = _endpoints(values)
+            value, yoy = values[rows, pos], growth[rows, pos]
+        elif year in frame.columns:
+            pos = frame.columns.get_loc(year)
+            value, yoy = values[:, pos], growth[:, pos]
+        else:
+            value = yoy = np.full(len(values), np.nan)
+        
+        return pd.DataFrame({
+            'year': years[pos] if year is None else year,
+            'value': value,
+            'yoy': yoy,
+            'cagr': _cagr(values, years),
+            'trend': _classify_trends(values),
+        }, index=frame.index)
+    
+    def rank_companies(self, metric: str, by: str = 'value', year: Optional[int] = None,
+                       ascending: bool = False, top_n: Optional[int] = None) -> pd.DataFrame:
+        """Cross-sectional ranking on value, yoy or cagr (companies without that figure are left out)."""
+        summary = self.summarize(metric, year).dropna(subset=[by])
+        ranked = summary.sort_values(by, ascending=ascending)
+        ranked['rank'] = np.arange(1, len(ranked) + 1)
+        return ranked.head(top_n) if top_n else ranked
+    
+    def screen(self, metric: str, year: Optional[int] = None, min_value: Optional[float] = None,
+               min_yoy: Optional[float] = None, min_cagr: Optional[float] = None,
+               trend: Optional[str] = None) -> pd.DataFrame:
+        """Companies passing every given threshold, sorted by CAGR."""
+        summary = self.summarize(metric, year)
+        mask = np.ones(len(summary), dtype=bool)
+        if min_value is not None:
+            mask &= (summary['value'] >= min_value).to_numpy()
+        if min_yoy is not None:
+            mask &= (summary['yoy'] >= min_yoy).to_numpy()
+        if min_cagr is not None:
+            mask &= (summary['cagr'] >= min_cagr).to_numpy()
+        if trend is not None:
+            mask &= (summary['trend'] == trend).to_numpy()
+        return summary[mask].sort_values('cagr', ascending=False)
+    
+    # Persistence
+    
+    def load_from_table_store(self, metrics: Optional[List[str]] = None):
+        """Fill the panel with the agent metrics (or `metrics`) for every ticker in the table store."""
+        from backend.app.services.table_store import get_table_store, METRIC_LINE_ITEMS
+        table_store = get_table_store()
+        data: Dict[str, Dict[str, Dict[int, float]]] = {}
+        for metric in metrics or list(METRIC_LINE_ITEMS):
+            for ticker, series in table_store.get_metric_series_all(metric).items():
+                data.setdefault(ticker, {})[metric] = series
+        self.update(data)
+    
+    def reload_ticker(self, ticker: str, metrics: Optional[List[str]] = None):
+        """Replace a ticker's series with its current table store rows (after its filing was re-ingested)."""
+        from backend.app.services.table_store import get_table_store, METRIC_LINE_ITEMS
+        table_store = get_table_store()
+        if len(self.panel):
+            self.panel = self.panel.drop(index=ticker, level='ticker', errors='ignore')
+        self.update({ticker: {
+            metric: table_store.get_metric_series(ticker, metric) for metric in metrics or list(METRIC_LINE_ITEMS)
+        }})
+    
+    def save(self, filepath: Path):
+        """Write the panel as a NumPy archive (values matrix plus index arrays, no pickle)."""
+        filepath = Path(filepath)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, 'wb') as f:  # np.savez would append .npz to other suffixes
+            np.savez(
+                f,
+                tickers=self.panel.index.get_level_values('ticker').to_numpy(dtype=str),
+                metrics=self.panel.index.get_level_values('metric').to_numpy(dtype=str),
+                years=self.panel.columns.to_numpy(dtype='int64'),
+                values=self.panel.to_numpy(dtype='float64')
+            )
+    
+    def load(self, filepath: Path):
+        """Load a panel written by save()."""
+        with np.load(filepath, allow_pickle=False) as archive:
+            index = pd.MultiIndex.from_arrays([archive['tickers'], archive['metrics']], names=['ticker', 'metric'])
+            columns = pd.Index(archive['years'], dtype='int64', name='year')
+            self.panel = pd.DataFrame(archive['values'], index=index, columns=columns)
+    
     def export_to_json(self, filepath: str):
-        """Export time-series data to JSON."""
+        """Export time-series data to JSON ({ticker: {metric: {year: value}}})."""
+        data: Dict[str, Dict[str, Dict[int, float]]] = {}
+        for (ticker, metric), row in self.panel.iterrows():
+            data.setdefault(ticker, {})[metric] = {int(year): float(value) for year, value in row.dropna().items()}
         with open(filepath, 'w') as f:
-            json.dump(self.time_series_data, f, indent=2)
+            json.dump(data, f, indent=2)
     
     def load_from_json(self, filepath: str):
-        """Load time-series data from JSON."""
+        """Load time-series data from JSON (year keys come back as strings and are converted)."""
         with open(filepath, 'r') as f:
-            self.time_series_data = json.load(f)
+            data = json.load(f)
+        self.panel = _empty_panel()
+        self.update({
+            ticker: {metric: {int(year): value for year, value in values.items()} for metric, values in metrics.items()}
+            for ticker, metrics in data.items()
+        })
 
 
 # Global instance
 _time_series_extractor = None
 
+def _table_store_mtime() -> float:
+    paths = [TABLE_STORE_PATH, Path(f"{TABLE_STORE_PATH}-wal")]
+    return max((path.stat().st_mtime for path in paths if path.exists()), default=0.0)
+
 def get_time_series_extractor() -> TimeSeriesExtractor:
-    """Get or create time-series extractor instance."""
+    """
+    Get or create time-series extractor instance.
+    The panel is loaded from TIME_SERIES_PANEL_PATH, or rebuilt from the
+    table store (and saved) when the store has changed since.
+    """
     global _time_series_extractor
     if _time_series_extractor is None:
-        _time_series_extractor = TimeSeriesExtractor()
+        extractor = TimeSeriesExtractor()
+        try:
+            if TIME_SERIES_PANEL_PATH.exists() and TIME_SERIES_PANEL_PATH.stat().st_mtime >= _table_store_mtime():
+                extractor.load(TIME_SERIES_PANEL_PATH)
+            elif TABLE_STORE_PATH.exists():
+                extractor.load_from_table_store()
+                extractor.save(TIME_SERIES_PANEL_PATH)
+            print(f"[INFO] Time-series panel: {len(extractor.panel)} series")
+        except Exception as e:
+            print(f"[WARNING] Could not load time-series panel: {e}")
+        _time_series_extractor = extractor
     return _time_series_extractor
+
+
+def reload_time_series(ticker: str):
+    """Bring a ticker's panel rows up to date after an ingest (and save the panel)."""
+    if _time_series_extractor is None:
+        return  # Not loaded yet: the first get_time_series_extractor() sees the newer table store
+    _time_series_extractor.reload_ticker(ticker)
+    _time_series_extractor.save(TIME_SERIES_PANEL_PATH)
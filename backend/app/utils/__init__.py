@@ -3,12 +3,36 @@ Utility functions for the Financial Analyst Agent
 """
 
 from .html_extractor import extract_10k_html_from_txt
-from .markdown_converter import convert_html_to_markdown
-from .ticker_extractor import extract_ticker_from_content, extract_tickers_simple
+from .markdown_converter import (
+    convert_html_to_markdown, convert_html_to_markdown_with_stats, convert_html_file_to_markdown
+)
+from .ticker_extractor import extract_ticker_from_content
+from .sec_header import parse_sec_header, extract_fiscal_year, filing_stem, parse_filing_name
+from .cell_parser import parse_cell, parse_scaled, parse_column, detect_scale, is_percent
+from .query_parser import ParsedQuery, parse_query
+from .ticker_resolver import TickerResolver, get_ticker_resolver
+from .cik_map import get_cik_map, ticker_for_cik, ticker_from_sec_header
 
 __all__ = [
     "extract_10k_html_from_txt",
     "convert_html_to_markdown",
+    "convert_html_to_markdown_with_stats",
+    "convert_html_file_to_markdown",
     "extract_ticker_from_content",
-    "extract_tickers_simple",
+    "parse_sec_header",
+    "extract_fiscal_year",
+    "filing_stem",
+    "parse_filing_name",
+    "parse_cell",
+    "parse_scaled",
+    "parse_column",
+    "detect_scale",
+    "is_percent",
+    "ParsedQuery",
+    "parse_query",
+    "TickerResolver",
+    "get_ticker_resolver",
+    "get_cik_map",
+    "ticker_for_cik",
+    "ticker_from_sec_header",
 ]
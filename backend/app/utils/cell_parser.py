@@ -0,0 +1,97 @@
+"""
+Financial table cell parsing utilities
+Turns cells like "$ 1,234", "(321)", "—", "15%" or "$1.2B" into floats.
+
+Patterns are compiled once and parsing is LRU-cached: filings repeat
+the same cell strings ("—", "$", common amounts) across thousands of rows.
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+CELL_CACHE_SIZE = 65536
+
+# Optional sign/currency, an opening paren, the number, optional scale suffix and %.
+# The closing paren is required exactly when the opening one matched ("(5" and "5)" are not numbers)
+CELL_PATTERN = re.compile(
+    r'^(?P<neg>[\-−])?\s*\$?\s*(?P<open>\()?\s*\$?\s*(?P<neg2>[\-−])?\s*'
+    r'(?P<num>\d[\d,]*(?:\.\d+)?|\.\d+)\s*'
+    r'(?P<suffix>billions?|bn|b|millions?|mm|m|thousands?|k)?\s*'
+    r'(?P<pct>%)?\s*(?(open)\))\s*(?P<pct2>%)?$',
+    re.IGNORECASE
+)
+# A lone dash means nil in SEC tables
+NIL_PATTERN = re.compile(r'^[—–\-−]+$')
+SCALE_PATTERN = re.compile(r'\bin\s+(thousands|millions|billions)\b', re.IGNORECASE)
+
+SUFFIX_MULTIPLIERS = {
+    'b': 1e9, 'bn': 1e9, 'billion': 1e9, 'billions': 1e9,
+    'm': 1e6, 'mm': 1e6, 'million': 1e6, 'millions': 1e6,
+    'k': 1e3, 'thousand': 1e3, 'thousands': 1e3,
+}
+SCALE_UNITS = {'thousands': 1e3, 'millions': 1e6, 'billions': 1e9}
+
+
+def detect_scale_unit(text: str) -> Optional[str]:
+    """Scale stated in a table caption or header ("(In millions, except ...)" -> "millions")."""
+    match = SCALE_PATTERN.search(text)
+    return match.group(1).lower() if match else None
+
+
+def detect_scale(text: str) -> float:
+    """Multiplier stated in a caption or header: "(in millions)" -> 1e6, 1.0 if none."""
+    unit = detect_scale_unit(text)
+    return SCALE_UNITS[unit] if unit else 1.0
+
+
+@lru_cache(maxsize=CELL_CACHE_SIZE)
+def _parse(cell: str) -> Tuple[Optional[float], bool]:
+    """(value, scalable) for a cell; value is None if it isn't a number. Percentages
+    and amounts with their own suffix are not scalable by a caption unit."""
+    cell = cell.strip()
+    if not cell:
+        return None, False
+    if NIL_PATTERN.match(cell):
+        return 0.0, True
+    match = CELL_PATTERN.match(cell)
+    if not match:
+        return None, False
+    value = float(match.group('num').replace(',', ''))
+    suffix = match.group('suffix')
+    percent = bool(match.group('pct') or match.group('pct2'))
+    if suffix:
+        if percent:
+            return None, False  # "5M%" isn't a value
+        value *= SUFFIX_MULTIPLIERS[suffix.lower()]
+    if match.group('neg') or match.group('open') or match.group('neg2'):
+        value = -value
+    return value, not (suffix or percent)
+
+
+def parse_cell(cell: str) -> Optional[float]:
+    """
+    Numeric value of a cell, or None if it isn't a number. Handles "$",
+    thousands separators, "(321)" and "-321" negatives, a lone dash (0.0),
+    trailing "%" (returned as the percentage, e.g. 15.0) and scale suffixes
+    ("$1.2B", "350M", "4 thousand").
+    """
+    return _parse(cell)[0]
+
+
+def parse_scaled(cell: str, scale: float = 1.0) -> Optional[float]:
+    """parse_cell times a caption scale (see detect_scale); cells with their own suffix keep it."""
+    value, scalable = _parse(cell)
+    return value * scale if scalable else value
+
+
+def is_percent(cell: str) -> bool:
+    """True for percentage cells ("15%", "(2.5)%")."""
+    return cell.rstrip().endswith('%') or cell.rstrip().endswith('%)')
+
+
+def parse_column(cells: Iterable[str], scale: float = 1.0) -> np.ndarray:
+    """parse_scaled over a column of cells, as a float64 array (NaN where a cell isn't numeric)."""
+    return np.array([parse_scaled(cell, scale) for cell in cells], dtype=np.float64)  # None -> NaN
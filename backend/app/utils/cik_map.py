@@ -0,0 +1,71 @@
+"""
+CIK -> ticker table for assigning uploads and bulk filings to the right company.
+
+The table is a JSON file (backend/app/data/cik_tickers.json by default,
+CIK_TICKERS_PATH to override) built by backend/scripts/build_cik_map.py.
+SEC's own company_tickers.json ({"0": {"cik_str": 320193, "ticker": "AAPL", ...}})
+can be dropped in instead; both layouts are accepted.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+from .sec_header import parse_sec_header
+
+
+def normalize_cik(cik) -> Optional[str]:
+    """10-digit, zero-padded CIK ("320193" / 320193 -> "0000320193")."""
+    digits = str(cik).strip() if cik is not None else ''
+    return digits.zfill(10) if digits.isdigit() else None
+
+
+def load_cik_map(path: Path) -> Dict[str, str]:
+    """Read a CIK table: {cik: ticker} or SEC company_tickers.json rows. Missing file -> {}."""
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    cik_map = {}
+    for key, value in data.items():
+        if isinstance(value, dict):  # SEC layout
+            cik, ticker = value.get('cik_str'), value.get('ticker')
+        else:
+            cik, ticker = key, value
+        cik = normalize_cik(cik)
+        if cik and ticker:
+            cik_map.setdefault(cik, str(ticker).upper().replace('.', '-'))  # First listed class wins
+    return cik_map
+
+
+def save_cik_map(path: Path, cik_map: Dict[str, str]):
+    """Write the table as sorted {cik: ticker} JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(cik_map.items())), f, indent=2)
+        f.write('\n')
+
+
+# Global instance
+_cik_map = None
+
+def get_cik_map() -> Dict[str, str]:
+    """Get or load the CIK -> ticker table."""
+    global _cik_map
+    if _cik_map is None:
+        from backend.app.config import CIK_TICKERS_PATH
+        _cik_map = load_cik_map(CIK_TICKERS_PATH)
+        print(f"[INFO] CIK table: {len(_cik_map)} companies")
+    return _cik_map
+
+
+def ticker_for_cik(cik) -> Optional[str]:
+    """Ticker of a CIK, or None if the company is not in the table."""
+    cik = normalize_cik(cik)
+    return get_cik_map().get(cik) if cik else None
+
+
+def ticker_from_sec_header(content: str) -> Optional[str]:
+    """Ticker of a full-submission.txt from the CIK in its SEC header (the filing body is not scanned)."""
+    return ticker_for_cik(parse_sec_header(content).get('cik'))
@@ -1,30 +1,332 @@
 """
 Markdown conversion utilities
+
+10-K HTML is converted in one streaming pass: lxml's HTML parser runs in
+target (SAX-style) mode, so tags and text arrive as events and Markdown is
+written as they come, without building a document tree. Tables are emitted
+as pipe tables directly (colspans expanded the way markdownify does, so the
+table store parses both), and hidden inline XBRL (ix:header, display:none
+blocks) is dropped while parsing. Without lxml, markdownify is used.
 """
 
 import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
 import markdownify
 
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+    print("[WARNING] lxml not installed. HTML to Markdown conversion will use markdownify (slower).")
+    print("   Install with: pip install lxml")
+
+CONVERT_CHUNK_CHARS = 1 << 20  # Fed to the parser a chunk at a time
+
+BLOCK_TAGS = frozenset({
+    'html', 'body', 'div', 'p', 'section', 'article', 'main', 'header', 'footer', 'nav', 'aside',
+    'center', 'blockquote', 'pre', 'address', 'form', 'figure', 'figcaption', 'hr',
+    'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+})
+HEADING_LEVELS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+EMPHASIS_MARKERS = {'b': '**', 'strong': '**', 'i': '*', 'em': '*'}
+# Never rendered: document head and the inline XBRL header (contexts, units, hidden facts)
+SKIP_TAGS = frozenset({'head', 'title', 'script', 'style', 'noscript', 'ix:header'})
+CELL_TAGS = ('td', 'th')
+MAX_SPAN = 100
+LINE_BREAK = '\x00'  # <br> marker; real newlines in the source are just whitespace
+WHITESPACE = re.compile(r'\s+')
+
+
+def _hidden(attrib) -> bool:
+    style = attrib.get('style')
+    return bool(style) and 'display:none' in style.replace(' ', '').lower()
+
+
+def _span(attrib, name: str) -> int:
+    try:
+        return min(max(int(attrib.get(name, 1)), 1), MAX_SPAN)
+    except ValueError:
+        return 1
+
+
+def _inline_text(pieces: List[str]) -> str:
+    """Collapse whitespace within each line of a run of text."""
+    lines = (WHITESPACE.sub(' ', line).strip() for line in ''.join(pieces).split(LINE_BREAK))
+    return '\n'.join(line for line in lines if line)
+
+
+class _MarkdownTarget:
+    """lxml parser target: turns start/end/data events into Markdown blocks."""
+
+    def __init__(self):
+        self.blocks: List[str] = []
+        self.inline: List[str] = []
+        self.skip_depth = 0
+        self.heading: Optional[int] = None
+        self.bullet = False
+        self.emphasis: List[Tuple[str, int, int]] = []  # (marker, start in inline, block count)
+        # Tables (nested tables are flattened into the enclosing cell)
+        self.table_depth = 0
+        self.rows: List[Tuple[List[Tuple[str, int]], bool]] = []  # [(text, colspan)], is header
+        self.row: Optional[List[Tuple[str, int, int]]] = None  # (text, colspan, rowspan)
+        self.row_is_header = False
+        self.cell: Optional[List[str]] = None
+        self.cell_spans = (1, 1)
+        self.row_carry: Dict[int, Tuple[int, int]] = {}  # column -> (rows left, colspan) of rowspan cells
+        self.tables = 0
+
+    # Parser events
+
+    def start(self, tag, attrib):
+        if self.skip_depth:
+            self.skip_depth += 1
+            return
+        if tag in SKIP_TAGS or _hidden(attrib):
+            self.skip_depth = 1
+            return
+
+        if self.table_depth:
+            if tag == 'table':
+                self.table_depth += 1
+            elif self.table_depth == 1 and tag == 'tr':
+                self._end_row()
+                self.row, self.row_is_header = [], True
+            elif self.table_depth == 1 and tag in CELL_TAGS:
+                self._end_cell()
+                if self.row is None:
+                    self.row, self.row_is_header = [], True
+                self.cell, self.cell_spans = [], (_span(attrib, 'colspan'), _span(attrib, 'rowspan'))
+                self.row_is_header = self.row_is_header and tag == 'th'
+            if self.cell is not None and (tag in BLOCK_TAGS or tag in ('br', 'table', 'tr') or tag in CELL_TAGS):
+                self.cell.append(' ')
+            return
+
+        if tag == 'table':
+            self._flush()
+            self.table_depth = 1
+            self.rows, self.row, self.cell, self.row_carry = [], None, None, {}
+        elif tag == 'br':
+            self.inline.append(LINE_BREAK)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag in HEADING_LEVELS:
+                self.heading = HEADING_LEVELS[tag]
+            elif tag == 'li':
+                self.bullet = True
+        elif tag in EMPHASIS_MARKERS:
+            self.emphasis.append((EMPHASIS_MARKERS[tag], len(self.inline), len(self.blocks)))
+
+    def end(self, tag):
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+
+        if self.table_depth:
+            if tag == 'table':
+                self.table_depth -= 1
+                if not self.table_depth:
+                    self._end_table()
+                elif self.cell is not None:
+                    self.cell.append(' ')
+            elif self.table_depth == 1 and tag in CELL_TAGS:
+                self._end_cell()
+            elif self.table_depth == 1 and tag == 'tr':
+                self._end_row()
+            return
+
+        if tag in BLOCK_TAGS:
+            self._flush()
+            self.heading, self.bullet = None, False
+        elif tag in EMPHASIS_MARKERS and self.emphasis:
+            marker, start, block_count = self.emphasis.pop()
+            if block_count == len(self.blocks) and start < len(self.inline):
+                text = ''.join(self.inline[start:])
+                stripped = text.strip()
+                if stripped:
+                    lead = text[:len(text) - len(text.lstrip())]
+                    trail = text[len(text.rstrip()):]
+                    self.inline[start:] = [f"{lead}{marker}{stripped}{marker}{trail}"]
+
+    def data(self, text):
+        if self.skip_depth:
+            return
+        text = text.replace('_', r'\_').replace('*', r'\*')  # As markdownify escapes them
+        if self.table_depth:
+            if self.cell is not None:
+                self.cell.append(text)
+        else:
+            self.inline.append(text)
+
+    def close(self) -> str:
+        if self.table_depth:
+            self.table_depth = 0
+            self._end_table()
+        self._flush()
+        return '\n\n'.join(self.blocks)
+
+    # Output
+
+    def _flush(self):
+        """Emit the pending inline text as a paragraph (heading / list item)."""
+        if not self.inline:
+            return
+        text = _inline_text(self.inline)
+        self.inline = []
+        if not text:
+            return
+        if self.heading:
+            text = '#' * self.heading + ' ' + text.replace('\n', ' ')
+        elif self.bullet:
+            text = '* ' + text
+        self.blocks.append(text)
+
+    def _end_cell(self):
+        if self.cell is not None and self.row is not None:
+            text = WHITESPACE.sub(' ', ''.join(self.cell).replace(LINE_BREAK, ' ')).strip()
+            self.row.append((text, *self.cell_spans))
+        self.cell = None
+
+    def _end_row(self):
+        self._end_cell()
+        if self.row:
+            self.rows.append((self._place_cells(self.row), self.row_is_header))
+        self.row = None
+
+    def _place_cells(self, cells: List[Tuple[str, int, int]]) -> List[Tuple[str, int]]:
+        """Lay out a row's cells, leaving empty cells where rowspans from above continue (as markdownify)."""
+        carried, self.row_carry = self.row_carry, {}
+        placed: List[Tuple[str, int]] = []
+        column = 0
+
+        def fill_carried():
+            nonlocal column
+            while column in carried:
+                rows_left, span = carried.pop(column)
+                placed.append(('', span))
+                if rows_left > 1:
+                    self.row_carry[column] = (rows_left - 1, span)
+                column += span
+
+        for text, colspan, rowspan in cells:
+            fill_carried()
+            placed.append((text, colspan))
+            if rowspan > 1:
+                self.row_carry[column] = (rowspan - 1, colspan)
+            column += colspan
+        for carried_column in sorted(carried):
+            if carried_column > column:
+                placed.append(('', carried_column - column))
+                column = carried_column
+            fill_carried()
+        return placed
+
+    def _end_table(self):
+        """Pipe table: a <th> first row is the header, otherwise an empty header row (as markdownify)."""
+        self._end_row()
+        rows, self.rows = self.rows, []
+        if not any(text for row, _ in rows for text, _ in row):
+            return  # Layout/spacer table
+        first, first_is_header = rows[0]
+        columns = sum(span for _, span in first)
+        if first_is_header:
+            header, body = self._render_row(first), rows[1:]
+        else:
+            header, body = '|' + '  |' * columns, rows
+        lines = [header, '| ' + ' | '.join(['---'] * columns) + ' |']
+        lines.extend(self._render_row(row) for row, _ in body)
+        self.blocks.append('\n'.join(lines))
+        self.tables += 1
+
+    @staticmethod
+    def _render_row(row: List[Tuple[str, int]]) -> str:
+        return '|' + ''.join(f" {text} |" + ' |' * (span - 1) for text, span in row)
+
+
+def _stream_convert(chunks: Iterable[str]) -> Tuple[str, Dict[str, Any]]:
+    """Feed text chunks through the event parser; returns (markdown, stats)."""
+    start = time.perf_counter()
+    target = _MarkdownTarget()
+    parser = etree.HTMLParser(target=target, encoding='utf-8', huge_tree=True)
+    input_chars = 0
+    for chunk in chunks:
+        input_chars += len(chunk)
+        parser.feed(chunk.encode('utf-8'))
+    markdown = parser.close()
+    return markdown, _stats('lxml', input_chars, markdown, target.tables, time.perf_counter() - start)
+
+
+def _stats(engine: str, input_chars: int, markdown: str, tables: int, seconds: float) -> Dict[str, Any]:
+    input_mb = input_chars / (1024 * 1024)
+    return {
+        "engine": engine,
+        "input_mb": input_mb,
+        "output_mb": len(markdown) / (1024 * 1024),
+        "tables": tables,
+        "seconds": seconds,
+        "mb_per_s": input_mb / seconds if seconds > 0 else 0.0,
+    }
+
+
+def convert_html_to_markdown_with_stats(html_content: str) -> Tuple[str, Dict[str, Any]]:
+    """Convert HTML to Markdown; stats has engine, input_mb, output_mb, tables, seconds, mb_per_s."""
+    if not LXML_AVAILABLE:
+        start = time.perf_counter()
+        markdown = convert_html_to_markdown_markdownify(html_content)
+        return markdown, _stats('markdownify', len(html_content), markdown,
+                                markdown.count('| --- |'), time.perf_counter() - start)
+    return _stream_convert(
+        html_content[i:i + CONVERT_CHUNK_CHARS] for i in range(0, len(html_content), CONVERT_CHUNK_CHARS)
+    )
+
+
+def convert_html_file_to_markdown(html_path: Path) -> Tuple[str, Dict[str, Any]]:
+    """Convert an HTML file, streamed from disk a chunk at a time. Returns (markdown, stats)."""
+    if not LXML_AVAILABLE:
+        with open(html_path, 'r', encoding='utf-8', errors='ignore') as f:
+            return convert_html_to_markdown_with_stats(f.read())
+
+    def read_chunks():
+        with open(html_path, 'r', encoding='utf-8', errors='ignore') as f:
+            while True:
+                chunk = f.read(CONVERT_CHUNK_CHARS)
+                if not chunk:
+                    return
+                yield chunk
+
+    return _stream_convert(read_chunks())
+
 
 def convert_html_to_markdown(html_content: str) -> str:
+    """Convert HTML to Markdown (streaming lxml converter; markdownify without lxml)"""
+    markdown, stats = convert_html_to_markdown_with_stats(html_content)
+    print(f"[INFO] HTML -> Markdown ({stats['engine']}): {stats['input_mb']:.1f} MB in "
+          f"{stats['seconds']:.2f}s ({stats['mb_per_s']:.1f} MB/s), {stats['tables']} tables")
+    return markdown
+
+
+def convert_html_to_markdown_markdownify(html_content: str) -> str:
     """Convert HTML to Markdown using markdownify, then fix table formatting"""
     md = markdownify.markdownify(html_content, heading_style="ATX")
-    
+
     # Post-process: Fix tab-separated tables to markdown format
     # This ensures all tables are properly formatted
     lines = md.split('\n')
     fixed_lines = []
     i = 0
-    
+
     while i < len(lines):
         line = lines[i]
-        
+
         # Check if this line looks like a tab-separated table row
         if '\t' in line and line.count('\t') >= 2 and bool(re.search(r'[\d$%]', line)):
             # Collect consecutive table lines
             table_lines = [line]
             i += 1
-            
+
             while i < len(lines):
                 next_line = lines[i]
                 if '\t' in next_line and next_line.count('\t') >= 2 and bool(re.search(r'[\d$%]', next_line)):
@@ -35,7 +337,7 @@ def convert_html_to_markdown(html_content: str) -> str:
                     break
                 else:
                     break
-            
+
             # Convert to markdown table
             if len(table_lines) >= 2:
                 rows = []
@@ -43,21 +345,21 @@ def convert_html_to_markdown(html_content: str) -> str:
                     cells = [c.strip() for c in tl.split('\t') if c.strip() or len(c) > 0]
                     if len(cells) >= 2:
                         rows.append(cells)
-                
+
                 if rows:
                     max_cols = max(len(r) for r in rows)
                     for r in rows:
                         while len(r) < max_cols:
                             r.append('')
-                    
+
                     # Build markdown table
                     fixed_lines.append('| ' + ' | '.join(rows[0]) + ' |')
                     fixed_lines.append('| ' + ' | '.join(['---'] * len(rows[0])) + ' |')
                     for row in rows[1:]:
                         fixed_lines.append('| ' + ' | '.join(row) + ' |')
                     continue
-        
+
         fixed_lines.append(line)
         i += 1
-    
+
     return '\n'.join(fixed_lines)
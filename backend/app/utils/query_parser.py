@@ -0,0 +1,123 @@
+"""
+Query analysis: one pass over the query for intents, metrics, years and section hints.
+
+All keywords are compiled into a single regex; each keyword maps to the
+(kind, value) facts it signals, e.g. "revenue" is both a metric and a
+section hint. parse_query runs once per request and its ParsedQuery is
+shared by retrieval, the agents and prompt building. Tickers come from
+the TickerResolver, so only indexed companies are returned.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .ticker_resolver import get_ticker_resolver
+
+# keyword -> [(kind, value)]; kinds: intent, metric, section
+QUERY_KEYWORDS: Dict[str, List[Tuple[str, str]]] = {}
+
+
+def _register(kind: str, table: Dict[str, List[str]]):
+    for value, keywords in table.items():
+        for keyword in keywords:
+            QUERY_KEYWORDS.setdefault(keyword, []).append((kind, value))
+
+
+_register('intent', {
+    'trend': ['trend', 'growth', 'increase', 'decrease', 'over time', 'years', 'historical'],
+    'comparison': ['compare', 'comparison', 'comparing', 'vs', 'versus', 'difference', 'better', 'worse'],
+    'risk': ['risk', 'risky', 'danger', 'warning', 'concern', 'threat'],
+    'competitors': ['competitor', 'competition', 'peer', 'rival'],
+})
+# Metric names understood by the time-series extractor / table store
+_register('metric', {
+    'revenue': ['revenue', 'net sales'],
+    'operating income': ['operating income'],
+    'income': ['income', 'net income', 'earnings'],
+    'profit': ['profit'],
+    'margin': ['margin'],
+    'cash flow': ['cash flow'],
+    'assets': ['assets'],
+    'liabilities': ['liabilities'],
+})
+# Filing section hints for extract_relevant_sections
+_register('section', {
+    'revenue': ['revenue', 'net sales', 'segment', 'aws', 'azure'],
+    'income': ['income', 'net income', 'operating income', 'earnings', 'profit', 'loss'],
+    'balance': ['balance sheet', 'assets', 'liabilities'],
+    'cash': ['cash flow', 'operating activities'],
+    'segment': ['segment', 'business segment', 'geographic'],
+})
+
+NUMBER_WORDS = {"two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+
+# Longest keywords first so "operating income" wins over "income"; simple inflections ("risks", "compared")
+QUERY_PATTERN = re.compile(
+    r'\b(?:'
+    r'(?P<span>(?:past|last|previous)\s+(?P<span_n>\d{1,2}|' + '|'.join(NUMBER_WORDS) + r')\s+(?:fiscal\s+)?years)'
+    r'|(?P<year>(?:19|20)\d{2})'
+    r'|(?P<keyword>' + '|'.join(
+        re.escape(keyword).replace(r'\ ', r'\s+') for keyword in sorted(QUERY_KEYWORDS, key=len, reverse=True)
+    ) + r')(?:s|es|d|ed|ing)?'
+    r')\b',
+    re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """Everything the pipeline needs to know about a query, extracted once."""
+    query: str
+    tickers: Tuple[str, ...]
+    intents: FrozenSet[str]
+    metrics: Tuple[str, ...]  # In query order
+    years: Tuple[str, ...]  # Sorted
+    year_span: Optional[int]  # "past 3 years" -> 3
+    section_hints: Tuple[str, ...]
+
+    def has_intent(self, intent: str) -> bool:
+        return intent in self.intents
+
+    def first_metric(self, allowed: Optional[Tuple[str, ...]] = None) -> Optional[str]:
+        """First metric mentioned in the query (out of allowed, if given)."""
+        return next((m for m in self.metrics if allowed is None or m in allowed), None)
+
+
+@lru_cache(maxsize=1024)
+def _scan_keywords(query: str) -> tuple:
+    """One regex pass over the query (cached: repeated queries are common)."""
+    intents, metrics, sections, years = set(), [], [], set()
+    year_span = None
+    for match in QUERY_PATTERN.finditer(query):
+        if match.group('span'):
+            value = match.group('span_n').lower()
+            year_span = int(value) if value.isdigit() else NUMBER_WORDS[value]
+            intents.add('trend')
+        elif match.group('year'):
+            years.add(match.group('year'))
+        else:
+            keyword = re.sub(r'\s+', ' ', match.group('keyword').lower())
+            for kind, value in QUERY_KEYWORDS[keyword]:
+                if kind == 'intent':
+                    intents.add(value)
+                elif kind == 'metric' and value not in metrics:
+                    metrics.append(value)
+                elif kind == 'section' and value not in sections:
+                    sections.append(value)
+    return frozenset(intents), tuple(metrics), tuple(sorted(years)), year_span, tuple(sections)
+
+
+def parse_query(query: str) -> ParsedQuery:
+    """Parse a query: keywords in one regex pass, tickers from the resolver (which sees new uploads)."""
+    intents, metrics, years, year_span, sections = _scan_keywords(query)
+    return ParsedQuery(
+        query=query,
+        tickers=tuple(get_ticker_resolver().resolve(query)),
+        intents=intents,
+        metrics=metrics,
+        years=years,
+        year_span=year_span,
+        section_hints=sections
+    )
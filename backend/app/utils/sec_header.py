@@ -0,0 +1,120 @@
+"""
+SEC header parsing utilities
+Reads filing metadata from the <SEC-HEADER> block of a full-submission.txt,
+and the cover-page dei: facts of an inline XBRL 10-K HTML.
+"""
+
+import html
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+DEFAULT_FISCAL_YEAR = "2024"  # Year for files/points without a parseable period of report
+
+# The header sits at the very top of the submission; no need to scan the filing body
+HEADER_SCAN_CHARS = 20000
+
+HEADER_FIELDS = {
+    'period_of_report': re.compile(r'CONFORMED PERIOD OF REPORT:\s*(\d{8})'),
+    'filed_as_of_date': re.compile(r'FILED AS OF DATE:\s*(\d{8})'),
+    'form_type': re.compile(r'CONFORMED SUBMISSION TYPE:\s*(\S+)'),
+    'company_name': re.compile(r'COMPANY CONFORMED NAME:\s*(.+)'),
+    'cik': re.compile(r'CENTRAL INDEX KEY:\s*(\d{10})'),
+    'fiscal_year_end': re.compile(r'FISCAL YEAR END:\s*(\d{4})'),
+}
+
+# dei: cover facts are tagged on the cover page, but inline XBRL filings can carry
+# hundreds of KB of styles/hidden facts before it; read in chunks until all are found
+DEI_SCAN_CHUNK_CHARS = 1 << 18
+DEI_SCAN_MAX_CHARS = 4 << 20
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def parse_sec_header(content: str) -> Dict[str, str]:
+    """
+    Extract header fields (period_of_report, filed_as_of_date, form_type,
+    company_name, cik, fiscal_year_end). Missing fields are left out.
+    """
+    header = content[:HEADER_SCAN_CHARS]
+    end = header.find('</SEC-HEADER>')
+    if end != -1:
+        header = header[:end]
+
+    fields = {}
+    for name, pattern in HEADER_FIELDS.items():
+        match = pattern.search(header)
+        if match:
+            fields[name] = match.group(1).strip()
+    return fields
+
+
+def extract_fiscal_year(content: str) -> Optional[str]:
+    """
+    Fiscal year of a filing: the year of its CONFORMED PERIOD OF REPORT
+    (e.g. 20240928 -> "2024"). Returns None if the header has no period.
+    """
+    period = parse_sec_header(content).get('period_of_report')
+    return period[:4] if period else None
+
+
+def filing_stem(ticker: str, year: str) -> str:
+    """File name stem for a filing, e.g. AAPL_2024 (also the ticker_year payload value)."""
+    return f"{ticker}_{year}"
+
+
+def _dei_patterns(concepts: Iterable[str]) -> Dict[str, re.Pattern]:
+    return {
+        concept: re.compile(r'name="dei:' + concept + r'"[^>]*>(.*?)</ix:nonNumeric>', re.DOTALL)
+        for concept in concepts
+    }
+
+
+def _dei_value(match: re.Match) -> str:
+    return ' '.join(html.unescape(TAG_PATTERN.sub('', match.group(1))).split())
+
+
+def dei_facts(content: str, concepts: Iterable[str]) -> Dict[str, str]:
+    """read_dei_facts for a filing already in memory (first DEI_SCAN_MAX_CHARS only)."""
+    head = content[:DEI_SCAN_MAX_CHARS]
+    facts = {}
+    for concept, pattern in _dei_patterns(concepts).items():
+        match = pattern.search(head)
+        if match:
+            facts[concept] = _dei_value(match)
+    return facts
+
+
+def parse_filing_name(path: Path) -> Tuple[str, str, str]:
+    """
+    (ticker, fiscal year, source) from a filing file name: AAPL_2024.md ->
+    ("AAPL", "2024", "original"); AAPL_2024_uploaded.md -> (..., "uploaded");
+    AAPL_2024_10K_HTML.html and legacy AAPL_10K_HTML.html (DEFAULT_FISCAL_YEAR) work too.
+    """
+    parts = Path(path).stem.split('_')
+    ticker = parts[0].upper()
+    year = next((part for part in parts[1:] if part.isdigit() and len(part) == 4), DEFAULT_FISCAL_YEAR)
+    source = "uploaded" if "uploaded" in parts else "original"
+    return ticker, year, source
+
+
+def read_dei_facts(html_path: Path, concepts: Iterable[str]) -> Dict[str, str]:
+    """
+    Cover-page facts (e.g. EntityRegistrantName, EntityCentralIndexKey) of an
+    inline XBRL filing, reading only as far as the last one requested.
+    Missing facts are left out.
+    """
+    patterns = _dei_patterns(concepts)
+    facts = {}
+    head = ''
+    with open(html_path, 'r', encoding='utf-8', errors='ignore') as f:
+        while patterns and len(head) < DEI_SCAN_MAX_CHARS:
+            chunk = f.read(DEI_SCAN_CHUNK_CHARS)
+            if not chunk:
+                break
+            head += chunk
+            for concept, pattern in list(patterns.items()):
+                match = pattern.search(head)
+                if match:
+                    facts[concept] = _dei_value(match)
+                    del patterns[concept]
+    return facts
@@ -0,0 +1,273 @@
+"""
+Ticker resolution for queries: company names, aliases and ticker symbols -> indexed tickers.
+
+Built from the indexed filings (processed_data/*.md stems are the known
+tickers; registrant names come from the 10-K HTML cover page, or the
+markdown cover page when there is no HTML) plus the common aliases in
+COMPANY_TICKERS. Names are matched with a word trie (longest match wins);
+every candidate is checked against the known tickers, so acronyms like
+"AI", "CEO" or "GAAP" never reach retrieval. Misspelled names fall back
+to fuzzy matching.
+"""
+
+import difflib
+import re
+import threading
+import unicodedata
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from .sec_header import read_dei_facts
+from .ticker_extractor import COMPANY_TICKERS
+
+# The cover page is at the top of the filing (lines, not chars: hidden XBRL can make line 1 huge)
+REGISTRANT_SCAN_LINES = 200
+REGISTRANT_MARKER = re.compile(r'\(Exact name of registrant', re.IGNORECASE)
+# Trailing words dropped from registrant names ("Apple Inc." -> "apple", "Eli Lilly and Company" -> "eli lilly")
+NAME_SUFFIXES = {
+    'inc', 'incorporated', 'corp', 'corporation', 'co', 'company', 'companies',
+    'plc', 'ltd', 'limited', 'holdings', 'group', 'international', 'us', 'the', '&', 'and',
+    'n.v', 'sa', 'lp',
+}
+# Leading words of registrant names that do not name the company on their own
+# ("General Electric", "Home Depot"); other leading words become short names ("Costco")
+GENERIC_NAME_WORDS = {
+    'advanced', 'american', 'analog', 'applied', 'automatic', 'bank', 'capital', 'central', 'charles',
+    'china', 'digital', 'east', 'eastern', 'energy', 'first', 'general', 'global', 'great', 'health',
+    'home', 'international', 'intuitive', 'johnson', 'marsh', 'national', 'north', 'northern', 'pacific',
+    'palo', 'philip', 'public', 'royal', 'south', 'southern', 'standard', 'state', 'texas', 'union',
+    'united', 'universal', 'wells', 'west', 'western',
+}
+FIRST_WORD_MIN_CHARS = 4
+# EDGAR state/re-registration markers: "APPLIED MATERIALS INC /DE", "3M CO /MN"
+EDGAR_SUFFIX = re.compile(r'\s*/[A-Z]{2,3}/?$|\s*/NEW/?$', re.IGNORECASE)
+# Hyphens inside names split words ("Coca-Cola", "T-Mobile"); share-class symbols keep theirs ("BRK-B")
+NAME_HYPHEN = re.compile(r'(?<=\w)-(?![A-Z]\b)')
+TOKEN_PATTERN = re.compile(r"\$?[A-Za-z0-9][A-Za-z0-9&.'\-]*")
+TICKER_TOKEN = re.compile(r'^\$?[A-Z]{1,5}(?:[.\-][A-Z])?$')
+FUZZY_CUTOFF = 0.85
+FUZZY_MIN_CHARS = 5
+RESOLVE_CACHE_SIZE = 4096
+
+
+def registrant_name(content: str) -> Optional[str]:
+    """Company name from a 10-K cover page: the line above "(Exact name of registrant ...)"."""
+    lines = content.split('\n', REGISTRANT_SCAN_LINES)[:REGISTRANT_SCAN_LINES]
+    marker = next((i for i, line in enumerate(lines) if REGISTRANT_MARKER.search(line)), None)
+    if marker is None:
+        return None
+    for line in reversed(lines[:marker]):
+        line = line.strip().strip('*')
+        if line and not line.startswith(('|', '!', '#')) and 'commission file' not in line.lower():
+            return line
+    return None
+
+
+def html_registrant_name(html_path: Path) -> Optional[str]:
+    """Company name tagged as dei:EntityRegistrantName in a 10-K HTML, without EDGAR suffixes."""
+    name = read_dei_facts(html_path, ['EntityRegistrantName']).get('EntityRegistrantName')
+    return EDGAR_SUFFIX.sub('', name) if name else None
+
+
+def _clean(text: str) -> str:
+    """ASCII-fold and straighten apostrophes ("Mondelēz", "Lowe’s") before tokenizing."""
+    text = text.replace('\u2019', "'")
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return NAME_HYPHEN.sub(' ', text)
+
+
+def _normalize_token(token: str) -> str:
+    token = token.lower().rstrip('.').strip("'")
+    return token[:-2] if token.endswith("'s") else token
+
+
+def name_aliases(name: str) -> Set[str]:
+    """Lookup keys for a company name: the normalized name and the name without corporate suffixes."""
+    tokens = [_normalize_token(token) for token in TOKEN_PATTERN.findall(_clean(name).replace(',', ' '))]
+    tokens = [token for token in tokens if token]
+    aliases = {' '.join(tokens)} if tokens else set()
+    if tokens and tokens[0] == 'the':
+        tokens.pop(0)
+    while tokens and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    if tokens:
+        aliases.add(' '.join(tokens))
+    return aliases
+
+
+def first_word_aliases(names: Dict[str, str]) -> Dict[str, str]:
+    """
+    Short names for multi-word registrants ("Costco Wholesale Corp" -> "costco"):
+    the first word, unless it is generic or another company's name starts with it.
+    """
+    base_names = {ticker: min(name_aliases(name), key=len).split() for ticker, name in names.items() if name}
+    starts = {}
+    for ticker, words in base_names.items():
+        if words:
+            starts.setdefault(words[0], set()).add(ticker)
+    return {
+        words[0]: ticker
+        for ticker, words in base_names.items()
+        if len(words) > 1 and len(words[0]) >= FIRST_WORD_MIN_CHARS and words[0].isalpha()
+        and words[0] not in GENERIC_NAME_WORDS and len(starts[words[0]]) == 1
+    }
+
+
+class TickerResolver:
+    """
+    Resolves the companies mentioned in a query to known tickers, in
+    order of first mention.
+    """
+
+    def __init__(self, known_tickers: Iterable[str], aliases: Dict[str, str]):
+        self._lock = threading.Lock()
+        self.known_tickers: Set[str] = {ticker.upper() for ticker in known_tickers}
+        self._trie: Dict[str, dict] = {}
+        self._single_word: Dict[str, str] = {}  # For fuzzy matching
+        self._cache: Dict[str, List[str]] = {}
+        for alias, ticker in aliases.items():
+            self._add_alias(alias, ticker)
+
+    @classmethod
+    def from_filings(cls, processed_dir: Path, output_dir: Optional[Path] = None) -> 'TickerResolver':
+        """
+        Known tickers from processed_data/*.md; registrant names from
+        output/*_10K_HTML.html (or the markdown cover page); plus
+        the COMPANY_TICKERS aliases.
+        """
+        known = set()
+        names = {}
+        # AAPL_10K_HTML.html or AAPL_2024_10K_HTML.html; sorted, so the latest year wins
+        html_files = {
+            html_file.name.split('_')[0].upper(): html_file
+            for html_file in sorted(output_dir.glob("*_10K_HTML.html"))
+        } if output_dir else {}
+        for md_file in sorted(processed_dir.glob("*.md")):
+            ticker = md_file.stem.split('_')[0].upper()
+            known.add(ticker)
+            if 'uploaded' in md_file.stem or ticker in names:
+                continue  # Originals only: uploads are not always the ticker's own filing
+            name = None
+            try:
+                if ticker in html_files:
+                    name = html_registrant_name(html_files[ticker])
+                if not name:
+                    with open(md_file, 'r', encoding='utf-8') as f:
+                        name = registrant_name(''.join(islice(f, REGISTRANT_SCAN_LINES)))
+            except OSError as e:
+                print(f"[WARNING] Could not read registrant name for {ticker}: {e}")
+            if name:
+                names[ticker] = name
+        if not known:
+            known = set(COMPANY_TICKERS.values())  # Nothing indexed yet
+
+        aliases = dict(COMPANY_TICKERS)
+        for ticker, name in names.items():
+            for alias in name_aliases(name):
+                aliases.setdefault(alias, ticker)
+        # Short names last, and only where no other company's alias starts with the word
+        taken: Dict[str, Set[str]] = {}
+        for alias, mapped in aliases.items():
+            taken.setdefault(alias.split()[0], set()).add(mapped)
+        for alias, ticker in first_word_aliases(names).items():
+            if taken.get(alias, {ticker}) == {ticker}:
+                aliases.setdefault(alias, ticker)
+        return cls(known, aliases)
+
+    def _add_alias(self, alias: str, ticker: str):
+        """Index an alias under its ticker; first mapping wins, unknown tickers are ignored."""
+        if ticker not in self.known_tickers:
+            return
+        node = self._trie
+        for token in alias.split():
+            node = node.setdefault(token, {})
+        node.setdefault('$ticker', ticker)
+        if ' ' not in alias:
+            self._single_word.setdefault(alias, ticker)
+
+    def add_company(self, ticker: str, name: Optional[str] = None):
+        """Register a newly indexed filing (e.g. an upload) and its registrant name."""
+        with self._lock:
+            self.known_tickers.add(ticker.upper())
+            # Short name only if no indexed name starts with that word yet
+            short = [alias for alias in first_word_aliases({ticker: name}) if alias not in self._trie] if name else []
+            for alias in list(name_aliases(name) if name else ()) + short:
+                self._add_alias(alias, ticker.upper())
+            for alias, mapped in COMPANY_TICKERS.items():
+                if mapped == ticker.upper():
+                    self._add_alias(alias, mapped)
+            self._cache.clear()
+
+    def resolve(self, query: str) -> List[str]:
+        """Known tickers mentioned in the query (names, aliases or symbols), first mention first."""
+        with self._lock:
+            cached = self._cache.get(query)
+        if cached is not None:
+            return list(cached)
+
+        raw_tokens = TOKEN_PATTERN.findall(_clean(query))
+        tokens = [_normalize_token(token) for token in raw_tokens]
+        found: List[str] = []
+        unmatched: List[str] = []
+        i = 0
+        while i < len(tokens):
+            # Longest name/alias starting here
+            node, j, match, match_end = self._trie, i, None, i
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if '$ticker' in node:
+                    match, match_end = node['$ticker'], j
+            if match is None:
+                match = self._symbol(raw_tokens[i])
+                match_end = i + 1
+            if match is None:
+                unmatched.append(tokens[i])
+            elif match not in found:
+                found.append(match)
+            i = match_end
+
+        if not found:
+            found = self._fuzzy(unmatched)
+
+        with self._lock:
+            if len(self._cache) >= RESOLVE_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[query] = found
+        return list(found)
+
+    def _symbol(self, raw_token: str) -> Optional[str]:
+        """An uppercase ticker symbol that is actually indexed ("MSFT", "BRK.B", "$C")."""
+        raw_token = raw_token.rstrip(".'")
+        if raw_token[-2:] in ("'s", "'S"):  # Possessive ("AAPL's"; ’ is straightened by _clean)
+            raw_token = raw_token[:-2]
+        if not TICKER_TOKEN.match(raw_token):
+            return None
+        ticker = raw_token.lstrip('$').replace('.', '-')
+        if len(ticker) == 1 and not raw_token.startswith('$'):
+            return None  # Single letters ("A", "I") only as $C, $T, ...
+        return ticker if ticker in self.known_tickers else None
+
+    def _fuzzy(self, tokens: List[str]) -> List[str]:
+        """Closest single-word names for misspellings ("Microsft" -> MSFT)."""
+        found = []
+        for token in tokens:
+            if len(token) < FUZZY_MIN_CHARS:
+                continue
+            close = difflib.get_close_matches(token, self._single_word, n=1, cutoff=FUZZY_CUTOFF)
+            if close and self._single_word[close[0]] not in found:
+                found.append(self._single_word[close[0]])
+        return found
+
+
+# Global instance
+_ticker_resolver = None
+
+def get_ticker_resolver() -> TickerResolver:
+    """Get or create the resolver over the indexed filings."""
+    global _ticker_resolver
+    if _ticker_resolver is None:
+        from backend.app.config import PROCESSED_DATA_DIR, OUTPUT_DIR
+        _ticker_resolver = TickerResolver.from_filings(PROCESSED_DATA_DIR, OUTPUT_DIR)
+    return _ticker_resolver
@@ -0,0 +1,91 @@
+"""
+HTML -> Markdown benchmark: streaming lxml converter vs markdownify.
+
+Converts every output/*_10K_HTML.html with both engines and reports
+throughput (MB of HTML per second), output size and whether the table
+store reads the same financial rows out of both Markdown versions
+(line item, period, value), which is what ingest depends on.
+
+Usage:
+    python -m backend.scripts.benchmark_markdown_conversion [--limit N]
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.config import OUTPUT_DIR
+from backend.app.services.table_store import parse_markdown_tables
+from backend.app.utils.markdown_converter import (
+    LXML_AVAILABLE, convert_html_to_markdown_markdownify, convert_html_to_markdown_with_stats
+)
+
+
+def table_facts(markdown: str) -> Counter:
+    return Counter((row['line_item_key'], row['period'], row['value']) for row in parse_markdown_tables(markdown))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML -> Markdown conversion")
+    parser.add_argument("--limit", type=int, default=0, help="only the first N files")
+    args = parser.parse_args()
+
+    if not LXML_AVAILABLE:
+        print("[ERROR] lxml is not installed; nothing to compare markdownify against")
+        return
+
+    html_files = sorted(OUTPUT_DIR.glob("*_10K_HTML.html"))
+    if args.limit:
+        html_files = html_files[:args.limit]
+    if not html_files:
+        print(f"[ERROR] No HTML files found in {OUTPUT_DIR}")
+        return
+
+    print("=" * 100)
+    print(f"HTML -> Markdown benchmark ({len(html_files)} files)")
+    print("=" * 100)
+    print(f"{'file':<28}{'HTML MB':>9}{'mdify s':>9}{'lxml s':>9}{'speedup':>9}"
+          f"{'mdify MB':>10}{'lxml MB':>9}{'rows':>8}{'match':>8}")
+
+    totals = Counter()
+    for html_file in html_files:
+        with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
+            html_content = f.read()
+        html_mb = len(html_content) / (1024 * 1024)
+
+        start = time.perf_counter()
+        reference = convert_html_to_markdown_markdownify(html_content)
+        reference_seconds = time.perf_counter() - start
+        markdown, stats = convert_html_to_markdown_with_stats(html_content)
+
+        expected, got = table_facts(reference), table_facts(markdown)
+        rows = sum(expected.values())
+        matched = sum((expected & got).values())
+
+        totals.update({
+            'html_mb': html_mb, 'reference_s': reference_seconds, 'stream_s': stats['seconds'],
+            'reference_mb': len(reference) / (1024 * 1024), 'stream_mb': stats['output_mb'],
+            'rows': rows, 'matched': matched, 'extra': sum((got - expected).values()),
+        })
+        print(f"{html_file.name[:27]:<28}{html_mb:>9.2f}{reference_seconds:>9.2f}{stats['seconds']:>9.2f}"
+              f"{reference_seconds / stats['seconds']:>8.1f}x{len(reference) / (1024 * 1024):>10.2f}"
+              f"{stats['output_mb']:>9.2f}{rows:>8}{matched / rows if rows else 1.0:>8.1%}")
+
+    print("-" * 100)
+    print(f"[RESULT] markdownify: {totals['html_mb'] / totals['reference_s']:.1f} MB/s "
+          f"({totals['reference_s']:.1f}s for {totals['html_mb']:.1f} MB)")
+    print(f"[RESULT] streaming:   {totals['html_mb'] / totals['stream_s']:.1f} MB/s "
+          f"({totals['stream_s']:.1f}s), {totals['reference_s'] / totals['stream_s']:.1f}x faster")
+    print(f"[RESULT] Markdown size: {totals['reference_mb']:.1f} MB -> {totals['stream_mb']:.1f} MB")
+    print(f"[RESULT] Table rows: {totals['matched']:,}/{totals['rows']:,} of markdownify's rows reproduced "
+          f"({totals['matched'] / max(totals['rows'], 1):.2%}), {totals['extra']:,} rows only in streaming output")
+
+
+if __name__ == "__main__":
+    main()
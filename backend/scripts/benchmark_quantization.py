@@ -0,0 +1,199 @@
+"""
+Quantization Benchmark: recall@k vs memory for the sections collection.
+
+Pulls the stored chunk vectors out of Qdrant and replays our query set
+against them with float32 (exact), int8 scalar and binary quantization,
+with and without oversampling + rescoring. Quantization is simulated in
+NumPy the way Qdrant does it, so the numbers are the same whatever
+QDRANT_MODE or VECTOR_QUANTIZATION the collection was built with.
+
+Usage:
+    python -m backend.scripts.benchmark_quantization [queries.txt]
+
+queries.txt holds one query per line; the default is the query set from
+the README and the frontend query templates.
+"""
+
+import sys
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.config import SECTIONS_COLLECTION
+from backend.app.services.qdrant_service import get_qdrant_client
+from backend.app.services.embedding_service import get_embedding_model
+from backend.app.utils.ticker_resolver import get_ticker_resolver
+
+DEFAULT_QUERIES = [
+    "Show me Apple's revenue breakdown for 2024",
+    "Compare Microsoft and Google's operating expenses",
+    "What are Amazon's top risk factors?",
+    "Analyze Tesla's cash flow statement",
+    "Find NVIDIA's R&D spending trends",
+    "Compare revenue of Apple, Microsoft, and Amazon for 2024",
+    "What are the main risk factors for Apple Inc?",
+    "Tell me about the business and operations of Microsoft",
+    "What are the key financial metrics and ratios for Amazon?",
+    "Break down the revenue by business segments for Apple",
+    "Who are the board of directors at Microsoft and what are their backgrounds?",
+    "Show me the cash flow statement for Amazon for 2024",
+    "What are the revenue growth trends for Apple over the past 3 years?",
+]
+
+TOP_K = [5, 10]  # retrieve_relevant_sections uses limit=5 (hybrid asks for 10 dense)
+OVERSAMPLING = [1.0, 2.0, 3.0]
+SCALAR_QUANTILE = 0.99  # Same as the indexing scripts
+
+
+def load_queries() -> List[str]:
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+    return DEFAULT_QUERIES
+
+
+def load_vectors(client) -> Tuple[np.ndarray, np.ndarray]:
+    """Scroll every chunk vector (and its ticker) out of the collection."""
+    vectors, tickers = [], []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=SECTIONS_COLLECTION,
+            limit=1000,
+            offset=offset,
+            with_payload=['ticker'],
+            with_vectors=True
+        )
+        for point in points:
+            vectors.append(point.vector)
+            tickers.append(point.payload.get('ticker', ''))
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32), np.asarray(tickers)
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def scalar_quantize(matrix: np.ndarray, low: float, high: float) -> np.ndarray:
+    """int8 codes, dequantized back to floats for scoring."""
+    scale = (high - low) / 255.0
+    codes = np.clip(np.round((matrix - low) / scale), 0, 255).astype(np.uint8)
+    return low + codes.astype(np.float32) * scale
+
+
+def binary_quantize(matrix: np.ndarray) -> np.ndarray:
+    """1 bit per dimension, scored as a +/-1 dot product (equivalent to Hamming)."""
+    return np.where(matrix > 0, 1.0, -1.0).astype(np.float32)
+
+
+def top_ids(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, scores.shape[0])
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+def memory_bytes(count: int, dim: int) -> Dict[str, int]:
+    """Vector storage per quantization (Qdrant keeps one float offset per int8 vector)."""
+    return {
+        'float32': count * dim * 4,
+        'scalar': count * (dim + 4),
+        'binary': count * ((dim + 7) // 8),
+    }
+
+
+def main():
+    print("=" * 80)
+    print("Quantization Benchmark: recall@k vs memory")
+    print("=" * 80)
+
+    client = get_qdrant_client()
+    embedding_model = get_embedding_model()
+    if embedding_model is None:
+        print("[ERROR] Embedding model not available")
+        return
+
+    print(f"\n[INFO] Loading vectors from '{SECTIONS_COLLECTION}'...")
+    vectors, tickers = load_vectors(client)
+    if len(vectors) == 0:
+        print(f"[ERROR] No vectors found. Run 'python -m backend.scripts.chunk_markdown_files' first.")
+        return
+    vectors = normalize(vectors)
+    count, dim = vectors.shape
+    print(f"[SUCCESS] {count} vectors, dimension {dim}")
+
+    queries = load_queries()
+    query_vectors = normalize(
+        np.asarray(embedding_model.encode(queries, convert_to_numpy=True), dtype=np.float32)
+    )
+
+    low, high = np.quantile(vectors, [(1 - SCALAR_QUANTILE) / 2, 1 - (1 - SCALAR_QUANTILE) / 2])
+    quantized = {
+        'scalar': (scalar_quantize(vectors, low, high), lambda q: scalar_quantize(q, low, high)),
+        'binary': (binary_quantize(vectors), binary_quantize),
+    }
+
+    # One search per (query, ticker) pair, mirroring the ticker filter used by
+    # retrieval; queries without a known ticker search the whole collection
+    resolver = get_ticker_resolver()
+    searches = []
+    for query, query_vector in zip(queries, query_vectors):
+        query_tickers = resolver.resolve(query) or [None]
+        for ticker in query_tickers:
+            mask = np.ones(count, dtype=bool) if ticker is None else tickers == ticker
+            if mask.any():
+                searches.append((query_vector, np.flatnonzero(mask)))
+    print(f"[INFO] {len(queries)} queries -> {len(searches)} filtered searches")
+
+    results: List[Dict[str, Any]] = []
+    for k in TOP_K:
+        for name, (stored, quantize_query) in quantized.items():
+            for oversampling in OVERSAMPLING:
+                rescore = oversampling > 1.0  # Extra candidates only help if they get rescored
+                recalls = []
+                for query_vector, candidate_ids in searches:
+                    exact = top_ids(vectors[candidate_ids] @ query_vector, k)
+                    approx_scores = stored[candidate_ids] @ quantize_query(query_vector[np.newaxis, :])[0]
+                    shortlist = top_ids(approx_scores, int(k * oversampling))
+                    if rescore:
+                        shortlist = shortlist[top_ids(vectors[candidate_ids[shortlist]] @ query_vector, k)]
+                    found = set(candidate_ids[shortlist[:k]])
+                    expected = set(candidate_ids[exact])
+                    recalls.append(len(found & expected) / len(expected))
+                results.append({
+                    'k': k,
+                    'quantization': name,
+                    'oversampling': oversampling,
+                    'rescore': rescore,
+                    'recall': float(np.mean(recalls))
+                })
+
+    client.close()
+
+    memory = memory_bytes(count, dim)
+    print(f"\n[MEMORY] Vector storage for {count} chunks (HNSW graph and payloads excluded)")
+    for name, size in memory.items():
+        print(f"   {name:<8} {size / 1024 / 1024:>10.2f} MB  ({memory['float32'] / size:.0f}x smaller than float32)")
+    print("   With quantization the float32 originals can live on disk (on_disk=True); they are only read to rescore.")
+
+    print(f"\n[RECALL] Mean recall@k against exact float32 search")
+    print(f"   {'k':>3}  {'quantization':<12} {'oversampling':>12} {'rescore':>8} {'recall':>8}")
+    for row in results:
+        print(f"   {row['k']:>3}  {row['quantization']:<12} {row['oversampling']:>12.1f} "
+              f"{str(row['rescore']):>8} {row['recall']:>8.3f}")
+
+    print(f"\n{'=' * 80}")
+    print("[COMPLETE] Set VECTOR_QUANTIZATION / QUANTIZATION_OVERSAMPLING from the table above")
+    print(f"{'=' * 80}")
+
+
+if __name__ == "__main__":
+    main()
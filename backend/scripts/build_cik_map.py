@@ -0,0 +1,101 @@
+"""
+Build the bundled CIK -> ticker table (backend/app/data/cik_tickers.json).
+Sources (only the top of each file is read):
+  - output/{TICKER}[_{YEAR}]_10K_HTML.html: dei:EntityCentralIndexKey on the cover page
+  - data/{TICKER}/10-K/*/full-submission.txt: CENTRAL INDEX KEY in the SEC header
+  - processed_data/{TICKER}_{YEAR}.md: the CIK repeated in the hidden XBRL
+    context ids at the top of filings converted with markdownify (most
+    frequent one; the streaming converter drops ix:header, so newer
+    conversions rely on the two sources above)
+Entries already in the table are kept; new CIKs are added.
+
+Usage:
+    python -m backend.scripts.build_cik_map
+"""
+
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.config import OUTPUT_DIR, DATA_DIR, PROCESSED_DATA_DIR, CIK_TICKERS_PATH
+from backend.app.utils.cik_map import load_cik_map, save_cik_map, normalize_cik
+from backend.app.utils.sec_header import HEADER_SCAN_CHARS, parse_sec_header, parse_filing_name, read_dei_facts
+
+CONTEXT_CIK = re.compile(r'(?=(000\d{7}))')  # Overlapping: ids run into dates ("2024-12-310001067983brka:...")
+CONTEXT_SCAN_CHARS = 1 << 20
+CONTEXT_MIN_COUNT = 100
+
+
+def ciks_from_html(output_dir: Path) -> dict:
+    """{cik: ticker} from the cover page of each extracted 10-K HTML."""
+    found = {}
+    for html_file in sorted(output_dir.glob("*_10K_HTML.html")):
+        ticker = html_file.name.split('_')[0].upper()
+        cik = normalize_cik(read_dei_facts(html_file, ['EntityCentralIndexKey']).get('EntityCentralIndexKey'))
+        if cik:
+            found[cik] = ticker
+        else:
+            print(f"[WARNING] No dei:EntityCentralIndexKey in {html_file.name}")
+    return found
+
+
+def ciks_from_submissions(data_dir: Path) -> dict:
+    """{cik: ticker} from the SEC header of each data/{TICKER}/10-K/*/full-submission.txt."""
+    found = {}
+    for txt_file in sorted(data_dir.rglob("full-submission.txt")):
+        parts = txt_file.parts
+        if len(parts) < 4 or parts[-3] != "10-K":
+            continue
+        with open(txt_file, 'r', encoding='utf-8', errors='ignore') as f:
+            cik = normalize_cik(parse_sec_header(f.read(HEADER_SCAN_CHARS)).get('cik'))
+        if cik:
+            found[cik] = parts[-4].upper()
+    return found
+
+
+def ciks_from_markdown(processed_dir: Path) -> dict:
+    """{cik: ticker} from the XBRL context ids left at the top of each original markdown filing."""
+    found = {}
+    for md_file in sorted(processed_dir.glob("*.md")):
+        ticker, _, source = parse_filing_name(md_file)
+        if source != "original":
+            continue  # Uploads are not always the ticker's own filing
+        with open(md_file, 'r', encoding='utf-8', errors='ignore') as f:
+            counts = Counter(CONTEXT_CIK.findall(f.read(CONTEXT_SCAN_CHARS)))
+        if counts:
+            cik, count = counts.most_common(1)[0]
+            if count >= CONTEXT_MIN_COUNT:
+                found.setdefault(cik, ticker)
+    return found
+
+
+def main():
+    print("=" * 80)
+    print("Building CIK -> ticker table")
+    print("=" * 80)
+
+    cik_map = load_cik_map(CIK_TICKERS_PATH)
+    existing = len(cik_map)
+    sources = [("output HTML", ciks_from_html(OUTPUT_DIR))]
+    if DATA_DIR.exists():
+        sources.append(("SEC headers", ciks_from_submissions(DATA_DIR)))
+    sources.append(("markdown XBRL contexts", ciks_from_markdown(PROCESSED_DATA_DIR)))
+
+    for name, found in sources:
+        for cik, ticker in found.items():
+            if cik_map.get(cik, ticker) != ticker:
+                print(f"[WARNING] CIK {cik}: keeping {cik_map[cik]}, {name} says {ticker}")
+            cik_map.setdefault(cik, ticker)
+        print(f"[INFO] {name}: {len(found)} companies")
+
+    save_cik_map(CIK_TICKERS_PATH, cik_map)
+    print(f"\n[COMPLETE] {len(cik_map)} companies ({len(cik_map) - existing} new) -> {CIK_TICKERS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Build the knowledge graph snapshot from processed_data/*.md.
+Filings are scanned in a process pool; each worker returns a partial graph
+(node mention counts, edge weights) and the parent merges them as they finish.
+The API loads the snapshot at startup and /upload merges new filings into it.
+
+Usage:
+    python -m backend.scripts.build_knowledge_graph [--workers N]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, List
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.paths import PROCESSED_DATA_DIR, KNOWLEDGE_GRAPH_PATH
+from backend.app.services.knowledge_graph import FinancialKnowledgeGraph
+from backend.app.utils.sec_header import filing_stem, parse_filing_name
+
+
+def build_partial_graph(md_file: Path) -> dict:
+    """Worker: graph of a single filing, as a picklable dict."""
+    ticker, year, _ = parse_filing_name(md_file)
+    graph = FinancialKnowledgeGraph()
+    graph.add_document(md_file.read_text(encoding='utf-8'), ticker, {'doc_id': filing_stem(ticker, year)})
+    return graph.to_dict()
+
+
+def latest_filings(md_files: Iterable[Path]) -> List[Path]:
+    """One file per filing (AAPL_2024): an upload supersedes the original, as it does on /upload."""
+    filings = {}
+    for md_file in md_files:
+        ticker, year, source = parse_filing_name(md_file)
+        stem = filing_stem(ticker, year)
+        if stem not in filings or source == "uploaded":
+            filings[stem] = md_file
+    return sorted(filings.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the knowledge graph snapshot")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("Building knowledge graph")
+    print("=" * 80)
+
+    md_files = latest_filings(PROCESSED_DATA_DIR.glob("*.md"))
+    if not md_files:
+        print(f"[ERROR] No MD files found in {PROCESSED_DATA_DIR}")
+        return
+
+    graph = FinancialKnowledgeGraph()
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=max(args.workers, 1)) as executor:
+        futures = {executor.submit(build_partial_graph, md_file): md_file for md_file in md_files}
+        for future in as_completed(futures):
+            md_file = futures[future]
+            try:
+                part = FinancialKnowledgeGraph.from_dict(future.result())
+                graph.merge(part)
+                print(f"[SUCCESS] {md_file.stem}: {len(part.nodes)} nodes, {len(part.edges)} edges")
+            except Exception as e:
+                print(f"[ERROR] Failed to process {md_file.name}: {e}")
+
+    graph.save(KNOWLEDGE_GRAPH_PATH)
+    stats = graph.get_stats()
+    print(f"\n{'=' * 80}")
+    print(f"[COMPLETE] {stats['total_nodes']} nodes, {stats['total_edges']} edges from "
+          f"{len(graph.documents)} files in {time.time() - start:.1f}s ({args.workers} workers)")
+    print(f"[INFO] Snapshot: {KNOWLEDGE_GRAPH_PATH}")
+    print(f"{'=' * 80}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Build the financial table store (and the time-series panel) from processed_data/*.md.
+chunk_markdown_files fills it while indexing; this rebuilds it on its own
+(no embeddings, no Qdrant), e.g. after changing the table parser.
+
+Usage:
+    python -m backend.scripts.build_table_store
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.paths import PROCESSED_DATA_DIR, TIME_SERIES_PANEL_PATH
+from backend.app.utils.sec_header import parse_filing_name
+from backend.app.services.table_store import get_table_store
+from backend.app.services.time_series_extractor import TimeSeriesExtractor
+
+
+def main():
+    print("=" * 80)
+    print("Building financial table store")
+    print("=" * 80)
+
+    md_files = sorted(PROCESSED_DATA_DIR.glob("*.md"))
+    if not md_files:
+        print(f"[ERROR] No MD files found in {PROCESSED_DATA_DIR}")
+        return
+
+    table_store = get_table_store()
+    start = time.time()
+    total_rows = 0
+    for md_file in md_files:
+        ticker, year, source = parse_filing_name(md_file)
+        try:
+            content = md_file.read_text(encoding='utf-8')
+            rows = table_store.ingest_filing(ticker, year, content, str(md_file), source)
+            total_rows += rows
+            print(f"[SUCCESS] {ticker} ({year}, {source}): {rows} rows")
+        except Exception as e:
+            print(f"[ERROR] Failed to process {md_file.name}: {e}")
+
+    # Metric panel for the trend/comparison agents, rebuilt from the fresh rows
+    extractor = TimeSeriesExtractor()
+    extractor.load_from_table_store()
+    extractor.save(TIME_SERIES_PANEL_PATH)
+    print(f"[SUCCESS] Time-series panel: {len(extractor.panel)} series -> {TIME_SERIES_PANEL_PATH}")
+
+    stats = table_store.stats()
+    print(f"\n{'=' * 80}")
+    print(f"[COMPLETE] {total_rows} rows from {len(md_files)} files in {time.time() - start:.1f}s")
+    print(f"[INFO] Store: {stats['path']} ({stats['rows']} rows, {stats['filings']} filings)")
+    print(f"{'=' * 80}")
+
+
+if __name__ == "__main__":
+    main()
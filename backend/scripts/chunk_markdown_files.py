@@ -6,14 +6,17 @@ Creates embeddings for each chunk and stores in Qdrant.
 
 import json
 import re
-import uuid
 from pathlib import Path
 from typing import List, Dict, Any, Tuple
 import os
 
+import numpy as np
+
 try:
     from qdrant_client import QdrantClient
-    from qdrant_client.models import Distance, VectorParams, PointStruct
+    from qdrant_client.models import (
+        Distance, VectorParams, HnswConfigDiff
+    )
 except ImportError:
     print("[ERROR] qdrant-client not installed. Run: pip install qdrant-client")
     exit(1)
@@ -37,16 +40,29 @@ load_dotenv(dotenv_path=env_path)
 # Add project root to path
 sys.path.insert(0, str(project_root))
 
-QDRANT_URL = os.getenv("QDRANT_URL", "")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
+from backend.app.paths import (
+    QDRANT_MODE, QDRANT_URL, QDRANT_API_KEY, VECTOR_QUANTIZATION, HNSW_M, HNSW_EF_CONSTRUCT,
+    SECTIONS_COLLECTION as COLLECTION_NAME
+)
+from backend.app.services.qdrant_service import (
+    get_qdrant_client, get_quantization_config, create_payload_indexes, SECTION_INDEX_FIELDS
+)
+from backend.app.services.chunk_store import get_chunk_store, make_chunk_id
+from backend.app.services.table_store import get_table_store
+from backend.app.services.response_cache import invalidate_response_cache
+from backend.app.utils.sec_header import filing_stem, parse_filing_name
+
+# Chunk text goes to the local chunk store; set to "true" if the API server can't read that directory
+CHUNK_TEXT_IN_PAYLOAD = os.getenv("CHUNK_TEXT_IN_PAYLOAD", "false").lower() == "true"
 
-if not QDRANT_URL or not QDRANT_API_KEY:
+if QDRANT_MODE == "remote" and (not QDRANT_URL or not QDRANT_API_KEY):
     print("[ERROR] QDRANT_URL and QDRANT_API_KEY must be set in environment variables or .env file")
     exit(1)
 
-COLLECTION_NAME = "financial_sections"  # New collection for chunks
 EMBEDDING_DIM = 384
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+ENCODE_BATCH_SIZE = 32  # Chunks per embedding model forward pass
+UPLOAD_BATCH_SIZE = 256  # Points per upload request
 PROCESSED_DATA_DIR = project_root / "processed_data"
 # Note: We scan processed_data directly, no metadata file needed
 
@@ -205,26 +221,90 @@ def initialize_collection(client: QdrantClient) -> bool:
             collection_name=COLLECTION_NAME,
             vectors_config=VectorParams(
                 size=EMBEDDING_DIM,
-                distance=Distance.COSINE
-                # Note: Qdrant uses HNSW by default for efficient vector search
-                # HNSW parameters are optimized automatically
-            )
+                distance=Distance.COSINE,
+                # Originals only serve rescoring once vectors are quantized
+                on_disk=VECTOR_QUANTIZATION != "none"
+            ),
+            # payload_m adds per-ticker links so filtered HNSW search stays connected
+            hnsw_config=HnswConfigDiff(m=HNSW_M, ef_construct=HNSW_EF_CONSTRUCT, payload_m=HNSW_M),
+            quantization_config=get_quantization_config()
         )
-        print(f"[SUCCESS] Collection '{COLLECTION_NAME}' created!")
+        create_payload_indexes(client, COLLECTION_NAME, SECTION_INDEX_FIELDS)
+        print(f"[SUCCESS] Collection '{COLLECTION_NAME}' created! (quantization: {VECTOR_QUANTIZATION})")
         return True
     except Exception as e:
         print(f"[ERROR] Failed to create collection: {e}")
         return False
 
 
-def extract_ticker_from_filename(filename: str) -> str:
-    """Extract ticker from filename like AAPL_2024.md -> AAPL"""
-    # Remove extension and split by underscore
-    name = Path(filename).stem
-    parts = name.split('_')
-    if parts:
-        return parts[0].upper()
-    return "UNKNOWN"
+def index_filing(md_file: Path, client: QdrantClient, embedding_model, chunk_store, table_store) -> int:
+    """Chunk one filing, store its tables and chunk texts, and upload its vectors. Returns the chunk count."""
+    # Ticker, fiscal year and source from the file name (e.g., AAPL_2024.md, AAPL_2024_uploaded.md)
+    ticker, year, source = parse_filing_name(md_file)
+    
+    print(f"\n[PROCESSING] {ticker} ({year}) - {md_file.name}...")
+    
+    # Read and clean file
+    with open(md_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    # Clean XBRL noise
+    content = clean_xbrl_noise(content)
+    
+    # Financial tables -> typed rows for numeric lookups
+    table_rows = table_store.ingest_filing(ticker, year, content, str(md_file), source)
+    print(f"  -> Stored {table_rows} table rows")
+    
+    # Chunk by sections
+    chunks = chunk_by_sections(content, ticker)
+    
+    print(f"  -> Found {len(chunks)} sections")
+    
+    if not chunks:
+        return 0
+    
+    # Create embeddings for the whole file in batches
+    embeddings = embedding_model.encode(
+        [chunk['text'] for chunk in chunks],
+        batch_size=ENCODE_BATCH_SIZE,
+        convert_to_numpy=True
+    ).astype(np.float32)
+    
+    # Text lives in the chunk store under a content-addressed id,
+    # which is also the point id; Qdrant keeps vectors and metadata
+    ids = [make_chunk_id(md_file.stem, chunk['text']) for chunk in chunks]
+    chunk_store.put_many(dict(zip(ids, (chunk['text'] for chunk in chunks))))
+    
+    payloads = []
+    for chunk in chunks:
+        payload = {
+            'ticker': ticker,
+            'section': chunk['section'],
+            'start_line': chunk['start_line'],
+            'end_line': chunk['end_line'],
+            'year': year,
+            'source': source,  # Indexed: "original" or "uploaded"
+            'ticker_year': filing_stem(ticker, year),  # Indexed: one filing per filter match
+            'file_path': str(md_file),
+            'chunk_length': len(chunk['text']),
+            'tables_count': chunk['text'].count('| --- |')  # Rough estimate
+        }
+        if CHUNK_TEXT_IN_PAYLOAD:
+            payload['text'] = chunk['text']
+        payloads.append(payload)
+    
+    # Vectors go over the wire as a numpy array (binary over gRPC)
+    # instead of per-point Python float lists
+    client.upload_collection(
+        collection_name=COLLECTION_NAME,
+        vectors=embeddings,
+        payload=payloads,
+        ids=ids,
+        batch_size=UPLOAD_BATCH_SIZE,
+        wait=True
+    )
+    print(f"  -> Uploaded {len(chunks)} chunks to Qdrant")
+    return len(chunks)
 
 
 def main():
@@ -251,85 +331,33 @@ def main():
     embedding_model = SentenceTransformer(EMBEDDING_MODEL)
     print("[SUCCESS] Model loaded!")
     
+    chunk_store = get_chunk_store()
+    print(f"[INFO] Chunk store: {chunk_store.store_dir} ({len(chunk_store)} chunks)")
+    table_store = get_table_store()
+    
     # Initialize Qdrant
     print(f"\n[INFO] Connecting to Qdrant...")
-    client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    client = get_qdrant_client()
     
     if not initialize_collection(client):
         return
     
     # Process each MD file
-    all_points = []
     total_chunks = 0
     processed_count = 0
     
     for md_file in md_files:
-        # Extract ticker from filename
-        ticker = extract_ticker_from_filename(md_file.name)
-        
-        # Extract year from filename if available (e.g., AAPL_2024.md)
-        year = "2024"  # Default
-        name_parts = md_file.stem.split('_')
-        for part in name_parts:
-            if part.isdigit() and len(part) == 4:
-                year = part
-                break
-        
-        print(f"\n[PROCESSING] {ticker} ({year}) - {md_file.name}...")
-        
         try:
-            # Read and clean file
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Clean XBRL noise
-            content = clean_xbrl_noise(content)
-            
-            # Chunk by sections
-            chunks = chunk_by_sections(content, ticker)
-            
-            print(f"  -> Found {len(chunks)} sections")
-            
-            # Create embeddings and prepare points
-            for chunk in chunks:
-                # Generate embedding
-                embedding = embedding_model.encode(chunk['text'], convert_to_numpy=True).tolist()
-                
-                # Create point
-                point = PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload={
-                        'ticker': ticker,
-                        'section': chunk['section'],
-                        'text': chunk['text'],
-                        'start_line': chunk['start_line'],
-                        'end_line': chunk['end_line'],
-                        'year': year,
-                        'file_path': str(md_file),
-                        'chunk_length': len(chunk['text']),
-                        'tables_count': chunk['text'].count('| --- |')  # Rough estimate
-                    }
-                )
-                all_points.append(point)
-                total_chunks += 1
-            
-            processed_count += 1
-            
-            # Batch upload every 100 chunks
-            if len(all_points) >= 100:
-                client.upsert(collection_name=COLLECTION_NAME, points=all_points)
-                print(f"  -> Uploaded {len(all_points)} chunks to Qdrant")
-                all_points = []
-        
+            chunk_count = index_filing(md_file, client, embedding_model, chunk_store, table_store)
         except Exception as e:
             print(f"  [ERROR] Failed to process {md_file.name}: {e}")
             continue
+        if chunk_count:
+            total_chunks += chunk_count
+            processed_count += 1
     
-    # Upload remaining points
-    if all_points:
-        client.upsert(collection_name=COLLECTION_NAME, points=all_points)
-        print(f"\n[SUCCESS] Uploaded final {len(all_points)} chunks")
+    # Collection was recreated, so every cached answer is stale
+    invalidate_response_cache()
     
     print(f"\n{'='*80}")
     print(f"[COMPLETE] Indexed {total_chunks} chunks from {processed_count} companies")
@@ -1,33 +1,42 @@
 """
 Convert all HTML files to Markdown for all 89 companies
-Uses the CORRECT method: Extract from <TEXT> tag, then convert with markdownify
+Uses the CORRECT method: Extract from <TEXT> tag, then convert with the
+streaming converter (markdownify when lxml is not installed)
 """
 
 import re
 import os
-import markdownify
+import sys
 from pathlib import Path
 from tqdm import tqdm
 
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.utils.sec_header import DEFAULT_FISCAL_YEAR, extract_fiscal_year, filing_stem
+from backend.app.utils.markdown_converter import convert_html_to_markdown_with_stats
+
 def extract_10k_html_from_txt(file_path):
-    """Extract FULL 10-K HTML from full-submission.txt using <TEXT> tag method"""
+    """
+    Extract FULL 10-K HTML from full-submission.txt using <TEXT> tag method.
+    Returns (html_content, fiscal_year); html_content is None on failure.
+    """
     try:
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
             content = f.read()
         
+        fiscal_year = extract_fiscal_year(content) or DEFAULT_FISCAL_YEAR
+        
         # Find the first DOCUMENT section with TYPE=10-K and extract from <TEXT> tag
         pattern = r'<DOCUMENT>.*?<TYPE>10-K.*?<TEXT>(.*?)</TEXT>.*?</DOCUMENT>'
         match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
         
         if match:
-            return match.group(1)
-        return None
+            return match.group(1), fiscal_year
+        return None, fiscal_year
     except Exception as e:
-        return None
-
-def convert_html_to_markdown(html_content):
-    """Convert HTML to Markdown using markdownify"""
-    return markdownify.markdownify(html_content, heading_style="ATX")
+        return None, None
 
 def process_all_companies(data_dir="data", output_dir="processed_data"):
     """Process all companies: TXT -> HTML -> Markdown"""
@@ -52,7 +61,7 @@ def process_all_companies(data_dir="data", output_dir="processed_data"):
             ticker = parts[-4]  # data/TICKER/10-K/...
             txt_files.append((ticker, txt_file))
     
-    print(f"Found {len(txt_files)} companies to process\n")
+    print(f"Found {len(txt_files)} filings to process\n")
     
     if not txt_files:
         print(f"[ERROR] No files found in {data_dir}")
@@ -67,7 +76,7 @@ def process_all_companies(data_dir="data", output_dir="processed_data"):
     for ticker, txt_file in tqdm(txt_files, desc="Processing companies"):
         try:
             # Step 1: Extract HTML from TXT
-            html_content = extract_10k_html_from_txt(txt_file)
+            html_content, fiscal_year = extract_10k_html_from_txt(txt_file)
             
             if not html_content:
                 print(f"\n[{ticker}] [ERROR] Could not extract HTML")
@@ -76,10 +85,10 @@ def process_all_companies(data_dir="data", output_dir="processed_data"):
                 continue
             
             # Step 2: Convert HTML to Markdown
-            markdown_text = convert_html_to_markdown(html_content)
+            markdown_text, stats = convert_html_to_markdown_with_stats(html_content)
             
-            # Step 3: Save Markdown file
-            md_file = output_path / f"{ticker}_2024.md"
+            # Step 3: Save Markdown file (one per filing: TICKER_YEAR.md)
+            md_file = output_path / f"{filing_stem(ticker, fiscal_year)}.md"
             with open(md_file, 'w', encoding='utf-8') as f:
                 f.write(markdown_text)
             
@@ -89,14 +98,17 @@ def process_all_companies(data_dir="data", output_dir="processed_data"):
             md_lines = len(markdown_text.splitlines())
             table_count = markdown_text.count('|') // 3  # Rough estimate
             
-            print(f"\n[{ticker}] Converted: {ticker}_2024.md")
-            print(f"    HTML: {html_size_mb:.2f} MB -> Markdown: {md_size_mb:.2f} MB")
+            print(f"\n[{ticker}] Converted: {md_file.name}")
+            print(f"    HTML: {html_size_mb:.2f} MB -> Markdown: {md_size_mb:.2f} MB "
+                  f"in {stats['seconds']:.2f}s ({stats['mb_per_s']:.1f} MB/s)")
             print(f"    Lines: {md_lines:,}, Tables: ~{table_count}")
             
             results.append({
                 'ticker': ticker,
+                'year': fiscal_year,
                 'html_size_mb': html_size_mb,
                 'md_size_mb': md_size_mb,
+                'seconds': stats['seconds'],
                 'md_lines': md_lines,
                 'success': True
             })
@@ -123,7 +135,13 @@ def process_all_companies(data_dir="data", output_dir="processed_data"):
         total_md_lines = sum(r['md_lines'] for r in results)
         avg_tokens = (total_md_lines * 50) / len(results)  # Rough estimate: 50 tokens per line
         
+        total_html_size = sum(r['html_size_mb'] for r in results)
+        total_seconds = sum(r['seconds'] for r in results)
+        
         print(f"\nTotal Markdown size: {total_md_size:.2f} MB")
+        if total_seconds > 0:
+            print(f"Conversion throughput: {total_html_size:.1f} MB HTML in {total_seconds:.1f}s "
+                  f"({total_html_size / total_seconds:.1f} MB/s)")
         print(f"Total Markdown lines: {total_md_lines:,}")
         print(f"Average tokens per file: ~{avg_tokens:,.0f}")
         print(f"All files fit easily in Gemini 2.5 Flash (1M+ token capacity)")
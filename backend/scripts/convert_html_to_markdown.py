@@ -1,30 +1,32 @@
 """
 Convert all HTML 10-K files to Markdown format
-Based on reference: htmltomdreference.txt
-Simple conversion using markdownify with heading_style="ATX"
+Uses the streaming converter in backend.app.utils.markdown_converter
+(markdownify with heading_style="ATX" when lxml is not installed)
 """
 
-import markdownify
+import sys
 from pathlib import Path
 from tqdm import tqdm
 
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.utils.markdown_converter import convert_html_file_to_markdown
+from backend.app.utils.sec_header import filing_stem, parse_filing_name
+
 def convert_html_to_markdown(html_file_path, output_dir):
-    """Convert a single HTML file to Markdown - simple approach from reference"""
+    """Convert a single HTML file to Markdown (streamed from disk)"""
     try:
-        # Read HTML
-        with open(html_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            html_content = f.read()
-        
-        # Extract ticker from filename (e.g., AAPL_10K_HTML.html -> AAPL)
-        ticker = html_file_path.stem.replace('_10K_HTML', '').upper()
+        # Extract ticker and fiscal year from filename
+        # (e.g., AAPL_2024_10K_HTML.html -> AAPL, 2024; legacy AAPL_10K_HTML.html -> AAPL)
+        ticker, year, _ = parse_filing_name(html_file_path)
         
-        # Convert HTML to Markdown - EXACTLY as in reference
-        # This keeps tables as | Column 1 | Column 2 | instead of mushy text
-        markdown_text = markdownify.markdownify(html_content, heading_style="ATX")
+        # Convert HTML to Markdown: tables come out as | Column 1 | Column 2 |
+        markdown_text, stats = convert_html_file_to_markdown(html_file_path)
         
-        # Save Markdown file - use format: TICKER_2024.md (or extract year if needed)
-        # For now, using 2024 as default (most filings are 2024)
-        output_file = output_dir / f"{ticker}_2024.md"
+        # Save Markdown file - one per filing: TICKER_YEAR.md
+        output_file = output_dir / f"{filing_stem(ticker, year)}.md"
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(markdown_text)
         
@@ -34,8 +36,12 @@ def convert_html_to_markdown(html_file_path, output_dir):
         
         return {
             'ticker': ticker,
+            'year': year,
+            'file_name': output_file.name,
             'size_mb': md_size_mb,
             'tables': table_count,
+            'html_mb': stats['input_mb'],
+            'seconds': stats['seconds'],
             'success': True
         }
     except Exception as e:
@@ -50,7 +56,7 @@ def convert_all_html_files(html_dir="output", output_dir="processed_data"):
     
     print("="*80)
     print("CONVERTING HTML TO MARKDOWN")
-    print("Using simple markdownify approach (from reference)")
+    print("Using the streaming HTML -> Markdown converter")
     print("="*80)
     print()
     
@@ -78,8 +84,9 @@ def convert_all_html_files(html_dir="output", output_dir="processed_data"):
         results.append(result)
         
         if result['success']:
-            print(f"\n[{result['ticker']}] Converted: {result['ticker']}_2024.md")
-            print(f"    Size: {result['size_mb']:.2f} MB, Tables: ~{result['tables']}")
+            print(f"\n[{result['ticker']}] Converted: {result['file_name']}")
+            print(f"    Size: {result['size_mb']:.2f} MB, Tables: ~{result['tables']}, "
+                  f"{result['html_mb']:.1f} MB HTML in {result['seconds']:.2f}s")
             success_count += 1
         else:
             print(f"\n[{result['ticker']}] [ERROR] {result.get('error', 'Unknown error')}")
@@ -92,17 +99,23 @@ def convert_all_html_files(html_dir="output", output_dir="processed_data"):
     print(f"Total HTML files: {len(html_files)}")
     print(f"Successfully converted: {success_count}")
     print(f"Failed: {failed_count}")
+    converted = [r for r in results if r['success']]
+    total_seconds = sum(r['seconds'] for r in converted)
+    if total_seconds > 0:
+        total_html_mb = sum(r['html_mb'] for r in converted)
+        print(f"Throughput: {total_html_mb:.1f} MB HTML in {total_seconds:.1f}s "
+              f"({total_html_mb / total_seconds:.1f} MB/s)")
     print(f"\nAll Markdown files saved to: {output_path.absolute()}")
     
     # Show sample of first successful conversion
     if results and results[0]['success']:
-        sample_file = output_path / f"{results[0]['ticker']}_2024.md"
+        sample_file = output_path / results[0]['file_name']
         if sample_file.exists():
             with open(sample_file, 'r', encoding='utf-8') as f:
                 sample_content = f.read(2000)  # First 2000 chars
             
             print("\n" + "="*80)
-            print(f"SAMPLE MARKDOWN ({results[0]['ticker']}_2024.md):")
+            print(f"SAMPLE MARKDOWN ({results[0]['file_name']}):")
             print("="*80)
             print(sample_content)
             print("...")
@@ -4,27 +4,42 @@ Processes all companies and saves HTML files to output folder
 """
 
 import re
+import sys
 from pathlib import Path
 from tqdm import tqdm
 
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.utils.sec_header import DEFAULT_FISCAL_YEAR, extract_fiscal_year, filing_stem
+from backend.app.utils.cik_map import ticker_from_sec_header
+
 def extract_10k_html(file_path):
-    """Extract the main 10-K HTML content from a full-submission.txt file"""
+    """
+    Extract the main 10-K HTML content from a full-submission.txt file.
+    Returns (html_content, fiscal_year, cik_ticker); html_content is None on failure,
+    cik_ticker is None when the header CIK is not in the CIK table.
+    """
     try:
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
             content = f.read()
         
+        fiscal_year = extract_fiscal_year(content) or DEFAULT_FISCAL_YEAR
+        cik_ticker = ticker_from_sec_header(content)
+        
         # Find the first DOCUMENT section with TYPE=10-K
         pattern = r'<DOCUMENT>.*?<TYPE>10-K.*?<TEXT>(.*?)</TEXT>.*?</DOCUMENT>'
         match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
         
         if match:
             html_content = match.group(1)
-            return html_content
+            return html_content, fiscal_year, cik_ticker
         else:
-            return None
+            return None, fiscal_year, cik_ticker
     except Exception as e:
         print(f"    [ERROR] Failed to read file: {e}")
-        return None
+        return None, None, None
 
 def get_all_10k_files(data_dir):
     """Find all full-submission.txt files in the data directory"""
@@ -56,7 +71,7 @@ def process_all_companies(data_dir="data", output_dir="output"):
     # Get all files
     print("Scanning for 10-K filings...")
     all_files = get_all_10k_files(data_dir)
-    print(f"Found {len(all_files)} companies to process\n")
+    print(f"Found {len(all_files)} filings to process\n")
     
     # Process each file
     success_count = 0
@@ -66,11 +81,15 @@ def process_all_companies(data_dir="data", output_dir="output"):
     for ticker, file_path in tqdm(all_files, desc="Processing companies"):
         print(f"\n[{ticker}] Processing {file_path.name}...")
         
-        html_content = extract_10k_html(file_path)
+        html_content, fiscal_year, cik_ticker = extract_10k_html(file_path)
+        if cik_ticker and cik_ticker != ticker:
+            # The CIK identifies the filer; the download folder name can be wrong
+            print(f"    [WARNING] Folder says {ticker}, CIK says {cik_ticker}; using {cik_ticker}")
+            ticker = cik_ticker
         
         if html_content:
-            # Save HTML file
-            output_file = output_path / f"{ticker}_10K_HTML.html"
+            # Save HTML file (one per filing: TICKER_YEAR_10K_HTML.html)
+            output_file = output_path / f"{filing_stem(ticker, fiscal_year)}_10K_HTML.html"
             
             try:
                 with open(output_file, 'w', encoding='utf-8') as f:
@@ -7,11 +7,12 @@ import json
 import uuid
 from pathlib import Path
 from typing import List, Dict, Any
-import os
 
 try:
     from qdrant_client import QdrantClient
-    from qdrant_client.models import Distance, VectorParams, PointStruct
+    from qdrant_client.models import (
+        Distance, VectorParams, HnswConfigDiff, PointStruct
+    )
 except ImportError:
     print("❌ qdrant-client not installed. Run: pip install qdrant-client")
     exit(1)
@@ -23,17 +24,6 @@ except ImportError:
     SentenceTransformer = None
 
 # Configuration
-# Qdrant Cloud Configuration
-QDRANT_URL = os.getenv("QDRANT_URL", "")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
-
-if not QDRANT_URL or not QDRANT_API_KEY:
-    print("[ERROR] QDRANT_URL and QDRANT_API_KEY must be set in environment variables or .env file")
-    print("Please create a .env file with your Qdrant credentials")
-    exit(1)
-COLLECTION_NAME = "financial_reports"
-EMBEDDING_DIM = 384  # all-MiniLM-L6-v2 dimension
-EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Fast, free, good quality
 # Paths relative to project root
 import sys
 from pathlib import Path
@@ -42,6 +32,24 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+# Qdrant Cloud Configuration (shared with the API server, no Gemini key needed)
+from backend.app.paths import (
+    QDRANT_MODE, QDRANT_URL, QDRANT_API_KEY, QDRANT_LOCAL_PATH,
+    VECTOR_QUANTIZATION, HNSW_M, HNSW_EF_CONSTRUCT, COLLECTION_NAME
+)
+from backend.app.services.qdrant_service import (
+    get_qdrant_client, get_quantization_config, create_payload_indexes, REPORT_INDEX_FIELDS
+)
+from backend.app.services.response_cache import invalidate_response_cache
+from backend.app.utils.sec_header import filing_stem, parse_filing_name
+
+if QDRANT_MODE == "remote" and (not QDRANT_URL or not QDRANT_API_KEY):
+    print("[ERROR] QDRANT_URL and QDRANT_API_KEY must be set in environment variables or .env file")
+    print("Please create a .env file with your Qdrant credentials")
+    exit(1)
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2 dimension
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Fast, free, good quality
+
 METADATA_FILE = project_root / "conversion_metadata.json"
 PROCESSED_DATA_DIR = project_root / "processed_data"
 
@@ -124,6 +132,7 @@ def initialize_qdrant(client: QdrantClient) -> bool:
                 client.delete_collection(COLLECTION_NAME)
                 print(f"   Deleted existing collection.")
             else:
+                create_payload_indexes(client, COLLECTION_NAME, REPORT_INDEX_FIELDS)
                 return True
         
         # Create collection
@@ -132,9 +141,12 @@ def initialize_qdrant(client: QdrantClient) -> bool:
             vectors_config=VectorParams(
                 size=EMBEDDING_DIM,
                 distance=Distance.COSINE
-            )
+            ),
+            hnsw_config=HnswConfigDiff(m=HNSW_M, ef_construct=HNSW_EF_CONSTRUCT, payload_m=HNSW_M),
+            quantization_config=get_quantization_config()
         )
-        print(f"[SUCCESS] Created collection '{COLLECTION_NAME}' with dimension {EMBEDDING_DIM}")
+        create_payload_indexes(client, COLLECTION_NAME, REPORT_INDEX_FIELDS)
+        print(f"[SUCCESS] Created collection '{COLLECTION_NAME}' with dimension {EMBEDDING_DIM} (quantization: {VECTOR_QUANTIZATION})")
         return True
     except Exception as e:
         print(f"[ERROR] Error initializing Qdrant: {e}")
@@ -181,13 +193,19 @@ def index_companies(client: QdrantClient, embedding_fn) -> int:
             failed.append(ticker)
             continue
         
+        # Fiscal year: metadata, else the TICKER_YEAR.md file name
+        _, name_year, source = parse_filing_name(markdown_path)
+        year = company_data.get('year') or name_year
+        
         # Create point
         point = PointStruct(
             id=str(uuid.uuid4()),
             vector=embedding,
             payload={
                 "ticker": ticker,
-                "year": company_data.get('year', '2024'),
+                "year": year,
+                "ticker_year": filing_stem(ticker, year),
+                "source": source,  # "original" here; index_uploaded_files tags uploads
                 "file_path": str(markdown_path),
                 "summary": summary[:1000],  # Store truncated summary
                 "tables_count": company_data.get('estimated_tables', 0),
@@ -247,18 +265,19 @@ def main():
     print("Financial Reports Vector Indexer")
     print("=" * 60)
     
-    # Check Qdrant connection (Cloud)
-    print(f"\n[INFO] Connecting to Qdrant Cloud...")
-    print(f"   URL: {QDRANT_URL}")
+    # Check Qdrant connection (Cloud, or embedded local store)
+    if QDRANT_MODE == "local":
+        print(f"\n[INFO] Opening embedded Qdrant store...")
+        print(f"   Path: {QDRANT_LOCAL_PATH}")
+    else:
+        print(f"\n[INFO] Connecting to Qdrant Cloud...")
+        print(f"   URL: {QDRANT_URL}")
     try:
-        client = QdrantClient(
-            url=QDRANT_URL,
-            api_key=QDRANT_API_KEY
-        )
+        client = get_qdrant_client()
         
         # Test connection
         client.get_collections()
-        print("[SUCCESS] Connected to Qdrant Cloud!")
+        print("[SUCCESS] Connected to Qdrant!")
     except Exception as e:
         print(f"[ERROR] Failed to connect to Qdrant: {e}")
         print("\n💡 Check your QDRANT_URL and QDRANT_API_KEY in .env file")
@@ -281,6 +300,7 @@ def main():
     indexed_count = index_companies(client, embedding_fn)
     
     if indexed_count > 0:
+        invalidate_response_cache()
         verify_index(client)
         print(f"\n[SUCCESS] Indexing complete! {indexed_count} companies indexed.")
         print(f"\n[INFO] Next step: Build the FastAPI agent (server.py)")
@@ -8,10 +8,13 @@ import json
 import uuid
 from pathlib import Path
 from typing import List, Dict, Any
-import os
+
+from backend.app.paths import QDRANT_MODE, QDRANT_URL, QDRANT_API_KEY, COLLECTION_NAME
+from backend.app.services.qdrant_service import get_qdrant_client
+from backend.app.services.response_cache import invalidate_response_cache
+from backend.app.utils.sec_header import filing_stem, parse_filing_name
 
 try:
-    from qdrant_client import QdrantClient
     from qdrant_client.models import Distance, VectorParams, PointStruct
 except ImportError:
     print("❌ qdrant-client not installed. Run: pip install qdrant-client")
@@ -24,13 +27,9 @@ except ImportError:
     exit(1)
 
 # Configuration
-QDRANT_URL = os.getenv("QDRANT_URL", "")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
-
-if not QDRANT_URL or not QDRANT_API_KEY:
+if QDRANT_MODE == "remote" and (not QDRANT_URL or not QDRANT_API_KEY):
     print("[ERROR] QDRANT_URL and QDRANT_API_KEY must be set in environment variables or .env file")
     exit(1)
-COLLECTION_NAME = "financial_reports"
 EMBEDDING_DIM = 384
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 PROCESSED_DATA_DIR = Path("processed_data")
@@ -84,12 +83,6 @@ def find_uploaded_files() -> List[Path]:
     return uploaded_files
 
 
-def extract_ticker_from_filename(filename: str) -> str:
-    """Extract ticker from filename like 'AAPL_uploaded.md'."""
-    parts = filename.replace('_uploaded.md', '').split('_')
-    return parts[0].upper() if parts else "UNKNOWN"
-
-
 def main():
     """Index all uploaded files in Qdrant."""
     print("="*80)
@@ -114,7 +107,7 @@ def main():
     
     # Initialize Qdrant
     print(f"\n[INFO] Connecting to Qdrant...")
-    client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    client = get_qdrant_client()
     
     # Check if collection exists
     collections = client.get_collections()
@@ -133,8 +126,8 @@ def main():
     failed_count = 0
     
     for i, md_file in enumerate(uploaded_files, 1):
-        ticker = extract_ticker_from_filename(md_file.name)
-        print(f"[{i}/{len(uploaded_files)}] Processing {ticker}...")
+        ticker, year, _ = parse_filing_name(md_file)
+        print(f"[{i}/{len(uploaded_files)}] Processing {ticker} ({year})...")
         
         try:
             # Extract summary
@@ -156,7 +149,8 @@ def main():
                 vector=embedding,
                 payload={
                     "ticker": ticker,
-                    "year": "2024",  # Could extract from content
+                    "year": year,
+                    "ticker_year": filing_stem(ticker, year),
                     "file_path": str(md_file),
                     "summary": summary[:1000],
                     "tables_count": tables_count,
@@ -169,6 +163,7 @@ def main():
             
             # Upsert to Qdrant
             client.upsert(collection_name=COLLECTION_NAME, points=[point])
+            invalidate_response_cache(ticker)
             
             print(f"  ✅ Indexed: {ticker} ({file_size_mb:.2f} MB, {lines_count:,} lines)")
             indexed_count += 1
@@ -0,0 +1,84 @@
+"""
+Financial table cell parsing (utils.cell_parser)
+Accounting negatives, currency, scale suffixes, percentages, nil dashes and
+the malformed cells that must not parse as numbers.
+
+Usage:
+    python -m backend.tests.test_cell_parser
+"""
+
+import math
+
+from backend.app.services.table_store import _split_cells
+from backend.app.utils.cell_parser import parse_cell, parse_scaled, parse_column, detect_scale, is_percent
+
+
+def test_accounting_negatives():
+    assert parse_cell("(321)") == -321.0
+    assert parse_cell("$ (1,234)") == -1234.0
+    assert parse_cell("($ 12.5)") == -12.5
+    assert parse_cell("-321") == -321.0
+    assert parse_cell("−4.2") == -4.2  # Unicode minus
+
+
+def test_currency_and_separators():
+    assert parse_cell("$ 1,234") == 1234.0
+    assert parse_cell("$1,234,567.89") == 1234567.89
+    assert parse_cell(".5") == 0.5
+    assert parse_cell("$") is None
+
+
+def test_scale_suffixes():
+    assert parse_cell("$1.2B") == 1.2e9
+    assert parse_cell("350M") == 350e6
+    assert parse_cell("4 thousand") == 4000.0
+    assert parse_cell("(2.5 billion)") == -2.5e9
+    assert parse_cell("5M%") is None
+    # A cell's own suffix wins over the caption scale
+    assert parse_scaled("$1.2B", detect_scale("(In millions)")) == 1.2e9
+    assert parse_scaled("(1,234)", detect_scale("(In millions, except per-share amounts)")) == -1234e6
+
+
+def test_percentages():
+    assert parse_cell("15%") == 15.0
+    assert parse_cell("(2.5)%") == -2.5
+    assert parse_cell("(2.5%)") == -2.5
+    assert is_percent("(2.5)%") and is_percent("15%") and not is_percent("(15)")
+    assert parse_scaled("15%", 1e6) == 15.0
+
+
+def test_nil_and_blank():
+    assert parse_cell("—") == 0.0
+    assert parse_cell("–") == 0.0
+    assert parse_cell("-") == 0.0
+    assert parse_cell("") is None
+    assert parse_cell("   ") is None
+    assert parse_cell("Net sales") is None
+
+
+def test_unbalanced_parens_are_not_numbers():
+    assert parse_cell("(5") is None
+    assert parse_cell("5)") is None
+    assert parse_cell("$ (5") is None
+    assert parse_cell("12)%") is None
+    assert parse_cell("((5)") is None
+
+
+def test_split_closing_paren_is_rejoined():
+    # Filings put the closing paren in its own cell; the column positions stay put
+    cells = _split_cells("| Net loss | $ | (160,385 | ) | | (2.5 | )% |")
+    assert cells == ["Net loss", "$", "(160,385)", "", "", "(2.5)%", ""]
+    assert parse_cell(cells[2]) == -160385.0 and parse_cell(cells[5]) == -2.5
+
+
+def test_parse_column():
+    column = parse_column(["(1)", "2", "—", "n/a", "(3"], scale=1e3)
+    assert list(column[:3]) == [-1000.0, 2000.0, 0.0]
+    assert math.isnan(column[3]) and math.isnan(column[4])
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[SUCCESS] {name}")
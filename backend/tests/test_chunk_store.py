@@ -0,0 +1,76 @@
+"""
+Chunk text store (services.chunk_store) on a temporary directory
+Append, reopen and read through mmap, including appends made by another
+instance (the indexing script) after a reader has mapped the file.
+
+Usage:
+    python -m backend.tests.test_chunk_store
+"""
+
+import tempfile
+from pathlib import Path
+
+from backend.app.services.chunk_store import ChunkStore, make_chunk_id, INDEX_DTYPE
+
+TEXTS = {
+    "AAPL_2024": ["Item 1. Business\nApple designs smartphones.", "Item 1A. Risk Factors\nSupply chain — résumé ✓"],
+    "MSFT_2024": ["Item 7. MD&A\nAzure revenue grew 30%."],
+}
+
+
+def chunks():
+    return {make_chunk_id(filing, text): text for filing, texts in TEXTS.items() for text in texts}
+
+
+def test_chunk_ids_are_content_addressed():
+    text = TEXTS["AAPL_2024"][0]
+    assert make_chunk_id("AAPL_2024", text) == make_chunk_id("AAPL_2024", text)
+    assert make_chunk_id("AAPL_2024", text) != make_chunk_id("AAPL_2023", text)
+
+
+def test_append_and_reopen_roundtrip():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ChunkStore(Path(tmp))
+        assert store.get(make_chunk_id("AAPL_2024", "missing")) is None
+        assert store.put_many(chunks()) == 3
+        assert store.put_many(chunks()) == 0  # Already stored: no-op
+        for chunk_id, text in chunks().items():
+            assert store.get(chunk_id) == text
+
+        reopened = ChunkStore(Path(tmp))
+        assert len(reopened) == 3
+        assert reopened.get_many(list(chunks()) + [make_chunk_id("X", "y")]) == chunks()
+        # Zero-copy view into the mapped file
+        view = reopened.get_bytes(next(iter(chunks())))
+        assert isinstance(view, memoryview) and str(view, 'utf-8') == TEXTS["AAPL_2024"][0]
+
+
+def test_reader_sees_appends_from_another_writer():
+    with tempfile.TemporaryDirectory() as tmp:
+        reader = ChunkStore(Path(tmp))
+        writer = ChunkStore(Path(tmp))
+        first = {make_chunk_id("AAPL_2024", "first"): "first"}
+        second = {make_chunk_id("AAPL_2024", "second chunk"): "second chunk"}
+        writer.put_many(first)
+        assert reader.get(next(iter(first))) == "first"  # Mapped on the miss
+        writer.put_many(second)
+        assert reader.get(next(iter(second))) == "second chunk"  # Remapped after the file grew
+        assert reader.get(next(iter(first))) == "first"
+
+
+def test_torn_index_record_is_ignored():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ChunkStore(Path(tmp))
+        store.put_many(chunks())
+        with open(store.index_path, 'ab') as f:
+            f.write(b'\0' * (INDEX_DTYPE.itemsize // 2))  # Writer died mid-record
+        reopened = ChunkStore(Path(tmp))
+        assert len(reopened) == 3
+        assert reopened.get_many(list(chunks())) == chunks()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,109 @@
+"""
+Knowledge graph entity extraction over real filing text, and the per-filing
+document bookkeeping used by /upload (replace, remove, round trip).
+The excerpts are copied from processed_data (AMZN_2024.md executive officers
+and insider trading plans, BA_2024.md and ADP_2024.md).
+
+Usage:
+    python -m backend.tests.test_knowledge_graph
+"""
+
+from backend.app.services.knowledge_graph import FinancialKnowledgeGraph
+
+AMZN_EXCERPT = """\
+| Name | | |  | | | Age | | |  | | | Position | | |
+| Andrew R. Jassy | | |  | | | 57 | | |  | | | President and Chief Executive Officer | | |
+| Matthew S. Garman | | |  | | | 48 | | |  | | | CEO Amazon Web Services | | |
+| Douglas J. Herrington | | |  | | | 58 | | |  | | | CEO Worldwide Amazon Stores | | |
+
+Andrew R. Jassy. Mr. Jassy has served as President and Chief Executive Officer since July 2021, \
+CEO Amazon Web Services from April 2016 until July 2021, and Senior Vice President, Amazon Web Services, \
+from April 2006 until April 2016.
+
+On November 7, 2024, Douglas Herrington, CEO Worldwide Amazon Stores, adopted a trading plan intended \
+to satisfy Rule 10b5-1(c) to sell up to 158,970 shares of Amazon.com, Inc. common stock over a period \
+ending on December 31, 2025, subject to certain conditions.
+On November 18, 2024, Andrew Jassy, President and Chief Executive Officer, adopted a trading plan \
+intended to satisfy Rule 10b5-1(c) to sell up to 80,400 shares of Amazon.com, Inc. common stock over a \
+period ending on December 31, 2025, subject to certain conditions.
+"""
+
+TITLE_ONLY_EXCERPT = """\
+| D. Christopher Raymond | | | 60 | | | Executive Vice President, President and Chief Executive Officer, \
+Boeing Global Services | | |
+The information under "Executive Compensation," "CEO Pay Ratio," "Pay versus Performance," and \
+"Restricted Stock Unit, CEO" awards is incorporated by reference.
+"""
+
+
+def people(text: str, ticker: str):
+    return {e['text'] for e in FinancialKnowledgeGraph().extract_entities(text, ticker) if e['type'] == 'PERSON'}
+
+
+def test_person_names_from_filing():
+    assert people(AMZN_EXCERPT, "AMZN") == {"Douglas Herrington", "Andrew Jassy"}
+
+
+def test_titles_are_not_people():
+    assert people(TITLE_ONLY_EXCERPT, "BA") == set()
+    assert people("Chief Executive Officer of Optum Rx, President of Optum Health", "UNH") == set()
+
+
+def test_works_at_edges_only_for_people():
+    graph = FinancialKnowledgeGraph()
+    graph.add_document(AMZN_EXCERPT + TITLE_ONLY_EXCERPT, "AMZN", {'doc_id': "AMZN_2024"})
+    works_at = {(source, target) for source, target, relationship in graph.edges if relationship == 'WORKS_AT'}
+    assert works_at == {("PERSON_Douglas Herrington", "COMPANY_AMZN"), ("PERSON_Andrew Jassy", "COMPANY_AMZN")}
+
+
+AAPL_TEXT = "Apple reported Revenue and Net Income growth. Apple competes with Microsoft and Samsung in devices."
+MSFT_TEXT = "Microsoft reported Revenue from Azure; Microsoft competes with Amazon and Google in cloud services."
+NVDA_TEXT = "NVIDIA reported record Revenue and EBITDA; NVIDIA competes with AMD and Intel in accelerators."
+
+
+def snapshot(graph: FinancialKnowledgeGraph):
+    """Nodes (with mentions), edges (with weights) and documents, order-independent."""
+    data = graph.to_dict()
+    return (
+        {node['id']: node.get('mentions', 0) for node in data['nodes']},
+        {(source, target, relationship): weight for source, target, relationship, weight, _ in data['edges']},
+        set(data['documents'])
+    )
+
+
+def test_merge_then_remove_round_trips():
+    graph = FinancialKnowledgeGraph()
+    graph.add_document(AAPL_TEXT, "AAPL", {'doc_id': "AAPL_2024"})
+    graph.add_document(MSFT_TEXT, "MSFT", {'doc_id': "MSFT_2024"})
+    before = snapshot(graph)
+
+    graph.add_document(NVDA_TEXT, "NVDA", {'doc_id': "NVDA_2024"})
+    assert "COMPANY_NVDA" in graph.nodes and "METRIC_EBITDA" in graph.nodes
+    assert graph.remove_document("NVDA_2024")
+    assert snapshot(graph) == before
+    # Orphans are gone from the adjacency indexes too
+    assert graph.neighbors("COMPANY_NVDA", 'COMPETES_WITH', 'both') == []
+    assert not graph.remove_document("NVDA_2024")
+
+
+def test_upload_replaces_original_filing():
+    graph = FinancialKnowledgeGraph()
+    graph.add_document(MSFT_TEXT, "MSFT", {'doc_id': "MSFT_2024"})
+    graph.add_document(AAPL_TEXT, "AAPL", {'doc_id': "AAPL_2024"})
+
+    upload = FinancialKnowledgeGraph()
+    upload.add_document(MSFT_TEXT, "MSFT", {'doc_id': "MSFT_2024"})
+    upload.add_document(AAPL_TEXT + " Apple also reported EPS.", "AAPL", {'doc_id': "AAPL_2024"})
+
+    # Same filing stem: the upload's contribution replaces the original's
+    graph.add_document(AAPL_TEXT + " Apple also reported EPS.", "AAPL", {'doc_id': "AAPL_2024"})
+    assert snapshot(graph) == snapshot(upload)
+    assert graph.edges[("COMPANY_AAPL", "METRIC_Revenue", 'HAS_METRIC')]['weight'] == \
+        upload.edges[("COMPANY_AAPL", "METRIC_Revenue", 'HAS_METRIC')]['weight']
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[SUCCESS] {name}")
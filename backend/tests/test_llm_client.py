@@ -0,0 +1,247 @@
+"""
+LLMClient against a local fake Gemini server
+Covers retries, hedging and the request/token rate limits over real HTTP.
+The fake server speaks the generateContent REST call, so the last test also
+drives google-generativeai through GEMINI_API_ENDPOINT when it is installed.
+
+Usage:
+    python -m backend.tests.test_llm_client
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# config.py validates these on import; the fake server ignores the key
+os.environ.setdefault("GOOGLE_API_KEY", "fake-gemini-key")
+os.environ.setdefault("QDRANT_MODE", "memory")
+
+from backend.app.services import llm_service
+from backend.app.services.llm_service import LLMClient, LLMRateLimitError, LLMTimeoutError
+
+ERROR_STATUS = {400: "INVALID_ARGUMENT", 429: "RESOURCE_EXHAUSTED", 503: "UNAVAILABLE"}
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    """
+    generateContent endpoint on 127.0.0.1. Each request takes the next
+    (status, delay_seconds) from script; an empty script answers 200 at once.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, script=()):
+        super().__init__(("127.0.0.1", 0), FakeGeminiHandler)
+        self.script = deque(script)
+        self.requests = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def next_reply(self):
+        with self._lock:
+            self.requests += 1
+            return self.script.popleft() if self.script else (200, 0.0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status, delay = self.server.next_reply()
+        time.sleep(delay)
+        if status == 200:
+            body = {"candidates": [{
+                "content": {"role": "model", "parts": [{"text": f"answer after {delay:.1f}s"}]},
+                "finishReason": "STOP",
+                "index": 0
+            }]}
+        else:
+            body = {"error": {"code": status, "message": "fake error", "status": ERROR_STATUS.get(status, "UNKNOWN")}}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client gave up (deadline or losing hedge)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def generate_fn(server: FakeGeminiServer):
+    """fn(attempt_timeout) for LLMClient.call: one generateContent request, text of the first candidate."""
+    def generate(timeout: float) -> str:
+        request = urllib.request.Request(
+            f"{server.url}/v1beta/models/fake:generateContent",
+            data=json.dumps({"contents": [{"parts": [{"text": "question"}]}]}).encode(),
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.load(response)["candidates"][0]["content"]["parts"][0]["text"]
+    return generate
+
+
+def make_client(**overrides) -> LLMClient:
+    settings = dict(requests_per_minute=600, tokens_per_minute=1_000_000, max_concurrency=4,
+                    timeout_seconds=5.0, max_retries=3, backoff_base=0.01, backoff_max=0.05)
+    settings.update(overrides)
+    return LLMClient(**settings)
+
+
+def test_retries_rate_limit_and_unavailable():
+    with FakeGeminiServer([(429, 0.0), (503, 0.0)]) as server:
+        client = make_client()
+        assert client.call(generate_fn(server)) == "answer after 0.0s"
+        assert server.requests == 3
+        stats = client.get_stats()
+        assert stats["retries"] == 2 and stats.get("failures", 0) == 0
+
+
+def test_client_errors_are_not_retried():
+    with FakeGeminiServer([(400, 0.0)]) as server:
+        client = make_client()
+        try:
+            client.call(generate_fn(server))
+            raise AssertionError("400 should not be retried into a success")
+        except urllib.error.HTTPError as e:
+            assert e.code == 400
+        assert server.requests == 1
+        assert client.get_stats()["failures"] == 1
+
+
+def test_deadline_frees_stuck_call():
+    with FakeGeminiServer([(200, 3.0)]) as server:
+        client = make_client(max_retries=0)
+        start = time.monotonic()
+        try:
+            client.call(generate_fn(server), timeout_seconds=0.5)
+            raise AssertionError("call should have hit its deadline")
+        except (LLMTimeoutError, TimeoutError, urllib.error.URLError):
+            pass
+        assert time.monotonic() - start < 2.0
+        # The HTTP request got the same deadline, so the slot comes back long before the server answers
+        assert client._semaphore.acquire(timeout=1.0)
+        assert time.monotonic() - start < 2.0
+
+
+def test_slot_held_until_abandoned_attempt_ends():
+    release = threading.Event()
+    timeouts = []
+
+    def stuck(timeout: float) -> str:
+        timeouts.append(timeout)
+        release.wait()  # Ignores its timeout, like a hung connection
+        return "late answer"
+
+    client = make_client(max_concurrency=1, max_retries=0)
+    try:
+        client.call(stuck, timeout_seconds=0.2)
+        raise AssertionError("call should have hit its deadline")
+    except LLMTimeoutError:
+        pass
+    assert 0 < timeouts[0] <= 0.2
+    assert client.get_stats()["abandoned"] == 1
+    # The abandoned attempt still runs: no new call may take its slot yet
+    assert not client._semaphore.acquire(timeout=0.1)
+    release.set()
+    assert client._semaphore.acquire(timeout=1.0)
+    client._semaphore.release()
+    assert client.call(lambda timeout: "next answer") == "next answer"
+
+
+def test_hedge_wins_over_slow_attempt():
+    with FakeGeminiServer() as server:
+        client = make_client(hedge=True, hedge_min_samples=3)
+        for _ in range(3):
+            client.call(generate_fn(server))  # Latency samples for the p95
+        server.script.extend([(200, 2.0), (200, 0.0)])
+
+        start = time.monotonic()
+        assert client.call(generate_fn(server)) == "answer after 0.0s"
+        assert time.monotonic() - start < 1.5
+        stats = client.get_stats()
+        assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+        assert server.requests == 5
+
+
+def test_request_rate_limit():
+    with FakeGeminiServer() as server:
+        client = make_client(requests_per_minute=2)
+        client.call(generate_fn(server))
+        client.call(generate_fn(server))
+        try:
+            client.call(generate_fn(server), timeout_seconds=0.5)
+            raise AssertionError("third request within the minute should be refused")
+        except LLMRateLimitError:
+            pass
+        assert server.requests == 2
+        assert client.get_stats()["rate_limited"] == 1
+
+
+def test_token_rate_limit_refunds_request():
+    with FakeGeminiServer() as server:
+        client = make_client(requests_per_minute=60, tokens_per_minute=1000)
+        client.call(generate_fn(server), estimated_tokens=1000)
+        try:
+            client.call(generate_fn(server), estimated_tokens=1000, timeout_seconds=0.5)
+            raise AssertionError("token bucket should be empty")
+        except LLMRateLimitError:
+            pass
+        assert server.requests == 1
+        # Only the call that went out used a request slot
+        assert client.request_bucket.try_acquire(59) == 0.0
+
+
+def test_stats_under_concurrency():
+    with FakeGeminiServer() as server:
+        client = make_client(max_concurrency=8)
+        threads = [threading.Thread(target=lambda: [client.call(generate_fn(server)) for _ in range(10)])
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert client.get_stats()["calls"] == 80
+        assert server.requests == 80
+
+
+def test_gemini_sdk_through_endpoint_override():
+    if not llm_service.GEMINI_AVAILABLE:
+        print("[SKIP] google-generativeai not installed")
+        return
+    saved = (llm_service.GEMINI_API_ENDPOINT, llm_service._gemini_model, llm_service._llm_client)
+    with FakeGeminiServer([(429, 0.0)]) as server:
+        try:
+            llm_service.GEMINI_API_ENDPOINT = server.url
+            llm_service._gemini_model = None
+            llm_service._llm_client = make_client()
+            assert llm_service._generate_text(llm_service.get_gemini_model(), "question") == "answer after 0.0s"
+            assert server.requests == 2
+            assert llm_service._llm_client.get_stats()["retries"] == 1
+        finally:
+            llm_service.GEMINI_API_ENDPOINT, llm_service._gemini_model, llm_service._llm_client = saved
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,96 @@
+"""
+Response cache (services.response_cache) on a temporary SQLite file
+Key normalization, TTL expiry, LRU eviction and per-ticker / global
+version invalidation, including a second instance (an indexing script)
+bumping the version under the API server.
+
+Usage:
+    python -m backend.tests.test_response_cache
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from backend.app.services.response_cache import ResponseCache
+
+
+def make_cache(tmp: str, **overrides) -> ResponseCache:
+    settings = dict(ttl_seconds=3600, max_entries=100)
+    settings.update(overrides)
+    return ResponseCache(Path(tmp) / "responses.sqlite3", **settings)
+
+
+def test_key_normalizes_query_and_tickers():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = make_cache(tmp)
+        key = cache.make_key("What is Apple's revenue?", ["AAPL", "MSFT"])
+        assert cache.make_key("  what is apple's   REVENUE ", ["MSFT", "AAPL", "AAPL"]) == key
+        assert cache.make_key("What is Apple's revenue?", ["AAPL"]) != key
+
+        cache.set(key, ["AAPL", "MSFT"], ["chunk-1"], {'answer': "391B"})
+        assert cache.get(key) == {'answer': "391B"}
+        assert cache.get(cache.make_key("other question", ["AAPL"])) is None
+        stats = cache.get_stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1 and stats['entries'] == 1
+
+
+def test_ttl_expiry():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = make_cache(tmp, ttl_seconds=0.05)
+        key = cache.make_key("apple revenue", ["AAPL"])
+        cache.set(key, ["AAPL"], [], {'answer': "391B"})
+        assert cache.get(key) is not None
+        time.sleep(0.1)
+        assert cache.get(key) is None
+        assert cache.get_stats()['entries'] == 0  # Expired rows are deleted on read
+
+
+def test_lru_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = make_cache(tmp, max_entries=2)
+        keys = [cache.make_key(f"question {i}", ["AAPL"]) for i in range(3)]
+        cache.set(keys[0], ["AAPL"], [], {'answer': 0})
+        time.sleep(0.01)
+        cache.set(keys[1], ["AAPL"], [], {'answer': 1})
+        time.sleep(0.01)
+        assert cache.get(keys[0]) == {'answer': 0}  # keys[1] is now least recently used
+        time.sleep(0.01)
+        cache.set(keys[2], ["AAPL"], [], {'answer': 2})
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == {'answer': 0} and cache.get(keys[2]) == {'answer': 2}
+
+
+def test_ticker_version_invalidation():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = make_cache(tmp)
+        apple = cache.make_key("revenue", ["AAPL"])
+        both = cache.make_key("compare revenue", ["AAPL", "MSFT"])
+        microsoft = cache.make_key("revenue", ["MSFT"])
+        for key, tickers in ((apple, ["AAPL"]), (both, ["AAPL", "MSFT"]), (microsoft, ["MSFT"])):
+            cache.set(key, tickers, [], {'answer': key})
+
+        # The indexing script re-indexes AAPL through its own instance
+        make_cache(tmp).bump_index_version("AAPL")
+        assert cache.get_version_stamp(["AAPL"]) == "AAPL:1|*:0"
+        assert cache.make_key("revenue", ["AAPL"]) != apple
+        assert cache.get(apple) is None and cache.get(both) is None
+        assert cache.get(microsoft) == {'answer': microsoft}
+
+
+def test_global_version_invalidation():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = make_cache(tmp)
+        key = cache.make_key("revenue", ["MSFT"])
+        cache.set(key, ["MSFT"], [], {'answer': "245B"})
+        cache.bump_index_version()  # Whole collection rebuilt
+        assert cache.get(key) is None
+        assert cache.get_version_stamp(["MSFT"]) == "MSFT:0|*:1"
+        assert cache.get_stats()['entries'] == 0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,83 @@
+"""
+Section indexing (chunk_markdown_files) into an in-memory Qdrant collection
+Indexes an original filing next to its upload and checks that the source
+payload field tells them apart in a filtered search.
+
+Usage:
+    python -m backend.tests.test_section_index
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# The indexing script exits without a Qdrant server unless the embedded store is selected
+os.environ.setdefault("QDRANT_MODE", "memory")
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Filter, FieldCondition, MatchValue
+
+from backend.scripts import chunk_markdown_files
+from backend.app.services.chunk_store import ChunkStore
+from backend.app.services.table_store import TableStore
+
+FILING = """Item 1. Business
+
+{company} designs, manufactures and markets smartphones, personal computers,
+tablets, wearables and accessories, and sells a variety of related services.
+
+Item 7. Management's Discussion and Analysis
+
+Net sales grew during the fiscal year, driven by higher services revenue and
+stronger demand for {company} products across all geographic segments.
+"""
+
+
+class HashEmbedder:
+    """encode() with the SentenceTransformer signature: a fixed random unit vector per text."""
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        vectors = [np.random.default_rng(abs(hash(text)) % 2**32).standard_normal(chunk_markdown_files.EMBEDDING_DIM)
+                   for text in texts]
+        return np.array(vectors) / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def points_for(client: QdrantClient, **match):
+    query_filter = Filter(must=[FieldCondition(key=key, match=MatchValue(value=value)) for key, value in match.items()])
+    points, _ = client.scroll(chunk_markdown_files.COLLECTION_NAME, scroll_filter=query_filter, limit=100)
+    return points
+
+
+def test_upload_and_original_filter_on_source():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        original = tmp / "AAPL_2024.md"
+        upload = tmp / "AAPL_2024_uploaded.md"
+        original.write_text(FILING.format(company="Apple"), encoding="utf-8")
+        upload.write_text(FILING.format(company="Apple Inc."), encoding="utf-8")
+
+        client = QdrantClient(location=":memory:")
+        assert chunk_markdown_files.initialize_collection(client)
+        chunk_store = ChunkStore(tmp / "chunks")
+        table_store = TableStore(tmp / "tables.sqlite3")
+        for md_file in (original, upload):
+            assert chunk_markdown_files.index_filing(md_file, client, HashEmbedder(), chunk_store, table_store) == 2
+
+        both = points_for(client, ticker_year="AAPL_2024")
+        assert len(both) == 4
+        originals = points_for(client, ticker_year="AAPL_2024", source="original")
+        uploads = points_for(client, ticker_year="AAPL_2024", source="uploaded")
+        assert {p.payload["file_path"] for p in originals} == {str(original)}
+        assert {p.payload["file_path"] for p in uploads} == {str(upload)}
+        assert {p.payload["section"] for p in uploads} == {"Business", "MD&A"}
+        # Point ids are chunk store ids
+        assert all("Apple Inc." in chunk_store.get(str(p.id)) for p in uploads)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,114 @@
+"""
+Semantic query cache (services.semantic_cache) with hand-made embeddings
+Similarity threshold, the number guard, version invalidation, false-hit
+reports and the per-scope and global entry caps.
+
+Usage:
+    python -m backend.tests.test_semantic_cache
+"""
+
+import os
+
+# config.py validates these on import; nothing here calls Gemini or Qdrant
+os.environ.setdefault("GOOGLE_API_KEY", "fake-gemini-key")
+os.environ.setdefault("QDRANT_MODE", "memory")
+
+from backend.app.services.semantic_cache import SemanticCache
+
+REVENUE = [1.0, 0.0, 0.0]
+REVENUE_PARAPHRASE = [0.99, 0.1, 0.0]  # cosine ~0.995
+RISKS = [0.0, 1.0, 0.0]
+
+
+def make_cache(**overrides) -> SemanticCache:
+    settings = dict(threshold=0.95, max_entries=10, audit_size=10, max_total_entries=100)
+    settings.update(overrides)
+    return SemanticCache(**settings)
+
+
+def answer(text: str):
+    return {'answer': text, 'metadata': {}}
+
+
+def test_paraphrase_hits_and_is_audited():
+    cache = make_cache()
+    cache.add("Apple revenue 2024", REVENUE, ["AAPL"], "v1", answer("391B"))
+    hit = cache.lookup("What was AAPL's revenue in 2024?", REVENUE_PARAPHRASE, ["AAPL"], "v1")
+    assert hit['answer'] == "391B"
+    assert hit['metadata']['semantic_match']['query'] == "Apple revenue 2024"
+    assert cache.get_audit_log()[0]['audit_id'] == hit['metadata']['semantic_match']['audit_id']
+    assert cache.lookup("Apple risk factors", RISKS, ["AAPL"], "v1") is None  # Below threshold
+    assert cache.lookup("Apple revenue 2024", REVENUE, ["MSFT"], "v1") is None  # Other ticker set
+
+
+def test_numeric_mismatch_is_rejected():
+    cache = make_cache()
+    cache.add("Apple revenue 2024", REVENUE, ["AAPL"], "v1", answer("391B"))
+    # Same embedding, different year: the guard must refuse it
+    assert cache.lookup("Apple revenue 2023", REVENUE, ["AAPL"], "v1") is None
+    assert cache.lookup("Apple revenue", REVENUE, ["AAPL"], "v1") is None
+    assert cache.lookup("Apple revenue 2024 vs 2023", REVENUE, ["AAPL"], "v1") is None
+    stats = cache.get_stats()
+    assert stats['guard_rejections'] == 3 and stats['hits'] == 0
+
+
+def test_guard_picks_matching_entry_over_nearest():
+    cache = make_cache()
+    cache.add("Apple revenue 2023", REVENUE, ["AAPL"], "v1", answer("383B"))
+    cache.add("Apple revenue 2024", REVENUE_PARAPHRASE, ["AAPL"], "v1", answer("391B"))
+    # 2023 is the nearest neighbour, but only 2024 has the right numbers
+    assert cache.lookup("Apple revenue for 2024", REVENUE, ["AAPL"], "v1")['answer'] == "391B"
+    assert cache.get_stats()['guard_rejections'] == 0
+
+
+def test_version_change_drops_scope():
+    cache = make_cache()
+    cache.add("Apple revenue 2024", REVENUE, ["AAPL"], "v1", answer("old"))
+    assert cache.lookup("Apple revenue 2024", REVENUE, ["AAPL"], "v2") is None
+    assert cache.get_stats()['entries'] == 0
+    cache.add("Apple revenue 2024", REVENUE, ["AAPL"], "v2", answer("new"))
+    assert cache.lookup("Apple revenue 2024", REVENUE, ["AAPL"], "v2")['answer'] == "new"
+
+
+def test_false_hit_evicts_entry():
+    cache = make_cache()
+    cache.add("Apple revenue 2024", REVENUE, ["AAPL"], "v1", answer("391B"))
+    audit_id = cache.lookup("Apple revenue 2024", REVENUE, ["AAPL"], "v1")['metadata']['semantic_match']['audit_id']
+    assert cache.report_false_hit(audit_id)
+    assert cache.lookup("Apple revenue 2024", REVENUE, ["AAPL"], "v1") is None
+    assert cache.get_stats()['false_hits'] == 1 and cache.get_stats()['entries'] == 0
+    assert not cache.report_false_hit("unknown")
+
+
+def test_per_scope_cap_drops_oldest():
+    cache = make_cache(max_entries=2)
+    for year in (2022, 2023, 2024):
+        cache.add(f"Apple revenue {year}", REVENUE, ["AAPL"], "v1", answer(str(year)))
+    assert cache.get_stats()['entries'] == 2
+    assert cache.lookup("Apple revenue 2022", REVENUE, ["AAPL"], "v1") is None
+    assert cache.lookup("Apple revenue 2024", REVENUE, ["AAPL"], "v1")['answer'] == "2024"
+
+
+def test_global_cap_across_ticker_sets():
+    cache = make_cache(max_entries=10, max_total_entries=4)
+    for ticker in ("AAPL", "MSFT", "AMZN", "GOOGL", "NVDA", "TSLA"):
+        cache.add(f"{ticker} revenue 2024", REVENUE, [ticker], "v1", answer(ticker))
+        cache.lookup(f"{ticker} revenue 2024", REVENUE, [ticker], "v1")
+    stats = cache.get_stats()
+    assert stats['entries'] == 4 and stats['scopes'] == 4
+    # Least recently used ticker sets went first
+    assert cache.lookup("AAPL revenue 2024", REVENUE, ["AAPL"], "v1") is None
+    assert cache.lookup("TSLA revenue 2024", REVENUE, ["TSLA"], "v1")['answer'] == "TSLA"
+
+    # A lookup refreshes a ticker set, so the next eviction skips it
+    cache.lookup("AMZN revenue 2024", REVENUE, ["AMZN"], "v1")
+    cache.add("META revenue 2024", REVENUE, ["META"], "v1", answer("META"))
+    assert cache.lookup("AMZN revenue 2024", REVENUE, ["AMZN"], "v1")['answer'] == "AMZN"
+    assert cache.lookup("GOOGL revenue 2024", REVENUE, ["GOOGL"], "v1") is None
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,93 @@
+"""
+Single-flight request coalescing (services.single_flight)
+Concurrent calls with one key share a single execution and its result or
+exception, different keys run separately, and a cancelled caller does not
+cancel the shared work.
+
+Usage:
+    python -m backend.tests.test_single_flight
+"""
+
+import asyncio
+
+from backend.app.services.single_flight import SingleFlight
+
+
+def counting_work(calls: list, result, delay: float = 0.05):
+    async def work():
+        calls.append(result)
+        await asyncio.sleep(delay)
+        return result
+    return work
+
+
+def test_concurrent_calls_share_one_execution():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+        results = await asyncio.gather(*[
+            flight.do("aapl revenue", counting_work(calls, "391B")) for _ in range(5)
+        ])
+        assert calls == ["391B"]
+        assert [result for result, _ in results] == ["391B"] * 5
+        assert [shared for _, shared in results] == [False, True, True, True, True]
+        assert flight.get_stats() == {'in_flight': 0, 'executions': 1, 'coalesced': 4}
+    asyncio.run(run())
+
+
+def test_different_keys_run_separately():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+        results = await asyncio.gather(
+            flight.do("aapl", counting_work(calls, "AAPL")),
+            flight.do("msft", counting_work(calls, "MSFT"))
+        )
+        assert sorted(calls) == ["AAPL", "MSFT"]
+        assert results == [("AAPL", False), ("MSFT", False)]
+    asyncio.run(run())
+
+
+def test_finished_key_runs_again():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+        await flight.do("aapl", counting_work(calls, "first", delay=0))
+        assert await flight.do("aapl", counting_work(calls, "second", delay=0)) == ("second", False)
+        assert flight.get_stats()['executions'] == 2
+    asyncio.run(run())
+
+
+def test_exception_reaches_every_waiter():
+    async def run():
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.05)
+            raise ValueError("Gemini unavailable")
+
+        results = await asyncio.gather(*[flight.do("aapl", failing) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.get_stats()['in_flight'] == 0
+    asyncio.run(run())
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+        first = asyncio.ensure_future(flight.do("aapl", counting_work(calls, "391B", delay=0.1)))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(flight.do("aapl", counting_work(calls, "unused")))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == ("391B", True)
+        assert calls == ["391B"]
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[SUCCESS] {name}")
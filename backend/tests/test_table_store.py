@@ -0,0 +1,82 @@
+"""
+Financial table store (services.table_store) on a temporary SQLite file
+Ingests a small income statement in the layout the HTML converter produces
+("$" and the closing paren of a negative in cells of their own) and queries it.
+
+Usage:
+    python -m backend.tests.test_table_store
+"""
+
+import tempfile
+from pathlib import Path
+
+from backend.app.services.table_store import TableStore, parse_markdown_tables
+
+INCOME_STATEMENT = """\
+Apple Inc.
+
+CONSOLIDATED STATEMENTS OF OPERATIONS
+
+(In millions, except number of shares, which are reflected in thousands, and per-share amounts)
+
+|  |  |  |  |  |  |  |  |  |
+| --- | --- | --- | --- | --- | --- | --- | --- | --- |
+|  | | | Years ended | | | | | |
+|  | | | September 28, 2024 | | |  September 30, 2023 | | |
+| Net sales: | | |  | | |  | | |
+| Products | | | $ | 294,866 |  | $ | 298,085 |  |
+| Services | | | 96,169 | |  | 85,200 | |  |
+| Total net sales | | | 391,035 | |  | 383,285 | |  |
+| Other income/(expense), net | | | 269 | |  | (565 | ) |  |
+| Net income | | | $ | 93,736 |  | $ | 96,995 |  |
+| Diluted earnings per share | | | $ | 6.08 |  | $ | 6.13 |  |
+"""
+
+
+def test_parse_rows():
+    rows = {(row['line_item'], row['period']): row for row in parse_markdown_tables(INCOME_STATEMENT)}
+    assert rows[("Net sales / Products", "2024")]['value'] == 294866.0
+    assert rows[("Net sales / Products", "2024")]['line_item_key'] == "products"
+    assert rows[("Total net sales", "2023")]['value'] == 383285.0
+    assert rows[("Other income/(expense), net", "2023")]['value'] == -565.0
+    assert rows[("Net income", "2024")]['statement'] == "income"
+    assert rows[("Net income", "2024")]['unit'] == "millions"
+    assert rows[("Diluted earnings per share", "2024")]['unit'] == "per_share"
+
+
+def test_ingest_then_query():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TableStore(Path(tmp) / "tables.sqlite3")
+        written = store.ingest_filing("AAPL", "2024", INCOME_STATEMENT, "AAPL_2024.md")
+        assert written == 12
+        assert store.stats()['rows'] == 12 and store.stats()['filings'] == 1
+
+        rows = store.lookup("AAPL", "TOTAL NET SALES:")
+        assert [(row['period'], row['value']) for row in rows] == [("2023", 383285.0), ("2024", 391035.0)]
+        assert store.lookup("AAPL", "Net income", statement="balance_sheet") == []
+
+        assert store.get_metric_series("AAPL", "revenue") == {2023: 383285e6, 2024: 391035e6}
+        assert store.get_metric_series("AAPL", "Other income/(expense), net")[2023] == -565e6
+        assert store.get_metric_series("MSFT", "revenue") == {}
+
+        # Re-ingesting a filing replaces its rows
+        assert store.ingest_filing("AAPL", "2024", INCOME_STATEMENT, "AAPL_2024.md") == 12
+        assert store.stats()['rows'] == 12
+
+
+def test_upload_wins_over_original():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TableStore(Path(tmp) / "tables.sqlite3")
+        store.ingest_filing("AAPL", "2024", INCOME_STATEMENT, "AAPL_2024.md")
+        restated = INCOME_STATEMENT.replace("391,035", "391,000")
+        store.ingest_filing("AAPL", "2024", restated, "AAPL_2024_uploaded.md", source="uploaded")
+        assert store.stats()['filings'] == 2
+        assert store.get_metric_series("AAPL", "revenue")[2024] == 391000e6
+        assert store.get_metric_series_all("revenue") == {"AAPL": {2023: 383285e6, 2024: 391000e6}}
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[SUCCESS] {name}")
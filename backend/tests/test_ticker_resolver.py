@@ -0,0 +1,75 @@
+"""
+TickerResolver regression cases: possessive ticker symbols and short
+company names built from registrant names.
+
+Usage:
+    python -m backend.tests.test_ticker_resolver
+"""
+
+import tempfile
+from pathlib import Path
+
+from backend.app.utils.ticker_resolver import TickerResolver, first_word_aliases
+
+REGISTRANTS = {
+    "AAPL": "Apple Inc.",
+    "NVDA": "NVIDIA CORP",
+    "COST": "COSTCO WHOLESALE CORP",
+    "HD": "HOME DEPOT, INC.",
+    "GE": "GENERAL ELECTRIC COMPANY",
+    "GM": "GENERAL MOTORS CO",
+    "WFC": "WELLS FARGO & COMPANY",
+}
+
+
+def make_resolver() -> TickerResolver:
+    """Resolver over a processed_data folder with one cover page per company."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for ticker, name in REGISTRANTS.items():
+            cover = f"UNITED STATES\nFORM 10-K\n{name}\n(Exact name of registrant as specified in its charter)\n"
+            (Path(tmp) / f"{ticker}_2024.md").write_text(cover, encoding="utf-8")
+        return TickerResolver.from_filings(Path(tmp))
+
+
+def test_possessive_symbols():
+    resolver = make_resolver()
+    assert resolver.resolve("What was AAPL's 2024 revenue?") == ["AAPL"]
+    assert resolver.resolve("NVDA’s growth") == ["NVDA"]
+    assert resolver.resolve("AAPL's revenue") == ["AAPL"]
+    assert resolver.resolve("AAPL'S revenue") == ["AAPL"]
+    assert resolver.resolve("Compare NVDA's and AAPL's margins") == ["NVDA", "AAPL"]
+
+
+def test_first_word_of_registrant_name():
+    resolver = make_resolver()
+    assert resolver.resolve("Costco revenue") == ["COST"]
+    assert resolver.resolve("Costco's revenue") == ["COST"]
+    assert resolver.resolve("Costco Wholesale net income") == ["COST"]
+    assert resolver.resolve("General Motors vs General Electric") == ["GM", "GE"]
+
+
+def test_first_word_guards():
+    aliases = first_word_aliases(REGISTRANTS)
+    assert aliases["costco"] == "COST"
+    assert "general" not in aliases  # Starts two names
+    assert "home" not in aliases  # Generic word
+    assert "apple" not in aliases  # Single-word name already covers it
+    resolver = make_resolver()
+    assert resolver.resolve("home sales in general") == []
+    assert resolver.resolve("Wells Fargo deposits") == ["WFC"]
+
+
+def test_uploaded_company_short_name():
+    resolver = make_resolver()
+    resolver.add_company("TGT", "TARGET CORPORATION")
+    resolver.add_company("GD", "GENERAL DYNAMICS CORP")
+    assert resolver.resolve("Target revenue") == ["TGT"]
+    assert resolver.resolve("General Dynamics backlog") == ["GD"]
+    assert resolver.resolve("general revenue") == []
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[SUCCESS] {name}")